@@ -0,0 +1,21 @@
+READ_ONLY_COMMANDS = {
+    "build-report",
+    "cache-size",
+    "config-test",
+    "ha-heartbeat",
+}
+
+
+def is_read_only_command(command: str) -> bool:
+    """Returns True if the command doesn't change any state on the server (eg. lease4-get,
+    subnet4-list, statistic-get-all) and is therefore safe to send to any server or to retry
+
+    Args:
+        command:    Kea API command (eg. lease4-get) or the daemon method name (eg. lease4_get)
+    """
+    command = command.replace("_", "-")
+    if command in READ_ONLY_COMMANDS:
+        return True
+
+    parts = command.split("-")
+    return "get" in parts or "list" in parts
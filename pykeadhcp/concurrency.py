@@ -0,0 +1,327 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+
+from pykeadhcp.exceptions import KeaCircuitOpenException, KeaException
+from pykeadhcp.instrumentation import Instrumentation
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Errors of calls which didn't get an answer from the server, other errors (eg. a Kea result
+# rejecting a reservation) were answered like any other call and only count by their latency
+TRANSPORT_ERRORS = (RequestsConnectionError, Timeout, KeaCircuitOpenException)
+
+
+class DhcpTrafficMonitor:
+    """Measures the live DHCP traffic of a Dhcp4 or Dhcp6 daemon from the pkt4-received or
+    pkt6-received statistic, so bulk operations can back off while the server is busy handing
+    out leases. The statistic is read with statistic-get at most once every interval seconds and
+    the rate is the number of packets received per second between the last two reads.
+
+    traffic = DhcpTrafficMonitor(server.dhcp4, max_rate=500)
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+        max_rate:       Packets per second above which the server is considered busy
+        statistic:      Statistic to read, defaults to pkt4-received or pkt6-received
+        interval:       Minimum number of seconds between two reads of the statistic
+    """
+
+    def __init__(
+        self,
+        daemon,
+        max_rate: float,
+        statistic: str = None,
+        interval: float = 5.0,
+    ):
+        self.daemon = daemon
+        self.max_rate = max_rate
+        self.statistic = statistic or (
+            "pkt4-received" if daemon.service == "dhcp4" else "pkt6-received"
+        )
+        self.interval = interval
+        self.last_rate: Optional[float] = None
+        self._sample: Optional[tuple] = None
+        self._lock = threading.Lock()
+
+    def rate(self) -> Optional[float]:
+        """Returns the packets received per second, None until the statistic was read twice"""
+        with self._lock:
+            now = time.monotonic()
+            if self._sample and now - self._sample[0] < self.interval:
+                return self.last_rate
+
+            data = self.daemon.statistic_get(name=self.statistic)
+            samples = (data.arguments or {}).get(self.statistic) or []
+            value = samples[0][0] if samples else 0
+            if self._sample and now > self._sample[0]:
+                # Statistics are reset by statistic-reset and config reloads
+                self.last_rate = max(value - self._sample[1], 0) / (
+                    now - self._sample[0]
+                )
+            self._sample = (now, value)
+            return self.last_rate
+
+    def busy(self) -> bool:
+        """Returns True if the server receives more than max_rate packets per second"""
+        rate = self.rate()
+        return rate is not None and rate > self.max_rate
+
+
+class AdaptiveLimit:
+    """Concurrency limit for bulk operations (see bounded_map) tuned with additive increase and
+    multiplicative decrease (AIMD) from the latency of the calls. Latencies are evaluated every
+    window calls: the limit grows by one if the latency percentile stays below target_latency
+    (or tolerance times the lowest percentile seen so far) and the limit was fully used, a higher
+    percentile multiplies the limit by decrease. Calls failing with a transport error (see
+    TRANSPORT_ERRORS), errors reported with record_error (eg. retries of the Kea transport, see
+    watch) and a busy traffic monitor decrease the limit as well, at most once per round of calls
+    in flight. The traffic monitor is sampled by sample_traffic before calls are submitted, never
+    from the threads finishing the calls, a failed read keeps the previous result. The limit
+    stays between minimum and the hard cap maximum.
+
+    Changes are emitted to the instrumentation as concurrency_limit events with the limit,
+    previous_limit and reason (latency, error, traffic or the name of a watched event).
+
+    limit = AdaptiveLimit(maximum=32, traffic=DhcpTrafficMonitor(server.dhcp4, max_rate=500))
+    limit.watch(server.instrumentation)
+    for lease in dump_leases(server.dhcp4, limit=limit):
+        print(lease.ip_address)
+    limit.unwatch(server.instrumentation)
+
+    Args:
+        initial:            Limit to start with
+        minimum:            Lowest limit
+        maximum:            Hard cap of the limit (and the size of the thread pool of bounded_map)
+        window:             Number of calls per latency evaluation
+        percentile:         Latency percentile to evaluate (eg. 0.9 for p90)
+        target_latency:     Highest acceptable latency in seconds, defaults to tolerance x the lowest percentile seen
+        tolerance:          Factor of the lowest percentile seen before the latency counts as too high
+        decrease:           Factor applied to the limit on errors, high latency or busy traffic
+        traffic:            Traffic monitor to yield to live DHCP traffic, the limit doesn't grow while it is busy
+        instrumentation:    Instrumentation to emit limit changes to
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+        window: int = 20,
+        percentile: float = 0.9,
+        target_latency: float = None,
+        tolerance: float = 2.0,
+        decrease: float = 0.5,
+        traffic: DhcpTrafficMonitor = None,
+        instrumentation: Instrumentation = None,
+    ):
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.window = max(window, 1)
+        self.percentile = percentile
+        self.target_latency = target_latency
+        self.tolerance = tolerance
+        self.decrease = decrease
+        self.traffic = traffic
+        self.instrumentation = instrumentation or Instrumentation()
+        self.baseline: Optional[float] = None
+        self.in_flight = 0
+        self.busy = False
+        self._samples: List[float] = []
+        self._peak = 0
+        self._completed = 0
+        self._resume_at = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """Waits until fewer calls than the limit are in flight and counts a new call"""
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+            self._peak = max(self._peak, self.in_flight)
+
+    def release(self, latency: float, error: bool = False) -> None:
+        """Counts a finished call
+
+        Args:
+            latency:    Duration of the call in seconds
+            error:      The call failed with a transport error
+        """
+        samples = None
+        with self._condition:
+            self.in_flight -= 1
+            self._completed += 1
+            if error:
+                self._decrease("error")
+            else:
+                self._samples.append(latency)
+                if len(self._samples) >= self.window:
+                    samples, peak = self._samples, self._peak
+                    self._samples, self._peak = [], self.in_flight
+            self._condition.notify_all()
+
+        if samples:
+            self._evaluate(samples, peak)
+
+    def record_error(self, reason: str = "error") -> None:
+        """Decreases the limit after an error which didn't fail the call itself (eg. a retry)
+
+        Args:
+            reason:     Reason of the decrease
+        """
+        with self._condition:
+            self._decrease(reason)
+
+    def sample_traffic(self) -> None:
+        """Reads the traffic monitor, the result is used by the next latency evaluation. The
+        monitor sends statistic-get at most once per interval so this can be called before
+        every call (bounded_map does). If the statistic can't be read the previous result is
+        kept and the error is counted as traffic_sample_errors"""
+        if not self.traffic:
+            return
+
+        try:
+            self.busy = self.traffic.busy()
+        except (KeaException, RequestsConnectionError, Timeout):
+            self.instrumentation.increment("traffic_sample_errors")
+
+    def watch(self, instrumentation: Instrumentation) -> None:
+        """Decreases the limit for every retry and opened circuit of a Kea instance, which
+        are caused by connection errors, timeouts and 5xx responses
+
+        Args:
+            instrumentation:    Instrumentation of the Kea instance (eg. server.instrumentation)
+        """
+        instrumentation.add_hook("retry", self._on_event)
+        instrumentation.add_hook("circuit_breaker", self._on_event)
+
+    def unwatch(self, instrumentation: Instrumentation) -> None:
+        """Stops following the retries and circuits of a Kea instance passed to watch
+
+        Args:
+            instrumentation:    Instrumentation of the Kea instance (eg. server.instrumentation)
+        """
+        instrumentation.remove_hook("retry", self._on_event)
+        instrumentation.remove_hook("circuit_breaker", self._on_event)
+
+    def _on_event(self, event: str, **data) -> None:
+        if event == "circuit_breaker" and data.get("state") != "open":
+            return
+        self.record_error(event)
+
+    def _evaluate(self, samples: List[float], peak: int) -> None:
+        samples.sort()
+        latency = samples[
+            min(max(math.ceil(self.percentile * len(samples)) - 1, 0), len(samples) - 1)
+        ]
+        with self._condition:
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            threshold = self.target_latency
+            if threshold is None:
+                threshold = self.baseline * self.tolerance
+
+            if self.busy:
+                self._decrease("traffic")
+            elif latency > threshold:
+                self._decrease("latency")
+            elif peak >= self.limit and self.limit < self.maximum:
+                self._set(self.limit + 1, "latency")
+            self._condition.notify_all()
+
+    def _decrease(self, reason: str) -> None:
+        # Calls which were in flight during the last decrease report the same overload,
+        # so the limit is only decreased again by a call started after it
+        if self._completed < self._resume_at:
+            return
+
+        self._resume_at = self._completed + self.in_flight + 1
+        self._samples, self._peak = [], self.in_flight
+        self._set(int(self.limit * self.decrease), reason)
+
+    def _set(self, limit: int, reason: str) -> None:
+        limit = min(max(limit, self.minimum), self.maximum)
+        if limit == self.limit:
+            return
+
+        previous_limit = self.limit
+        self.limit = limit
+        self.instrumentation.increment(
+            "concurrency_increase" if limit > previous_limit else "concurrency_decrease"
+        )
+        self.instrumentation.emit(
+            "concurrency_limit",
+            limit=limit,
+            previous_limit=previous_limit,
+            reason=reason,
+        )
+
+
+def _release(limit: AdaptiveLimit, started_at: float, future: Future) -> None:
+    limit.release(
+        time.monotonic() - started_at,
+        error=not future.cancelled()
+        and isinstance(future.exception(), TRANSPORT_ERRORS),
+    )
+
+
+def bounded_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 8,
+    max_pending: int = None,
+    executor: Executor = None,
+    limit: AdaptiveLimit = None,
+) -> Iterator[R]:
+    """Calls func for every item using a thread pool and yields the results in the same
+    order as the items. Items are consumed lazily so no more than max_pending calls are
+    queued at any time, which keeps memory flat when items is a large generator.
+
+    With an adaptive limit the number of calls in flight follows the limit instead of
+    max_workers, and the thread pool has room for the hard cap of the limit.
+
+    Args:
+        func:           Callable to run for every item
+        items:          Iterable of items
+        max_workers:    Maximum number of concurrent calls
+        max_pending:    Maximum number of submitted but unconsumed calls (defaults to 2x max_workers)
+        executor:       Existing executor to use (eg. a ProcessPoolExecutor) instead of a new thread pool
+        limit:          Adaptive concurrency limit shared by the calls
+    """
+    if limit:
+        max_workers = limit.maximum
+    max_pending = max_pending or max_workers * 2
+    context = nullcontext(executor) if executor else ThreadPoolExecutor(max_workers)
+    with context as pool:
+        pending = deque()
+        for item in items:
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+
+            if not limit:
+                pending.append(pool.submit(func, item))
+                continue
+
+            limit.sample_traffic()
+            limit.acquire()
+            started_at = time.monotonic()
+            try:
+                future = pool.submit(func, item)
+            except BaseException:
+                limit.release(0.0, error=True)
+                raise
+            future.add_done_callback(partial(_release, limit, started_at))
+            pending.append(future)
+
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,6 @@
+from pykeadhcp.config_backend.writer import (
+    RemoteBulkWriter,
+    RemoteBulkReport,
+    RemoteWriteResult,
+)
+from pykeadhcp.config_backend.mirror import ConfigBackendMirror, MirrorRefreshReport
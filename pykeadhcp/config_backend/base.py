@@ -0,0 +1,59 @@
+from typing import TYPE_CHECKING, List, Union
+
+if TYPE_CHECKING:
+    from pykeadhcp.daemons import Dhcp4, Dhcp6
+
+from pykeadhcp.models.generic import KeaResponse
+from pykeadhcp.exceptions import KeaHookLibraryNotConfiguredException
+
+
+class ConfigBackendClient:
+    """Base class for tools sending many commands to the configuration backend (cb_cmds hook).
+    Unlike Kea.send_command_remote, the hook library and remote map are only validated once.
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+        server_tags:    List of server tags
+        remote_map:     (remote_type, remote_host or remote_port) to select a specific remote database
+        max_workers:    Maximum number of concurrent commands
+    """
+
+    def __init__(
+        self,
+        daemon: Union["Dhcp4", "Dhcp6"],
+        server_tags: List[str] = ["all"],
+        remote_map: dict = {},
+        max_workers: int = 8,
+    ):
+        self.daemon = daemon
+        self.api = daemon.api
+        self.service = daemon.service
+        self.version = self.service[-1]
+        self.server_tags = server_tags
+        self.max_workers = max_workers
+
+        if not self.api.is_hook_enabled(
+            "cb_cmds", self.api.hook_library.get(self.service, [])
+        ):
+            raise KeaHookLibraryNotConfiguredException(self.service, "cb_cmds")
+
+        self.remote = self.api.parse_remote_map(remote_map) if remote_map else None
+
+    def send(self, command: str, arguments: dict) -> KeaResponse:
+        """Sends a remote-* command with the validated remote map
+
+        Args:
+            command:        Supported cb_cmds command (eg. remote-subnet4-set)
+            arguments:      Argument parameters to pass to the command
+        """
+        if self.remote:
+            arguments["remote"] = self.remote
+
+        return self.api.post(
+            endpoint="/",
+            body={
+                "command": command,
+                "service": [self.service],
+                "arguments": arguments,
+            },
+        )
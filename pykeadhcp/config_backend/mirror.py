@@ -0,0 +1,283 @@
+import json
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from pykeadhcp.concurrency import bounded_map
+from pykeadhcp.config_backend.base import ConfigBackendClient
+from pykeadhcp.models.dhcp4.client_class import ClientClass4
+from pykeadhcp.models.dhcp4.shared_network import SharedNetwork4
+from pykeadhcp.models.dhcp4.subnet import Subnet4
+from pykeadhcp.models.dhcp6.client_class import ClientClass6
+from pykeadhcp.models.dhcp6.shared_network import SharedNetwork6
+from pykeadhcp.models.dhcp6.subnet import Subnet6
+from pykeadhcp.models.generic.option_def import OptionDef
+from pykeadhcp.exceptions import KeaException, KeaObjectNotFoundException
+
+MODELS = {
+    "4": (Subnet4, SharedNetwork4, ClientClass4),
+    "6": (Subnet6, SharedNetwork6, ClientClass6),
+}
+
+
+class MirrorRefreshReport(BaseModel):
+    full: bool
+    fetched: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    duration: float = 0.0
+
+
+class ConfigBackendMirror(ConfigBackendClient):
+    """Local in-memory snapshot of the configuration backend (cb_cmds hook) for a set of
+    server tags, indexed so reads can be served without any API call.
+
+    The first refresh fetches every category (subnets, shared networks, client classes,
+    option definitions and global parameters) concurrently. Following refreshes only list
+    the subnets and shared networks and re-fetch the ones that are new or whose list entry
+    (prefix, shared network and metadata) changed. Use refresh(full=True) to pick up changes
+    that are not visible in the list entries (eg. a pool added to an existing subnet).
+
+    mirror = ConfigBackendMirror(server.dhcp4, server_tags=["all"])
+    mirror.refresh()
+    subnet = mirror.get_subnet_by_prefix("192.0.2.0/24")
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+        server_tags:    List of server tags to mirror
+        remote_map:     (remote_type, remote_host or remote_port) to select a specific remote database
+        max_workers:    Maximum number of concurrent commands
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.subnet_model, self.shared_network_model, self.client_class_model = MODELS[
+            self.version
+        ]
+        self.subnets: Dict[int, Any] = {}
+        self.shared_networks: Dict[str, Any] = {}
+        self.client_classes: Dict[str, Any] = {}
+        self.option_defs: Dict[Tuple[Optional[int], Optional[str]], OptionDef] = {}
+        self.global_parameters: Dict[str, Any] = {}
+        self.refreshed_at = None
+        self._prefixes: Dict[str, int] = {}
+        self._subnet_entries: Dict[int, str] = {}
+        self._shared_network_entries: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get_subnet(self, id: int):
+        """Returns a mirrored subnet by its id
+
+        Args:
+            id:     Subnet ID
+        """
+        return self.subnets.get(id)
+
+    def get_subnet_by_prefix(self, prefix: str):
+        """Returns a mirrored subnet by its prefix
+
+        Args:
+            prefix:     Subnet CIDR (eg. 192.0.2.0/24)
+        """
+        return self.subnets.get(self._prefixes.get(prefix))
+
+    def get_shared_network(self, name: str):
+        """Returns a mirrored shared network by its name
+
+        Args:
+            name:   Name of the shared network
+        """
+        return self.shared_networks.get(name)
+
+    def get_client_class(self, name: str):
+        """Returns a mirrored client class by its name
+
+        Args:
+            name:   Name of the client class
+        """
+        return self.client_classes.get(name)
+
+    def get_option_def(self, code: int, space: str = None) -> OptionDef:
+        """Returns a mirrored option definition
+
+        Args:
+            code:   Option code
+            space:  Option space (eg. dhcp4)
+        """
+        space = space or f"dhcp{self.version}"
+        return self.option_defs.get((code, space))
+
+    def refresh(self, full: bool = False) -> MirrorRefreshReport:
+        """Refreshes the snapshot, only re-fetching subnets and shared networks that changed
+        unless this is the first refresh or full is True
+
+        Args:
+            full:   Re-fetch every object
+        """
+        started = time.monotonic()
+        full = full or self.refreshed_at is None
+        report = MirrorRefreshReport(full=full)
+
+        categories = [
+            self._list_subnets,
+            self._list_shared_networks,
+            self._get_client_classes,
+            self._get_option_defs,
+            self._get_global_parameters,
+        ]
+        (
+            subnet_entries,
+            shared_network_entries,
+            client_classes,
+            option_defs,
+            global_parameters,
+        ) = bounded_map(lambda fetch: fetch(), categories, max_workers=len(categories))
+
+        subnets = self._sync(
+            report,
+            self.subnets,
+            self._subnet_entries,
+            subnet_entries,
+            self._get_subnet,
+            full,
+        )
+        shared_networks = self._sync(
+            report,
+            self.shared_networks,
+            self._shared_network_entries,
+            shared_network_entries,
+            self._get_shared_network,
+            full,
+        )
+
+        with self._lock:
+            self.subnets = subnets
+            self._prefixes = {subnet.subnet: id for id, subnet in subnets.items()}
+            self._subnet_entries = subnet_entries
+            self.shared_networks = shared_networks
+            self._shared_network_entries = shared_network_entries
+            self.client_classes = client_classes
+            self.option_defs = option_defs
+            self.global_parameters = global_parameters
+            self.refreshed_at = time.time()
+
+        report.duration = time.monotonic() - started
+        return report
+
+    def _sync(
+        self,
+        report: MirrorRefreshReport,
+        existing: dict,
+        existing_entries: Dict[Any, str],
+        entries: Dict[Any, str],
+        fetch,
+        full: bool,
+    ) -> dict:
+        objects = {}
+        changed = []
+        for key, entry in entries.items():
+            if not full and key in existing and existing_entries.get(key) == entry:
+                objects[key] = existing[key]
+                report.unchanged += 1
+            else:
+                changed.append(key)
+
+        for key, obj in zip(
+            changed, bounded_map(fetch, changed, max_workers=self.max_workers)
+        ):
+            if obj is not None:
+                objects[key] = obj
+                report.fetched += 1
+
+        report.removed += len([key for key in existing if key not in entries])
+        return objects
+
+    def _list_subnets(self) -> Dict[int, str]:
+        arguments = self._fetch(
+            f"remote-subnet{self.version}-list", {"server-tags": self.server_tags}
+        )
+        return {
+            subnet["id"]: json.dumps(subnet, sort_keys=True)
+            for subnet in arguments.get("subnets", [])
+        }
+
+    def _list_shared_networks(self) -> Dict[str, str]:
+        arguments = self._fetch(
+            f"remote-network{self.version}-list", {"server-tags": self.server_tags}
+        )
+        return {
+            network["name"]: json.dumps(network, sort_keys=True)
+            for network in arguments.get("shared-networks", [])
+        }
+
+    def _get_subnet(self, id: int):
+        subnets = self._fetch(
+            f"remote-subnet{self.version}-get-by-id", {"subnets": [{"id": id}]}
+        ).get("subnets")
+        return self.subnet_model.parse_obj(subnets[0]) if subnets else None
+
+    def _get_shared_network(self, name: str):
+        networks = self._fetch(
+            f"remote-network{self.version}-get",
+            {"shared-networks": [{"name": name}], "subnets-include": "no"},
+        ).get("shared-networks")
+        return self.shared_network_model.parse_obj(networks[0]) if networks else None
+
+    def _get_client_classes(self) -> Dict[str, Any]:
+        arguments = self._fetch(
+            f"remote-class{self.version}-get-all", {"server-tags": self.server_tags}
+        )
+        return {
+            client_class["name"]: self.client_class_model.parse_obj(client_class)
+            for client_class in arguments.get("client-classes", [])
+        }
+
+    def _get_option_defs(self) -> Dict[Tuple[Optional[int], Optional[str]], OptionDef]:
+        # The option-def and global-parameter get-all commands only accept a single server tag
+        option_defs = {}
+        for server_tag in self.server_tags:
+            arguments = self._fetch(
+                f"remote-option-def{self.version}-get-all",
+                {"server-tags": [server_tag]},
+            )
+            for option_def in arguments.get("option-defs", []):
+                option_def = OptionDef.parse_obj(option_def)
+                option_defs[(option_def.code, option_def.space)] = option_def
+        return option_defs
+
+    def _get_global_parameters(self) -> Dict[str, Any]:
+        parameters = {}
+        for server_tag in self.server_tags:
+            arguments = self._fetch(
+                f"remote-global-parameter{self.version}-get-all",
+                {"server-tags": [server_tag]},
+            )
+            for parameter in arguments.get("parameters", []):
+                parameters.update(
+                    {
+                        key: value
+                        for key, value in parameter.items()
+                        if key != "metadata"
+                    }
+                )
+        return parameters
+
+    def _fetch(self, command: str, arguments: dict) -> dict:
+        try:
+            data = self.send(command, arguments)
+        except KeaObjectNotFoundException:
+            return {}
+
+        if data is None:
+            raise KeaException(f"Empty response from {command}")
+
+        # Result code 3 means there are no objects in the category
+        if data.result == 3:
+            return {}
+
+        if data.result != 0:
+            raise KeaException(f"{command} failed: {data.text}")
+
+        return data.arguments or {}
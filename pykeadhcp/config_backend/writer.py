@@ -0,0 +1,212 @@
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+from requests.exceptions import RequestException
+
+from pykeadhcp.concurrency import bounded_map
+from pykeadhcp.models.generic import KeaResponse
+from pykeadhcp.models.generic.base import KeaBaseModel
+from pykeadhcp.models.generic.client_class import ClientClass
+from pykeadhcp.models.generic.option_data import OptionData
+from pykeadhcp.models.generic.shared_network import SharedNetwork
+from pykeadhcp.models.generic.subnet import Subnet
+from pykeadhcp.models.serializer import serialize_model
+from pykeadhcp.config_backend.base import ConfigBackendClient
+from pykeadhcp.exceptions import KeaException
+
+
+class RemoteWriteResult(BaseModel):
+    command: str
+    key: str
+    result: Optional[int]
+    text: Optional[str]
+    error: Optional[str]
+
+    @property
+    def success(self) -> bool:
+        return self.error is None and self.result == 0
+
+
+class RemoteBulkReport(BaseModel):
+    total: int = 0
+    succeeded: int = 0
+    failed: List[RemoteWriteResult] = []
+    pull: Optional[KeaResponse]
+
+
+class RemoteBulkWriter(ConfigBackendClient):
+    """Writes many objects to the configuration backend (cb_cmds hook) at once. The cb_cmds
+    hook only accepts a single subnet, shared network, client class or option per remote-*-set
+    command, so the commands are sent concurrently instead. The remote map and hook library are
+    only validated once and config-backend-pull is sent once all objects have been written.
+
+    writer = RemoteBulkWriter(server.dhcp4, server_tags=["all"], remote_map={"type": "mysql"})
+    report = writer.write(shared_networks=networks, subnets=subnets)
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+        server_tags:    List of server tags to write the objects to
+        remote_map:     (remote_type, remote_host or remote_port) to select a specific remote database
+        max_workers:    Maximum number of concurrent remote-*-set commands
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.report = RemoteBulkReport()
+        self._lock = threading.Lock()
+
+    def set_shared_networks(
+        self, shared_networks: Iterable[SharedNetwork]
+    ) -> List[RemoteWriteResult]:
+        """Writes shared networks using remote-network4-set/remote-network6-set, any subnets
+        inside the shared networks are written afterwards with the shared-network-name set
+
+        Args:
+            shared_networks:    Iterable of SharedNetwork4 or SharedNetwork6 objects
+        """
+        subnets_field = f"subnet{self.version}"
+        subnets = []
+
+        def build(network: SharedNetwork) -> Tuple[str, dict]:
+            data = self._dump(network)
+            for subnet in data.pop(subnets_field, None) or []:
+                subnets.append((subnet, network.name))
+            return network.name, {"shared-networks": [data]}
+
+        results = self._send(
+            f"remote-network{self.version}-set", map(build, shared_networks)
+        )
+        if subnets:
+            results += self._send(
+                f"remote-subnet{self.version}-set",
+                (self._subnet_arguments(data, name) for data, name in subnets),
+            )
+        return results
+
+    def set_subnets(
+        self, subnets: Iterable[Subnet], shared_network_name: str = None
+    ) -> List[RemoteWriteResult]:
+        """Writes subnets using remote-subnet4-set/remote-subnet6-set
+
+        Args:
+            subnets:                Iterable of Subnet4 or Subnet6 objects
+            shared_network_name:    Name of shared-network (if global subnets, use None)
+        """
+        return self._send(
+            f"remote-subnet{self.version}-set",
+            (
+                self._subnet_arguments(self._dump(subnet), shared_network_name)
+                for subnet in subnets
+            ),
+        )
+
+    def set_client_classes(
+        self, client_classes: Iterable[ClientClass]
+    ) -> List[RemoteWriteResult]:
+        """Writes client classes using remote-class4-set/remote-class6-set. Classes are written
+        in order as a class can only depend on classes written before it
+
+        Args:
+            client_classes:     Iterable of ClientClass4 or ClientClass6 objects
+        """
+        command = f"remote-class{self.version}-set"
+        return [
+            self._post(
+                command,
+                client_class.name,
+                {"client-classes": [self._dump(client_class)]},
+            )
+            for client_class in client_classes
+        ]
+
+    def set_global_options(
+        self, options: Iterable[OptionData]
+    ) -> List[RemoteWriteResult]:
+        """Writes global options using remote-option4-global-set/remote-option6-global-set
+
+        Args:
+            options:    Iterable of OptionData objects
+        """
+        return self._send(
+            f"remote-option{self.version}-global-set",
+            (
+                (str(option.code or option.name), {"options": [self._dump(option)]})
+                for option in options
+            ),
+        )
+
+    def pull(self) -> KeaResponse:
+        """Sends a single config-backend-pull so the server applies everything written"""
+        self.report.pull = self.daemon.config_backend_pull()
+        return self.report.pull
+
+    def write(
+        self,
+        shared_networks: Iterable[SharedNetwork] = (),
+        subnets: Iterable[Subnet] = (),
+        client_classes: Iterable[ClientClass] = (),
+        options: Iterable[OptionData] = (),
+        pull: bool = True,
+    ) -> RemoteBulkReport:
+        """Writes every object in dependency order (client classes, options, shared networks and
+        then global subnets) and sends config-backend-pull once at the end
+
+        Args:
+            shared_networks:    Iterable of SharedNetwork4 or SharedNetwork6 objects
+            subnets:            Iterable of global Subnet4 or Subnet6 objects
+            client_classes:     Iterable of ClientClass4 or ClientClass6 objects
+            options:            Iterable of global OptionData objects
+            pull:               Send config-backend-pull once everything has been written
+        """
+        self.set_client_classes(client_classes)
+        self.set_global_options(options)
+        self.set_shared_networks(shared_networks)
+        self.set_subnets(subnets)
+
+        if pull:
+            self.pull()
+
+        return self.report
+
+    def _dump(self, model: KeaBaseModel) -> dict:
+        return serialize_model(model)
+
+    def _subnet_arguments(
+        self, data: dict, shared_network_name: Optional[str]
+    ) -> Tuple[str, dict]:
+        data["shared-network-name"] = shared_network_name
+        return data["subnet"], {"subnets": [data]}
+
+    def _send(
+        self, command: str, arguments: Iterable[Tuple[str, dict]]
+    ) -> List[RemoteWriteResult]:
+        return list(
+            bounded_map(
+                lambda item: self._post(command, *item),
+                arguments,
+                max_workers=self.max_workers,
+            )
+        )
+
+    def _post(self, command: str, key: str, arguments: dict) -> RemoteWriteResult:
+        arguments["server-tags"] = self.server_tags
+        try:
+            data = self.send(command, arguments)
+            result = RemoteWriteResult(
+                command=command,
+                key=key,
+                result=data.result if data else None,
+                text=data.text if data else "Empty response",
+            )
+        except (KeaException, RequestException) as err:
+            result = RemoteWriteResult(command=command, key=key, error=str(err))
+
+        with self._lock:
+            self.report.total += 1
+            if result.success:
+                self.report.succeeded += 1
+            else:
+                self.report.failed.append(result)
+
+        return result
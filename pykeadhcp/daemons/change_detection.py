@@ -0,0 +1,100 @@
+import time
+from typing import Optional
+
+from pydantic import BaseModel
+
+from pykeadhcp.exceptions import KeaCommandNotSupportedException
+
+# status-get only reports the number of seconds since the last reload, allow for the
+# time spent between the request and the response when comparing reload times
+RELOAD_TOLERANCE = 2.0
+
+
+class ConfigFingerprint(BaseModel):
+    hash: Optional[str]
+    pid: Optional[int]
+    reloaded_at: Optional[float]
+
+    def matches(self, other: Optional["ConfigFingerprint"]) -> bool:
+        """Returns True if both fingerprints identify the same configuration
+
+        Args:
+            other:  ConfigFingerprint taken when the configuration was cached
+        """
+        if other is None:
+            return False
+
+        if self.hash or other.hash:
+            return self.hash == other.hash
+
+        if self.pid is None or self.reloaded_at is None or other.reloaded_at is None:
+            return False
+
+        return (
+            self.pid == other.pid
+            and abs(self.reloaded_at - other.reloaded_at) <= RELOAD_TOLERANCE
+        )
+
+
+def get_config_fingerprint(daemon) -> ConfigFingerprint:
+    """Returns a fingerprint of the configuration currently used by a daemon using
+    config-hash-get (Kea 2.4+) or the pid and last reload time from status-get otherwise. The
+    reload time only changes when the configuration is loaded (eg. config-set or config-reload),
+    not when it is changed by commands like subnet4-add
+
+    Args:
+        daemon:     Daemon (eg. server.dhcp4)
+    """
+    if daemon.config_hash_supported:
+        try:
+            data = daemon.config_hash_get()
+        except KeaCommandNotSupportedException:
+            data = None
+
+        if data and data.result == 0 and data.arguments:
+            return ConfigFingerprint(hash=data.arguments.get("hash"))
+
+        if not data or data.result == 2:
+            daemon.config_hash_supported = False
+
+    status_get = getattr(daemon, "status_get", None)
+    if not status_get:
+        return ConfigFingerprint()
+
+    status = status_get()
+    return ConfigFingerprint(pid=status.pid, reloaded_at=time.time() - status.reload)
+
+
+def update_cached_config(daemon, force: bool = True) -> bool:
+    """Downloads the configuration of a daemon with config-get and sets its cached_config,
+    unless force is False and the configuration fingerprint hasn't changed since it was
+    cached. Returns True if the configuration was downloaded. Daemons without config-hash-get
+    or status-get (eg. Ddns on Kea 2.2) always download the configuration
+
+    Args:
+        daemon:     Daemon (eg. server.dhcp4)
+        force:      Download the configuration without checking if it changed
+    """
+    instrumentation = daemon.api.instrumentation
+    previous = daemon.config_fingerprint
+
+    # config-get includes the hash on Kea 2.4+, the reload time only needs to be checked
+    # before a forced download once change detection has been used
+    fingerprint = None
+    if not force or (previous is not None and not previous.hash):
+        fingerprint = get_config_fingerprint(daemon)
+
+    if not force and daemon.cached_config is not None and fingerprint.matches(previous):
+        instrumentation.increment("config_refresh_skipped")
+        instrumentation.emit("config_refresh", service=daemon.service, changed=False)
+        return False
+
+    config = daemon.config_get()
+    daemon.cached_config = config.arguments
+    if config.arguments and config.arguments.get("hash"):
+        fingerprint = ConfigFingerprint(hash=config.arguments["hash"])
+
+    daemon.config_fingerprint = fingerprint
+    instrumentation.increment("config_refresh_fetched")
+    instrumentation.emit("config_refresh", service=daemon.service, changed=True)
+    return True
@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from pykeadhcp import Kea
 
+from pykeadhcp.daemons.change_detection import update_cached_config
 from pykeadhcp.models.generic import KeaResponse
 
 
@@ -11,6 +12,9 @@ class Ddns:
         self.service = "Ddns"
         self.api = api
 
+        self.config_fingerprint = None
+        self.config_hash_supported = True
+
         # Cache config and hooks
         try:
             self.cached_config = None
@@ -22,14 +26,21 @@ class Ddns:
         except:
             pass
 
-    def refresh_cached_config(self):
-        """Sets the cached_config variable
+    def refresh_cached_config(self, force: bool = True) -> bool:
+        """Sets the cached_config variable, returns True if the configuration was downloaded
 
         This function should be called after any interaction with the API that potentially changes the configuration
         eg. config-set, commands like config-test won't need a config refresh to keep the cached config up to date
+
+        With force set to False, the configuration is only downloaded if config-hash-get (or the
+        pid and reload time from status-get on older versions) shows it has changed since it was cached.
+        This is cheap enough to call periodically, skipped downloads are counted in the
+        config_refresh_skipped counter of server.instrumentation
+
+        Args:
+            force:      Download the configuration without checking if it has changed
         """
-        config = self.config_get()
-        self.cached_config = config.arguments
+        return update_cached_config(self, force=force)
 
     def build_report(self) -> KeaResponse:
         """Returns list of compilation options that this particular binary was built with
@@ -47,6 +58,14 @@ class Ddns:
         """
         return self.api.send_command(command="config-get", service=self.service)
 
+    def config_hash_get(self) -> KeaResponse:
+        """Returns the SHA-256 hash of the current configuration (Kea 2.4+)
+
+        Kea API Reference:
+            https://kea.readthedocs.io/en/kea-2.4.0/api.html#ref-config-hash-get
+        """
+        return self.api.send_command(command="config-hash-get", service=self.service)
+
     def config_reload(self) -> KeaResponse:
         """Reloads the last good configuration (configuration file on disk)
 
@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING, List, Dict
 if TYPE_CHECKING:
     from pykeadhcp import Kea
 
+from pykeadhcp.daemons.change_detection import update_cached_config
 from pykeadhcp.models.generic import KeaResponse, StatusGet
 from pykeadhcp.models.generic.remote_server import RemoteServer
 from pykeadhcp.models.generic.option_def import OptionDef
@@ -13,6 +14,8 @@ from pykeadhcp.models.dhcp4.lease import Lease4, Lease4Page
 from pykeadhcp.models.dhcp4.reservation import Reservation4
 from pykeadhcp.models.dhcp4.client_class import ClientClass4
 from pykeadhcp.models.enums import HostReservationIdentifierEnum
+from pykeadhcp.models.records import Lease4Record, Reservation4Record
+from pykeadhcp.models.serializer import serialize_model
 from pykeadhcp.exceptions import (
     KeaException,
     KeaSharedNetworkNotFoundException,
@@ -31,6 +34,9 @@ class Dhcp4:
         self.service = "dhcp4"
         self.api = api
 
+        self.config_fingerprint = None
+        self.config_hash_supported = True
+
         # Cache config and hooks
         try:
             self.cached_config = None
@@ -42,14 +48,21 @@ class Dhcp4:
         except:
             pass
 
-    def refresh_cached_config(self):
-        """Sets the cached_config variable
+    def refresh_cached_config(self, force: bool = True) -> bool:
+        """Sets the cached_config variable, returns True if the configuration was downloaded
 
         This function should be called after any interaction with the API that potentially changes the configuration
         eg. subnet4-add, commands like lease4-add won't need a config refresh to keep the cached config up to date
+
+        With force set to False, the configuration is only downloaded if config-hash-get (or the
+        pid and reload time from status-get on older versions) shows it has changed since it was cached.
+        This is cheap enough to call periodically, skipped downloads are counted in the
+        config_refresh_skipped counter of server.instrumentation
+
+        Args:
+            force:      Download the configuration without checking if it has changed
         """
-        config = self.config_get()
-        self.cached_config = config.arguments
+        return update_cached_config(self, force=force)
 
     def get_next_available_subnet_id(self) -> int:
         """Returns the next available subnet-id for use with Dhcp4 subnets"""
@@ -145,15 +158,16 @@ class Dhcp4:
         Kea API Reference:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#cache-insert
         """
+        return self._cache_insert(subnet_id, serialize_model(reservation))
+
+    def _cache_insert(self, subnet_id: int, reservation: dict) -> KeaResponse:
         return self.api.send_command_with_arguments(
             command="cache-insert",
             service=self.service,
             arguments={
                 "subnet-id4": subnet_id,
                 "subnet-id6": 0,
-                **reservation.dict(
-                    exclude_none=True, exclude_unset=True, by_alias=True
-                ),
+                **reservation,
             },
             required_hook="host_cache",
         )
@@ -229,13 +243,7 @@ class Dhcp4:
         return self.api.send_command_with_arguments(
             command="class-add",
             service=self.service,
-            arguments={
-                "client-classes": [
-                    client_class.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ]
-            },
+            arguments={"client-classes": [serialize_model(client_class)]},
             required_hook="class_cmds",
         )
 
@@ -302,13 +310,7 @@ class Dhcp4:
         return self.api.send_command_with_arguments(
             command="class-update",
             service=self.service,
-            arguments={
-                "client-classes": [
-                    client_class.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ]
-            },
+            arguments={"client-classes": [serialize_model(client_class)]},
         )
 
     def config_backend_pull(self) -> KeaResponse:
@@ -334,6 +336,14 @@ class Dhcp4:
         """
         return self.api.send_command(command="config-get", service=self.service)
 
+    def config_hash_get(self) -> KeaResponse:
+        """Returns the SHA-256 hash of the current configuration (Kea 2.4+)
+
+        Kea API Reference:
+            https://kea.readthedocs.io/en/kea-2.4.0/api.html#ref-config-hash-get
+        """
+        return self.api.send_command(command="config-hash-get", service=self.service)
+
     def config_reload(self) -> KeaResponse:
         """Reloads the last good configuration (configuration file on disk)
 
@@ -538,7 +548,7 @@ class Dhcp4:
         return self.api.send_command_with_arguments(
             command="lease4-add",
             service=self.service,
-            arguments=lease.dict(exclude_none=True, exclude_unset=True, by_alias=True),
+            arguments=serialize_model(lease),
             required_hook="lease_cmds",
         )
 
@@ -588,6 +598,21 @@ class Dhcp4:
         Kea API Reference:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#lease4-get-all
         """
+        return [Lease4.parse_obj(lease) for lease in self._lease4_get_all(subnets)]
+
+    def lease4_get_all_lite(self, subnets: List[int] = []) -> List[Lease4Record]:
+        """Same as lease4_get_all but returns lightweight Lease4Record objects which are not
+        validated and use a fraction of the memory of Lease4 models, use record.to_model() to
+        get the full model of a lease
+
+        Args:
+            subnets:        List of subnet IDs to fetch leases for
+        """
+        return [
+            Lease4Record.from_dict(lease) for lease in self._lease4_get_all(subnets)
+        ]
+
+    def _lease4_get_all(self, subnets: List[int]) -> List[dict]:
         if subnets:
             data = self.api.send_command_with_arguments(
                 command="lease4-get-all",
@@ -605,8 +630,7 @@ class Dhcp4:
         if data.result == 3:
             raise KeaLeaseNotFoundException(data.text)
 
-        leases = [Lease4.parse_obj(lease) for lease in data.arguments["leases"]]
-        return leases
+        return data.arguments["leases"]
 
     def lease4_get_by_client_id(self, client_id: str) -> Lease4:
         """Retrieves all IPv4 leases for the specified client id
@@ -688,15 +712,29 @@ class Dhcp4:
         Kea API Reference:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#lease4-get-page
         """
-        data = self.api.send_command_with_arguments(
+        data = self._lease4_get_page(limit=limit, search_from=search_from)
+        return Lease4Page.parse_obj(data.arguments)
+
+    def lease4_get_page_lite(self, limit: int, search_from: str) -> List[Lease4Record]:
+        """Same as lease4_get_page but returns the leases of the page as lightweight
+        Lease4Record objects, the next page starts from the ip_address of the last lease
+
+        Args:
+            limit:          Set the limit of IPv4 leases to be returned
+            search_from:    Start from either a specific IP address or 'start' for the first
+        """
+        data = self._lease4_get_page(limit=limit, search_from=search_from)
+        leases = (data.arguments or {}).get("leases") or []
+        return [Lease4Record.from_dict(lease) for lease in leases]
+
+    def _lease4_get_page(self, limit: int, search_from: str) -> KeaResponse:
+        return self.api.send_command_with_arguments(
             command="lease4-get-page",
             service=self.service,
             arguments={"from": search_from, "limit": limit},
             required_hook="lease_cmds",
         )
 
-        return Lease4Page.parse_obj(data.arguments)
-
     def lease4_resend_ddns(self, ip_address: str) -> KeaResponse:
         """Sends an internal request to the ddns daemon to update DNS for an existing lease
 
@@ -726,7 +764,7 @@ class Dhcp4:
         return self.api.send_command_with_arguments(
             command="lease4-update",
             service=self.service,
-            arguments=lease.dict(exclude_none=True, exclude_unset=True, by_alias=True),
+            arguments=serialize_model(lease),
             required_hook="lease_cmds",
         )
 
@@ -793,8 +831,7 @@ class Dhcp4:
             service=self.service,
             arguments={
                 "shared-networks": [
-                    network.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                    for network in shared_networks
+                    serialize_model(network) for network in shared_networks
                 ]
             },
             required_hook="subnet_cmds",
@@ -975,7 +1012,7 @@ class Dhcp4:
         Kea API Reference:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#remote-class4-set
         """
-        data = client_class.dict(exclude_none=True, exclude_unset=True, by_alias=True)
+        data = serialize_model(client_class)
         if follow_class_name:
             data["follow-class-name"] = follow_class_name
 
@@ -1158,11 +1195,7 @@ class Dhcp4:
             command="remote-option-def4-set",
             service=self.service,
             arguments={
-                "option-defs": [
-                    option_def.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ],
+                "option-defs": [serialize_model(option_def)],
                 "server-tags": [server_tag],
             },
             remote_map=remote_map,
@@ -1267,11 +1300,7 @@ class Dhcp4:
             command="remote-option4-global-set",
             service=self.service,
             arguments={
-                "options": [
-                    option_data.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ],
+                "options": [serialize_model(option_data)],
                 "server-tags": [server_tag],
             },
             remote_map=remote_map,
@@ -1326,11 +1355,7 @@ class Dhcp4:
             service=self.service,
             arguments={
                 "shared-networks": [{"name": shared_network}],
-                "options": [
-                    option_data.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ],
+                "options": [serialize_model(option_data)],
             },
             remote_map=remote_map,
         )
@@ -1377,11 +1402,7 @@ class Dhcp4:
             service=self.service,
             arguments={
                 "pools": [{"pool": pool}],
-                "options": [
-                    option_data.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ],
+                "options": [serialize_model(option_data)],
             },
             remote_map=remote_map,
         )
@@ -1425,11 +1446,7 @@ class Dhcp4:
             service=self.service,
             arguments={
                 "subnets": [{"id": subnet_id}],
-                "options": [
-                    option_data.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ],
+                "options": [serialize_model(option_data)],
             },
             remote_map=remote_map,
         )
@@ -1540,8 +1557,7 @@ class Dhcp4:
             service=self.service,
             arguments={
                 "shared-networks": [
-                    network.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                    for network in shared_networks
+                    serialize_model(network) for network in shared_networks
                 ],
                 "server-tags": server_tags,
             },
@@ -1563,12 +1579,7 @@ class Dhcp4:
         return self.api.send_command_remote(
             command="remote-server4-del",
             service=self.service,
-            arguments={
-                "servers": [
-                    server.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                ]
-                for server in servers
-            },
+            arguments={"servers": [serialize_model(server)] for server in servers},
             remote_map=remote_map,
         )
 
@@ -1587,11 +1598,7 @@ class Dhcp4:
         data = self.api.send_command_remote(
             command="remote-server4-get",
             service=self.service,
-            arguments={
-                "servers": [
-                    server.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                ]
-            },
+            arguments={"servers": [serialize_model(server)]},
             remote_map=remote_map,
         )
 
@@ -1637,12 +1644,7 @@ class Dhcp4:
         return self.api.send_command_remote(
             command="remote-server4-set",
             service=self.service,
-            arguments={
-                "servers": [
-                    server.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                ]
-                for server in servers
-            },
+            arguments={"servers": [serialize_model(server)] for server in servers},
             remote_map=remote_map,
         )
 
@@ -1777,11 +1779,7 @@ class Dhcp4:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#remote-subnet4-set
 
         """
-        data = subnet.dict(
-            exclude_none=True,
-            exclude_unset=True,
-            by_alias=True,
-        )
+        data = serialize_model(subnet)
 
         data["shared-network-name"] = shared_network_name
 
@@ -1806,14 +1804,13 @@ class Dhcp4:
         """
         reservation = Reservation4(ip_address=ip_address, **kwargs)
 
+        return self._reservation_add(serialize_model(reservation))
+
+    def _reservation_add(self, reservation: dict) -> KeaResponse:
         return self.api.send_command_with_arguments(
             command="reservation-add",
             service=self.service,
-            arguments={
-                "reservation": reservation.dict(
-                    exclude_none=True, exclude_unset=True, by_alias=True
-                )
-            },
+            arguments={"reservation": reservation},
             required_hook="host_cmds",
         )
 
@@ -1939,17 +1936,31 @@ class Dhcp4:
         Kea API Reference:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#reservation-get-all
         """
+        return [
+            Reservation4.parse_obj(reservation)
+            for reservation in self._reservation_get_all(subnet_id)
+        ]
+
+    def reservation_get_all_lite(self, subnet_id: int) -> List[Reservation4Record]:
+        """Same as reservation_get_all but returns lightweight Reservation4Record objects which
+        are not validated, use record.to_model() to get the full model of a reservation
+
+        Args:
+            subnet_id:      Subnet ID
+        """
+        return [
+            Reservation4Record.from_dict(reservation)
+            for reservation in self._reservation_get_all(subnet_id)
+        ]
+
+    def _reservation_get_all(self, subnet_id: int) -> List[dict]:
         reservations = self.api.send_command_with_arguments(
             command="reservation-get-all",
             service=self.service,
             arguments={"subnet-id": subnet_id},
             required_hook="host_cmds",
         )
-
-        return [
-            Reservation4.parse_obj(reservation)
-            for reservation in reservations.arguments.get("hosts")
-        ]
+        return reservations.arguments.get("hosts")
 
     def reservation_get_by_hostname(
         self, hostname: str, subnet_id: int
@@ -1998,6 +2009,24 @@ class Dhcp4:
         Kea API Reference:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#reservation-get-page
         """
+        data = self._reservation_get_page(
+            subnet_id=subnet_id,
+            limit=limit,
+            source_index=source_index,
+            from_host_id=from_host_id,
+        )
+
+        if not data.arguments or not data.arguments.get("hosts"):
+            return None
+
+        return [
+            Reservation4.parse_obj(reservation)
+            for reservation in data.arguments["hosts"]
+        ]
+
+    def _reservation_get_page(
+        self, subnet_id: int, limit: int, source_index: int, from_host_id: int
+    ) -> KeaResponse:
         params = {"limit": limit, "source-index": source_index, "from": from_host_id}
 
         if subnet_id:
@@ -2013,13 +2042,7 @@ class Dhcp4:
         if data.result == 1:
             raise KeaException(message=data.text)
 
-        if not data.arguments or not data.arguments.get("hosts"):
-            return None
-
-        return [
-            Reservation4.parse_obj(reservation)
-            for reservation in data.arguments["hosts"]
-        ]
+        return data
 
     def server_tag_get(self) -> KeaResponse:
         pass
@@ -2105,12 +2128,7 @@ class Dhcp4:
         return self.api.send_command_with_arguments(
             command="subnet4-add",
             service=self.service,
-            arguments={
-                "subnet4": [
-                    subnet.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                    for subnet in subnets
-                ]
-            },
+            arguments={"subnet4": [serialize_model(subnet) for subnet in subnets]},
             required_hook="subnet_cmds",
         )
 
@@ -2147,12 +2165,7 @@ class Dhcp4:
         return self.api.send_command_with_arguments(
             command="subnet4-delta-add",
             service=self.service,
-            arguments={
-                "subnet4": [
-                    subnet.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                    for subnet in subnets
-                ]
-            },
+            arguments={"subnet4": [serialize_model(subnet) for subnet in subnets]},
             required_hook="subnet_cmds",
         )
 
@@ -2168,12 +2181,7 @@ class Dhcp4:
         return self.api.send_command_with_arguments(
             command="subnet4-delta-del",
             service=self.service,
-            arguments={
-                "subnet4": [
-                    subnet.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                    for subnet in subnets
-                ]
-            },
+            arguments={"subnet4": [serialize_model(subnet) for subnet in subnets]},
             required_hook="subnet_cmds",
         )
 
@@ -2229,12 +2237,7 @@ class Dhcp4:
         return self.api.send_command_with_arguments(
             command="subnet4-update",
             service=self.service,
-            arguments={
-                "subnet4": [
-                    subnet.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                    for subnet in subnets
-                ]
-            },
+            arguments={"subnet4": [serialize_model(subnet) for subnet in subnets]},
             required_hook="subnet_cmds",
         )
 
@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING, List
 if TYPE_CHECKING:
     from pykeadhcp import Kea
 
+from pykeadhcp.daemons.change_detection import update_cached_config
 from pykeadhcp.models.generic import KeaResponse, StatusGet
 from pykeadhcp.models.generic.remote_server import RemoteServer
 from pykeadhcp.models.generic.option_def import OptionDef
@@ -14,6 +15,8 @@ from pykeadhcp.models.dhcp6.shared_network import SharedNetwork6
 from pykeadhcp.models.dhcp6.subnet import Subnet6
 from pykeadhcp.models.dhcp6.client_class import ClientClass6
 from pykeadhcp.models.enums import HostReservationIdentifierEnum
+from pykeadhcp.models.records import Lease6Record, Reservation6Record
+from pykeadhcp.models.serializer import serialize_model
 from pykeadhcp.exceptions import (
     KeaException,
     KeaSharedNetworkNotFoundException,
@@ -32,6 +35,9 @@ class Dhcp6:
         self.service = "dhcp6"
         self.api = api
 
+        self.config_fingerprint = None
+        self.config_hash_supported = True
+
         # Cache config and hooks
         try:
             self.cached_config = None
@@ -43,14 +49,21 @@ class Dhcp6:
         except:
             pass
 
-    def refresh_cached_config(self):
-        """Sets the cached_config variable
+    def refresh_cached_config(self, force: bool = True) -> bool:
+        """Sets the cached_config variable, returns True if the configuration was downloaded
 
         This function should be called after any interaction with the API that potentially changes the configuration
         eg. subnet6-add, commands like lease6-add won't need a config refresh to keep the cached config up to date
+
+        With force set to False, the configuration is only downloaded if config-hash-get (or the
+        pid and reload time from status-get on older versions) shows it has changed since it was cached.
+        This is cheap enough to call periodically, skipped downloads are counted in the
+        config_refresh_skipped counter of server.instrumentation
+
+        Args:
+            force:      Download the configuration without checking if it has changed
         """
-        config = self.config_get()
-        self.cached_config = config.arguments
+        return update_cached_config(self, force=force)
 
     def get_next_available_subnet_id(self) -> int:
         """Returns the next available subnet-id for use with Dhcp4 subnets"""
@@ -146,15 +159,16 @@ class Dhcp6:
         Kea API Reference:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#cache-insert
         """
+        return self._cache_insert(subnet_id, serialize_model(reservation))
+
+    def _cache_insert(self, subnet_id: int, reservation: dict) -> KeaResponse:
         return self.api.send_command_with_arguments(
             command="cache-insert",
             service=self.service,
             arguments={
                 "subnet-id4": 0,
                 "subnet-id6": subnet_id,
-                **reservation.dict(
-                    exclude_none=True, exclude_unset=True, by_alias=True
-                ),
+                **reservation,
             },
             required_hook="host_cache",
         )
@@ -230,13 +244,7 @@ class Dhcp6:
         return self.api.send_command_with_arguments(
             command="class-add",
             service=self.service,
-            arguments={
-                "client-classes": [
-                    client_class.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ]
-            },
+            arguments={"client-classes": [serialize_model(client_class)]},
             required_hook="class_cmds",
         )
 
@@ -303,13 +311,7 @@ class Dhcp6:
         return self.api.send_command_with_arguments(
             command="class-update",
             service=self.service,
-            arguments={
-                "client-classes": [
-                    client_class.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ]
-            },
+            arguments={"client-classes": [serialize_model(client_class)]},
         )
 
     def config_backend_pull(self) -> KeaResponse:
@@ -335,6 +337,14 @@ class Dhcp6:
         """
         return self.api.send_command(command="config-get", service=self.service)
 
+    def config_hash_get(self) -> KeaResponse:
+        """Returns the SHA-256 hash of the current configuration (Kea 2.4+)
+
+        Kea API Reference:
+            https://kea.readthedocs.io/en/kea-2.4.0/api.html#ref-config-hash-get
+        """
+        return self.api.send_command(command="config-hash-get", service=self.service)
+
     def config_reload(self) -> KeaResponse:
         """Reloads the last good configuration (configuration file on disk)
 
@@ -539,7 +549,7 @@ class Dhcp6:
         return self.api.send_command_with_arguments(
             command="lease6-add",
             service=self.service,
-            arguments=lease.dict(exclude_none=True, exclude_unset=True, by_alias=True),
+            arguments=serialize_model(lease),
             required_hook="lease_cmds",
         )
 
@@ -593,6 +603,21 @@ class Dhcp6:
         Kea API Reference:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#lease6-get-all
         """
+        return [Lease6.parse_obj(lease) for lease in self._lease6_get_all(subnets)]
+
+    def lease6_get_all_lite(self, subnets: List[int] = []) -> List[Lease6Record]:
+        """Same as lease6_get_all but returns lightweight Lease6Record objects which are not
+        validated and use a fraction of the memory of Lease6 models, use record.to_model() to
+        get the full model of a lease
+
+        Args:
+            subnets:        List of subnet IDs to fetch leases for
+        """
+        return [
+            Lease6Record.from_dict(lease) for lease in self._lease6_get_all(subnets)
+        ]
+
+    def _lease6_get_all(self, subnets: List[int]) -> List[dict]:
         if subnets:
             data = self.api.send_command_with_arguments(
                 command="lease6-get-all",
@@ -610,8 +635,7 @@ class Dhcp6:
         if data.result == 3:
             raise KeaLeaseNotFoundException(data.text)
 
-        leases = [Lease6.parse_obj(lease) for lease in data.arguments["leases"]]
-        return leases
+        return data.arguments["leases"]
 
     def lease6_get_by_duid(self, duid: str) -> Lease6:
         """Retrieves a lease for the specified duid
@@ -671,15 +695,29 @@ class Dhcp6:
         Kea API Reference:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#lease6-get-page
         """
-        data = self.api.send_command_with_arguments(
+        data = self._lease6_get_page(limit=limit, search_from=search_from)
+        return Lease6Page.parse_obj(data.arguments)
+
+    def lease6_get_page_lite(self, limit: int, search_from: str) -> List[Lease6Record]:
+        """Same as lease6_get_page but returns the leases of the page as lightweight
+        Lease6Record objects, the next page starts from the ip_address of the last lease
+
+        Args:
+            limit:          Set the limit of IPv6 leases to be returned
+            search_from:    Start from either a specific IP address or 'start' for the first
+        """
+        data = self._lease6_get_page(limit=limit, search_from=search_from)
+        leases = (data.arguments or {}).get("leases") or []
+        return [Lease6Record.from_dict(lease) for lease in leases]
+
+    def _lease6_get_page(self, limit: int, search_from: str) -> KeaResponse:
+        return self.api.send_command_with_arguments(
             command="lease6-get-page",
             service=self.service,
             arguments={"from": search_from, "limit": limit},
             required_hook="lease_cmds",
         )
 
-        return Lease6Page.parse_obj(data.arguments)
-
     def lease6_resend_ddns(self, ip_address: str) -> KeaResponse:
         """Sends an internal request to the ddns daemon to update DNS for an existing lease
 
@@ -714,7 +752,7 @@ class Dhcp6:
         return self.api.send_command_with_arguments(
             command="lease6-update",
             service=self.service,
-            arguments=lease.dict(exclude_none=True, exclude_unset=True, by_alias=True),
+            arguments=serialize_model(lease),
             required_hook="lease_cmds",
         )
 
@@ -742,8 +780,7 @@ class Dhcp6:
             service=self.service,
             arguments={
                 "shared-networks": [
-                    network.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                    for network in shared_networks
+                    serialize_model(network) for network in shared_networks
                 ]
             },
             required_hook="subnet_cmds",
@@ -924,7 +961,7 @@ class Dhcp6:
         Kea API Reference:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#remote-class6-set
         """
-        data = client_class.dict(exclude_none=True, exclude_unset=True, by_alias=True)
+        data = serialize_model(client_class)
         if follow_class_name:
             data["follow-class-name"] = follow_class_name
 
@@ -1107,11 +1144,7 @@ class Dhcp6:
             command="remote-option-def6-set",
             service=self.service,
             arguments={
-                "option-defs": [
-                    option_def.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ],
+                "option-defs": [serialize_model(option_def)],
                 "server-tags": [server_tag],
             },
             remote_map=remote_map,
@@ -1216,11 +1249,7 @@ class Dhcp6:
             command="remote-option6-global-set",
             service=self.service,
             arguments={
-                "options": [
-                    option_data.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ],
+                "options": [serialize_model(option_data)],
                 "server-tags": [server_tag],
             },
             remote_map=remote_map,
@@ -1275,11 +1304,7 @@ class Dhcp6:
             service=self.service,
             arguments={
                 "shared-networks": [{"name": shared_network}],
-                "options": [
-                    option_data.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ],
+                "options": [serialize_model(option_data)],
             },
             remote_map=remote_map,
         )
@@ -1337,11 +1362,7 @@ class Dhcp6:
             service=self.service,
             arguments={
                 "pd-pools": [{"prefix": prefix, "prefix-len": prefix_len}],
-                "options": [
-                    option_data.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ],
+                "options": [serialize_model(option_data)],
             },
             remote_map=remote_map,
         )
@@ -1388,11 +1409,7 @@ class Dhcp6:
             service=self.service,
             arguments={
                 "pools": [{"pool": pool}],
-                "options": [
-                    option_data.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ],
+                "options": [serialize_model(option_data)],
             },
             remote_map=remote_map,
         )
@@ -1436,11 +1453,7 @@ class Dhcp6:
             service=self.service,
             arguments={
                 "subnets": [{"id": subnet_id}],
-                "options": [
-                    option_data.dict(
-                        exclude_none=True, exclude_unset=True, by_alias=True
-                    )
-                ],
+                "options": [serialize_model(option_data)],
             },
             remote_map=remote_map,
         )
@@ -1554,8 +1567,7 @@ class Dhcp6:
             service=self.service,
             arguments={
                 "shared-networks": [
-                    network.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                    for network in shared_networks
+                    serialize_model(network) for network in shared_networks
                 ],
                 "server-tags": server_tags,
             },
@@ -1577,12 +1589,7 @@ class Dhcp6:
         return self.api.send_command_remote(
             command="remote-server6-del",
             service=self.service,
-            arguments={
-                "servers": [
-                    server.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                ]
-                for server in servers
-            },
+            arguments={"servers": [serialize_model(server)] for server in servers},
             remote_map=remote_map,
         )
 
@@ -1601,11 +1608,7 @@ class Dhcp6:
         data = self.api.send_command_remote(
             command="remote-server6-get",
             service=self.service,
-            arguments={
-                "servers": [
-                    server.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                ]
-            },
+            arguments={"servers": [serialize_model(server)]},
             remote_map=remote_map,
         )
 
@@ -1651,12 +1654,7 @@ class Dhcp6:
         return self.api.send_command_remote(
             command="remote-server6-set",
             service=self.service,
-            arguments={
-                "servers": [
-                    server.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                ]
-                for server in servers
-            },
+            arguments={"servers": [serialize_model(server)] for server in servers},
             remote_map=remote_map,
         )
 
@@ -1791,11 +1789,7 @@ class Dhcp6:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#remote-subnet6-set
 
         """
-        data = subnet.dict(
-            exclude_none=True,
-            exclude_unset=True,
-            by_alias=True,
-        )
+        data = serialize_model(subnet)
 
         data["shared-network-name"] = shared_network_name
 
@@ -1820,14 +1814,13 @@ class Dhcp6:
         """
         reservation = Reservation6(ip_addresses=[ip_address], **kwargs)
 
+        return self._reservation_add(serialize_model(reservation))
+
+    def _reservation_add(self, reservation: dict) -> KeaResponse:
         return self.api.send_command_with_arguments(
             command="reservation-add",
             service=self.service,
-            arguments={
-                "reservation": reservation.dict(
-                    exclude_none=True, exclude_unset=True, by_alias=True
-                )
-            },
+            arguments={"reservation": reservation},
             required_hook="host_cmds",
         )
 
@@ -1953,17 +1946,31 @@ class Dhcp6:
         Kea API Reference:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#reservation-get-all
         """
+        return [
+            Reservation6.parse_obj(reservation)
+            for reservation in self._reservation_get_all(subnet_id)
+        ]
+
+    def reservation_get_all_lite(self, subnet_id: int) -> List[Reservation6Record]:
+        """Same as reservation_get_all but returns lightweight Reservation6Record objects which
+        are not validated, use record.to_model() to get the full model of a reservation
+
+        Args:
+            subnet_id:      Subnet ID
+        """
+        return [
+            Reservation6Record.from_dict(reservation)
+            for reservation in self._reservation_get_all(subnet_id)
+        ]
+
+    def _reservation_get_all(self, subnet_id: int) -> List[dict]:
         reservations = self.api.send_command_with_arguments(
             command="reservation-get-all",
             service=self.service,
             arguments={"subnet-id": subnet_id},
             required_hook="host_cmds",
         )
-
-        return [
-            Reservation6.parse_obj(reservation)
-            for reservation in reservations.arguments.get("hosts")
-        ]
+        return reservations.arguments.get("hosts")
 
     def reservation_get_by_hostname(
         self, hostname: str, subnet_id: int
@@ -2012,6 +2019,24 @@ class Dhcp6:
         Kea API Reference:
             https://kea.readthedocs.io/en/kea-2.2.0/api.html#reservation-get-page
         """
+        data = self._reservation_get_page(
+            subnet_id=subnet_id,
+            limit=limit,
+            source_index=source_index,
+            from_host_id=from_host_id,
+        )
+
+        if not data.arguments or not data.arguments.get("hosts"):
+            return None
+
+        return [
+            Reservation6.parse_obj(reservation)
+            for reservation in data.arguments["hosts"]
+        ]
+
+    def _reservation_get_page(
+        self, subnet_id: int, limit: int, source_index: int, from_host_id: int
+    ) -> KeaResponse:
         params = {"limit": limit, "source-index": source_index, "from": from_host_id}
 
         if subnet_id:
@@ -2027,13 +2052,7 @@ class Dhcp6:
         if data.result == 1:
             raise KeaException(message=data.text)
 
-        if not data.arguments or not data.arguments.get("hosts"):
-            return None
-
-        return [
-            Reservation6.parse_obj(reservation)
-            for reservation in data.arguments["hosts"]
-        ]
+        return data
 
     def shutdown(self) -> KeaResponse:
         """Instructs the server daemon to initiate its shutdown procedure
@@ -2089,12 +2108,7 @@ class Dhcp6:
         return self.api.send_command_with_arguments(
             command="subnet6-add",
             service=self.service,
-            arguments={
-                "subnet6": [
-                    subnet.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                    for subnet in subnets
-                ]
-            },
+            arguments={"subnet6": [serialize_model(subnet) for subnet in subnets]},
             required_hook="subnet_cmds",
         )
 
@@ -2131,12 +2145,7 @@ class Dhcp6:
         return self.api.send_command_with_arguments(
             command="subnet6-delta-add",
             service=self.service,
-            arguments={
-                "subnet6": [
-                    subnet.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                    for subnet in subnets
-                ]
-            },
+            arguments={"subnet6": [serialize_model(subnet) for subnet in subnets]},
             required_hook="subnet_cmds",
         )
 
@@ -2152,12 +2161,7 @@ class Dhcp6:
         return self.api.send_command_with_arguments(
             command="subnet6-delta-del",
             service=self.service,
-            arguments={
-                "subnet6": [
-                    subnet.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                    for subnet in subnets
-                ]
-            },
+            arguments={"subnet6": [serialize_model(subnet) for subnet in subnets]},
             required_hook="subnet_cmds",
         )
 
@@ -2213,12 +2217,7 @@ class Dhcp6:
         return self.api.send_command_with_arguments(
             command="subnet6-update",
             service=self.service,
-            arguments={
-                "subnet6": [
-                    subnet.dict(exclude_none=True, exclude_unset=True, by_alias=True)
-                    for subnet in subnets
-                ]
-            },
+            arguments={"subnet6": [serialize_model(subnet) for subnet in subnets]},
             required_hook="subnet_cmds",
         )
 
@@ -113,3 +113,39 @@ class KeaClientClassNotFoundException(KeaException):
     def __init__(self, client_class: str):
         self.message = f"Client Class '{client_class}' not found"
         super().__init__(self.message)
+
+
+class KeaHAMonitorTargetNotFoundException(KeaException):
+    def __init__(self, name: str):
+        self.message = f"Server '{name}' is not monitored by this HA monitor"
+        super().__init__(self.message)
+
+
+class KeaHAPairUnavailableException(KeaException):
+    def __init__(self, command: str, detailed_error: str):
+        self.message = f"Neither server in the HA pair answered '{command}'. Detailed Error: {detailed_error}"
+        super().__init__(self.message)
+
+
+class KeaHAMaintenanceException(KeaException):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+class KeaHAMaintenanceTimeoutException(KeaException):
+    def __init__(self, expected: dict, states: dict):
+        self.message = f"Timed out waiting for HA state transition. Expected: {expected}, current states: {states}"
+        super().__init__(self.message)
+
+
+class KeaInvalidReservationException(KeaException):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+class KeaCircuitOpenException(KeaException):
+    def __init__(self, endpoint: str, retry_in: float):
+        self.message = f"Circuit for '{endpoint}' is open after repeated failures, retrying in {retry_in:.1f}s"
+        super().__init__(self.message)
@@ -0,0 +1,12 @@
+from pykeadhcp.ha.monitor import (
+    HAMonitor,
+    HABackoffPolicy,
+    HAMonitorState,
+    HATransition,
+)
+from pykeadhcp.ha.pair import KeaHAPair
+from pykeadhcp.ha.maintenance import (
+    HAMaintenanceWorkflow,
+    HAMaintenanceReport,
+    HAMaintenanceStep,
+)
@@ -0,0 +1,277 @@
+import math
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+from requests.exceptions import RequestException
+
+from pykeadhcp.ha.pair import KeaHAPair
+from pykeadhcp.models.enums import HAStateTypeEnum
+from pykeadhcp.exceptions import (
+    KeaException,
+    KeaHAMaintenanceException,
+    KeaHAMaintenanceTimeoutException,
+)
+
+ASSIGNED_LEASES_STATISTIC = re.compile(r"^subnet\[\d+\]\.assigned-(addresses|nas|pds)$")
+
+NORMAL_STATES = {
+    HAStateTypeEnum.hot_standby.value,
+    HAStateTypeEnum.load_balancing.value,
+    HAStateTypeEnum.backup.value,
+    HAStateTypeEnum.passive_backup.value,
+}
+
+
+class HAMaintenanceStep(BaseModel):
+    name: str
+    server: str
+    started_at: datetime
+    duration: float
+    result: Optional[int]
+    text: Optional[str]
+
+
+class HAMaintenanceReport(BaseModel):
+    name: str
+    maintained: str
+    success: bool = False
+    error: Optional[str]
+    leases: Optional[int]
+    max_period: Optional[int]
+    duration: float = 0.0
+    steps: List[HAMaintenanceStep] = []
+
+
+class HAMaintenanceWorkflow:
+    """Runs the HA maintenance sequence on one or many HA pairs and waits for the
+    expected state transitions after every step:
+
+    1. ha-maintenance-start on the server that stays up and wait until it is in the
+       partner-in-maintenance state (and its partner in the in-maintenance state)
+    2. Call the upgrade callback for the partner (eg. to restart Kea) and wait until
+       the partner has rejoined, or send ha-maintenance-cancel if no callback is provided
+    3. ha-sync on the maintained server with a max-period based on the number of leases,
+       ha-sync-complete-notify on the server that stayed up and ha-continue
+
+    workflow = HAMaintenanceWorkflow()
+    reports = workflow.run_many({"pair-1": pair1, "pair-2": pair2}, upgrade=upgrade_server)
+
+    Args:
+        timeout:            Seconds to wait for every expected state transition
+        poll_interval:      Seconds between status-get polls while waiting
+        leases_per_second:  Leases Kea is expected to sync per second, used for the ha-sync max-period
+        min_max_period:     Lower bound of the ha-sync max-period in seconds
+        max_max_period:     Upper bound of the ha-sync max-period in seconds
+        max_workers:        Maximum number of pairs in maintenance at the same time
+    """
+
+    def __init__(
+        self,
+        timeout: float = 300.0,
+        poll_interval: float = 2.0,
+        leases_per_second: int = 2000,
+        min_max_period: int = 30,
+        max_max_period: int = 3600,
+        max_workers: int = 4,
+    ):
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.leases_per_second = leases_per_second
+        self.min_max_period = min_max_period
+        self.max_max_period = max_max_period
+        self.max_workers = max_workers
+
+    def count_leases(self, pair: KeaHAPair, name: str) -> int:
+        """Returns the number of assigned leases reported by the per subnet statistics
+
+        Args:
+            pair:       KeaHAPair
+            name:       primary or secondary
+        """
+        data = pair.monitor.targets[name].statistic_get_all()
+        if not data.arguments:
+            return 0
+
+        return sum(
+            samples[0][0]
+            for statistic, samples in data.arguments.items()
+            if samples and ASSIGNED_LEASES_STATISTIC.match(statistic)
+        )
+
+    def get_max_period(self, leases: int) -> int:
+        """Returns the ha-sync max-period (seconds the partner keeps DHCP disabled) to use
+        for a given number of leases
+
+        Args:
+            leases:     Number of leases to sync
+        """
+        estimate = self.min_max_period + math.ceil(leases / self.leases_per_second)
+        return min(self.max_max_period, estimate)
+
+    def get_peer_name(self, pair: KeaHAPair, name: str) -> str:
+        """Returns the name of the peer (as configured in the ha hook) of a server
+
+        Args:
+            pair:       KeaHAPair
+            name:       primary or secondary
+        """
+        daemon = pair.monitor.targets[name]
+        config = daemon.cached_config[daemon.service.capitalize()]
+        for hook in config.get("hooks-libraries", []):
+            if daemon.api.get_hook_name(hook["library"]) != "ha":
+                continue
+
+            relationship = hook["parameters"]["high-availability"][0]
+            this_server = relationship["this-server-name"]
+            for peer in relationship["peers"]:
+                if peer["name"] != this_server:
+                    return peer["name"]
+
+        raise KeaHAMaintenanceException(
+            f"Unable to find the HA peer of the {name} server in the cached configuration"
+        )
+
+    def wait_for(
+        self,
+        pair: KeaHAPair,
+        expected: Dict[str, List[str]],
+    ) -> None:
+        """Polls status-get until every server is in one of its expected states
+
+        Args:
+            pair:       KeaHAPair
+            expected:   Expected states per server eg. {"primary": ["partner-in-maintenance"]}
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            pair.refresh(force=True)
+            states = {name: pair.monitor.current_state(name).state for name in expected}
+            if all(states[name] in expected[name] for name in expected):
+                return
+
+            if time.monotonic() > deadline:
+                raise KeaHAMaintenanceTimeoutException(expected, states)
+
+            time.sleep(self.poll_interval)
+
+    def run(
+        self,
+        pair: KeaHAPair,
+        name: str = "",
+        maintain: str = "secondary",
+        upgrade: Callable[[KeaHAPair, str], None] = None,
+        sync: bool = True,
+        partner_server: str = None,
+    ) -> HAMaintenanceReport:
+        """Runs the maintenance sequence on a single pair and returns a report with
+        the timings of every step
+
+        Args:
+            pair:               KeaHAPair
+            name:               Name of the pair used in the report
+            maintain:           Server to put in maintenance (primary or secondary)
+            upgrade:            Callable that is called with the pair and server being maintained
+            sync:               Sync the maintained servers leases from its partner afterwards
+            partner_server:     HA name of the server that stays up, looked up from the cached config if not provided
+        """
+        active = "primary" if maintain == "secondary" else "secondary"
+        report = HAMaintenanceReport(name=name, maintained=maintain)
+        started = time.monotonic()
+
+        try:
+            self._step(report, pair, active, "ha_maintenance_start")
+            self.wait_for(
+                pair,
+                {
+                    active: [HAStateTypeEnum.partner_in_maintenance.value],
+                    maintain: [HAStateTypeEnum.in_maintenance.value],
+                },
+            )
+
+            if upgrade:
+                self._timed(
+                    report, maintain, "upgrade", lambda: upgrade(pair, maintain)
+                )
+            else:
+                self._step(report, pair, active, "ha_maintenance_cancel")
+
+            self.wait_for(pair, {active: NORMAL_STATES, maintain: NORMAL_STATES})
+
+            if sync:
+                report.leases = self.count_leases(pair, active)
+                report.max_period = self.get_max_period(report.leases)
+                partner_server = partner_server or self.get_peer_name(pair, maintain)
+                self._step(
+                    report,
+                    pair,
+                    maintain,
+                    "ha_sync",
+                    partner_server=partner_server,
+                    max_period=report.max_period,
+                )
+                self._step(report, pair, active, "ha_sync_complete_notify")
+                self._step(report, pair, maintain, "ha_continue")
+                self.wait_for(pair, {active: NORMAL_STATES, maintain: NORMAL_STATES})
+
+            report.success = True
+        except (KeaException, RequestException) as err:
+            report.error = str(err)
+        finally:
+            report.duration = time.monotonic() - started
+
+        return report
+
+    def run_many(
+        self, pairs: Dict[str, KeaHAPair], **kwargs
+    ) -> Dict[str, HAMaintenanceReport]:
+        """Runs the maintenance sequence on many pairs concurrently
+
+        Args:
+            pairs:      Dictionary of pair name to KeaHAPair
+            kwargs:     Passed to run() for every pair
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                name: executor.submit(self.run, pair, name=name, **kwargs)
+                for name, pair in pairs.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def _step(
+        self,
+        report: HAMaintenanceReport,
+        pair: KeaHAPair,
+        server: str,
+        command: str,
+        **kwargs,
+    ) -> None:
+        daemon = pair.monitor.targets[server]
+        data = self._timed(
+            report, server, command, lambda: getattr(daemon, command)(**kwargs)
+        )
+        if data.result != 0:
+            raise KeaHAMaintenanceException(
+                f"{command} failed on the {server} server: {data.text}"
+            )
+
+    def _timed(
+        self, report: HAMaintenanceReport, server: str, name: str, func: Callable
+    ):
+        started_at = datetime.now(timezone.utc)
+        started = time.monotonic()
+        data = func()
+        report.steps.append(
+            HAMaintenanceStep(
+                name=name,
+                server=server,
+                started_at=started_at,
+                duration=time.monotonic() - started,
+                result=getattr(data, "result", None),
+                text=getattr(data, "text", None),
+            )
+        )
+        return data
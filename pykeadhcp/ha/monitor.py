@@ -0,0 +1,358 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, ValidationError
+from requests.exceptions import RequestException
+
+if TYPE_CHECKING:
+    from pykeadhcp import Kea
+
+from pykeadhcp.instrumentation import Instrumentation
+from pykeadhcp.models.generic import StatusGet
+from pykeadhcp.policy import BackoffPolicy
+from pykeadhcp.models.generic.high_availability import (
+    HAHeartbeat,
+    HAServerRemote,
+    HighAvailability,
+)
+from pykeadhcp.exceptions import KeaException, KeaHAMonitorTargetNotFoundException
+
+UNREACHABLE = "unreachable"
+
+
+class HABackoffPolicy(BackoffPolicy):
+    """Exponential backoff applied to a monitored server once it stops answering, see
+    BackoffPolicy"""
+
+
+class HAMonitorState(BaseModel):
+    """Latest known HA state of a monitored server"""
+
+    name: str
+    service: str
+    reachable: bool = False
+    state: Optional[str]
+    relationship_states: List[str] = []
+    remote: Optional[HAServerRemote]
+    high_availability: List[HighAvailability] = []
+    heartbeat: Optional[HAHeartbeat]
+    changed_at: Optional[datetime]
+    last_polled: Optional[datetime]
+    consecutive_failures: int = 0
+    error: Optional[str]
+
+
+class HATransition(BaseModel):
+    """Emitted whenever the local HA state of a monitored server changes. Servers
+    that can't be polled transition to the `unreachable` state. Servers with many HA
+    relationships (hub and spoke) emit a transition per relationship, identified by its
+    index in status-get."""
+
+    name: str
+    relationship: int = 0
+    previous_state: Optional[str]
+    state: str
+    timestamp: datetime
+
+
+class HAMonitor:
+    """Polls the HA state of many Kea servers concurrently and keeps the latest
+    known state in memory, for example:
+
+    monitor = HAMonitor()
+    monitor.add(name="primary", server=primary, service="dhcp4")
+    monitor.add(name="standby", server=standby, service="dhcp4")
+    monitor.add_listener(callback, states=["partner-down"])
+    monitor.start(interval=5)
+
+    state = monitor.current_state("primary")
+
+    The state, remote and heartbeat of a server describe its first HA relationship, the local
+    state of every relationship is kept in relationship_states. Listeners which raise don't stop
+    the monitor, their errors are counted (ha_listener_errors) and emitted as ha_listener_error
+    events to the instrumentation.
+
+    Args:
+        backoff:            Backoff policy used when a server is unreachable
+        max_workers:        Maximum number of servers polled at the same time
+        use_heartbeat:      Also send ha-heartbeat on every poll (requires the ha hook)
+        instrumentation:    Instrumentation to report listener and polling errors to
+    """
+
+    def __init__(
+        self,
+        backoff: HABackoffPolicy = None,
+        max_workers: int = 8,
+        use_heartbeat: bool = False,
+        instrumentation: Instrumentation = None,
+    ):
+        self.backoff = backoff or HABackoffPolicy()
+        self.max_workers = max_workers
+        self.use_heartbeat = use_heartbeat
+        self.instrumentation = instrumentation or Instrumentation()
+        self.targets = {}
+        self.listeners = []
+        self._states: Dict[str, HAMonitorState] = {}
+        self._next_poll: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, name: str, server: "Kea", service: str = "dhcp4") -> None:
+        """Starts monitoring the HA state of a server
+
+        Args:
+            name:       Unique name of the server within this monitor
+            server:     Kea instance
+            service:    dhcp4 or dhcp6
+        """
+        with self._lock:
+            self.targets[name] = getattr(server, service)
+            self._states[name] = HAMonitorState(name=name, service=service)
+            self._next_poll[name] = 0.0
+
+    def remove(self, name: str) -> None:
+        """Stops monitoring a server
+
+        Args:
+            name:       Name of the server
+        """
+        with self._lock:
+            if name not in self.targets:
+                raise KeaHAMonitorTargetNotFoundException(name)
+
+            del self.targets[name]
+            del self._states[name]
+            del self._next_poll[name]
+
+    def add_listener(
+        self, callback: Callable[[HATransition], None], states: List[str] = None
+    ) -> None:
+        """Registers a callback that is called for every HA state transition
+
+        Args:
+            callback:   Callable accepting a HATransition
+            states:     Only call back when transitioning into one of these states (eg. partner-down)
+        """
+        self.listeners.append((callback, set(states) if states else None))
+
+    def current_state(self, name: str = None):
+        """Returns the cached state without any network round trip
+
+        Args:
+            name:       Name of the server, returns the state of all servers if not provided
+        """
+        with self._lock:
+            if name is None:
+                return {key: state.copy() for key, state in self._states.items()}
+
+            if name not in self._states:
+                raise KeaHAMonitorTargetNotFoundException(name)
+
+            return self._states[name].copy()
+
+    def update(
+        self, name: str, status: StatusGet, heartbeat: HAHeartbeat = None
+    ) -> Optional[HATransition]:
+        """Applies a status-get result to the cached state of a server and returns
+        the transition if the local HA state of its first relationship changed (the
+        transitions of every relationship are passed to the listeners)
+
+        Args:
+            name:       Name of the server
+            status:     StatusGet object returned by status_get
+            heartbeat:  HAHeartbeat object if ha-heartbeat was also sent
+        """
+        for transition in self._update(name, status, heartbeat):
+            if transition.relationship == 0:
+                return transition
+        return None
+
+    def poll(self, force: bool = False) -> List[HATransition]:
+        """Polls every server that is due (honouring the backoff policy) concurrently and
+        returns the transitions that happened
+
+        Args:
+            force:      Poll every server even if it's currently backing off
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                name for name in self.targets if force or self._next_poll[name] <= now
+            ]
+
+        if not due:
+            return []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            transitions = list(executor.map(self._poll_target, due))
+
+        return [transition for polled in transitions for transition in polled]
+
+    def start(self, interval: float = 5.0) -> None:
+        """Starts polling in a background thread
+
+        Args:
+            interval:   Seconds between polls of a healthy server
+        """
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name="pykeadhcp-ha-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """Stops the background thread started with start()"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as err:
+                # Keep polling, a failed round must not silently end the monitoring
+                self.instrumentation.increment("ha_poll_errors")
+                self.instrumentation.emit("ha_poll_error", error=err)
+            self._stop.wait(interval)
+
+    def _update(
+        self, name: str, status: StatusGet, heartbeat: HAHeartbeat = None
+    ) -> List[HATransition]:
+        relationships = status.high_availability or []
+        state = heartbeat.state if heartbeat else None
+        remote = None
+        if relationships:
+            state = relationships[0].ha_servers.local.state
+            remote = relationships[0].ha_servers.remote
+
+        return self._apply(
+            name,
+            state=state,
+            relationship_states=[
+                relationship.ha_servers.local.state for relationship in relationships
+            ],
+            reachable=True,
+            remote=remote,
+            high_availability=relationships,
+            heartbeat=heartbeat,
+            consecutive_failures=0,
+            error=None,
+        )
+
+    def _poll_target(self, name: str) -> List[HATransition]:
+        daemon = self.targets.get(name)
+        if daemon is None:
+            return []
+
+        try:
+            status = daemon.status_get()
+            heartbeat = None
+            if self.use_heartbeat:
+                data = daemon.ha_heartbeat()
+                if data.result == 0 and data.arguments:
+                    heartbeat = HAHeartbeat.parse_obj(data.arguments)
+        except (RequestException, KeaException, ValidationError) as err:
+            return self._fail(name, str(err))
+
+        with self._lock:
+            self._next_poll[name] = 0.0
+
+        return self._update(name, status=status, heartbeat=heartbeat)
+
+    def _fail(self, name: str, error: str) -> List[HATransition]:
+        with self._lock:
+            if name not in self._states:
+                return []
+
+            failures = self._states[name].consecutive_failures + 1
+            self._next_poll[name] = time.monotonic() + self.backoff.delay(failures)
+
+        return self._apply(
+            name,
+            state=UNREACHABLE,
+            relationship_states=[],
+            reachable=False,
+            consecutive_failures=failures,
+            error=error,
+        )
+
+    def _apply(
+        self,
+        name: str,
+        state: Optional[str],
+        relationship_states: List[str],
+        **fields,
+    ) -> List[HATransition]:
+        now = datetime.now(timezone.utc)
+        transitions = []
+        with self._lock:
+            existing = self._states.get(name)
+            if existing is None:
+                return []
+
+            changed = {}
+            if state != existing.state:
+                changed = {"state": state, "changed_at": now}
+                if state:
+                    transitions.append(
+                        HATransition(
+                            name=name,
+                            previous_state=existing.state,
+                            state=state,
+                            timestamp=now,
+                        )
+                    )
+
+            for relationship, local_state in enumerate(relationship_states):
+                if relationship == 0:
+                    continue
+                previous_state = None
+                if relationship < len(existing.relationship_states):
+                    previous_state = existing.relationship_states[relationship]
+                if local_state != previous_state:
+                    transitions.append(
+                        HATransition(
+                            name=name,
+                            relationship=relationship,
+                            previous_state=previous_state,
+                            state=local_state,
+                            timestamp=now,
+                        )
+                    )
+
+            # Validated like a parsed state, copy(update=...) would skip validation
+            self._states[name] = HAMonitorState.parse_obj(
+                {
+                    **existing.dict(),
+                    "last_polled": now,
+                    "relationship_states": relationship_states,
+                    **fields,
+                    **changed,
+                }
+            )
+
+        for transition in transitions:
+            self._notify(transition)
+
+        return transitions
+
+    def _notify(self, transition: HATransition) -> None:
+        for callback, states in self.listeners:
+            if states is not None and transition.state not in states:
+                continue
+            try:
+                callback(transition)
+            except Exception as err:
+                self.instrumentation.increment("ha_listener_errors")
+                self.instrumentation.emit(
+                    "ha_listener_error", transition=transition, error=err
+                )
@@ -0,0 +1,163 @@
+import itertools
+import threading
+import time
+from typing import TYPE_CHECKING, List
+
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+
+if TYPE_CHECKING:
+    from pykeadhcp import Kea
+
+from pykeadhcp.commands import is_read_only_command
+from pykeadhcp.ha.monitor import HAMonitor, HAMonitorState
+from pykeadhcp.models.enums import HAModeTypeEnum, HAStateTypeEnum
+from pykeadhcp.exceptions import (
+    KeaCircuitOpenException,
+    KeaHAPairUnavailableException,
+)
+
+INACTIVE_STATES = {
+    HAStateTypeEnum.backup.value,
+    HAStateTypeEnum.in_maintenance.value,
+    HAStateTypeEnum.synbcing.value,
+    HAStateTypeEnum.terminated.value,
+    HAStateTypeEnum.waiting.value,
+}
+
+
+class KeaHAPair:
+    """Client for a pair of Kea servers configured with the ha hook which sends each
+    command to the right partner based on the cached status-get HA state:
+
+    - Writes are sent to the server currently serving the HA scopes (the active server)
+    - Reads are spread across both servers in load-balancing mode
+    - If a server stops answering, the command is sent to its partner instead
+
+    The HA state is only refreshed once it's older than max_age or after a failover.
+
+    pair = KeaHAPair(primary=primary, secondary=standby, service="dhcp4")
+    pair.lease4_add(ip_address="192.0.2.10", hw_address="aa:bb:cc:dd:ee:ff")
+    leases = pair.lease4_get_all()
+
+    Args:
+        primary:        Kea instance of the primary server
+        secondary:      Kea instance of the secondary/standby server
+        service:        dhcp4 or dhcp6
+        max_age:        Seconds before the cached HA state is considered stale
+    """
+
+    def __init__(
+        self,
+        primary: "Kea",
+        secondary: "Kea",
+        service: str = "dhcp4",
+        max_age: float = 5.0,
+    ):
+        self.service = service
+        self.max_age = max_age
+        self.names = ["primary", "secondary"]
+        self.monitor = HAMonitor(max_workers=2)
+        self.monitor.add(name="primary", server=primary, service=service)
+        self.monitor.add(name="secondary", server=secondary, service=service)
+        self._refreshed_at = None
+        self._round_robin = itertools.count()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        monitor = self.__dict__.get("monitor")
+        if name.startswith("_") or not monitor:
+            raise AttributeError(name)
+
+        if not hasattr(monitor.targets["primary"], name):
+            raise AttributeError(name)
+
+        def command(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+
+        return command
+
+    def refresh(self, force: bool = False) -> None:
+        """Refreshes the cached HA state of both servers if it is stale
+
+        Args:
+            force:      Refresh even if the cached state is not stale
+        """
+        with self._lock:
+            stale = (
+                self._refreshed_at is None
+                or time.monotonic() - self._refreshed_at > self.max_age
+            )
+            if not force and not stale:
+                return
+
+            self.monitor.poll(force=True)
+            self._refreshed_at = time.monotonic()
+
+    def is_active(self, state: HAMonitorState) -> bool:
+        """Returns True if the server is currently serving at least one HA scope
+
+        Args:
+            state:      Cached HA state of the server
+        """
+        if not state.reachable or not state.high_availability:
+            return False
+
+        local = state.high_availability[0].ha_servers.local
+        return bool(local.scopes) and local.state not in INACTIVE_STATES
+
+    def route(self, command: str) -> List[str]:
+        """Returns the server names in the order they should be tried for a command
+
+        Args:
+            command:    Daemon method name or Kea API command
+        """
+        self.refresh()
+        states = self.monitor.current_state()
+
+        active = [name for name in self.names if self.is_active(states[name])]
+        reachable = [
+            name for name in self.names if name not in active and states[name].reachable
+        ]
+        unreachable = [
+            name for name in self.names if name not in active and name not in reachable
+        ]
+
+        load_balancing = any(
+            state.high_availability
+            and state.high_availability[0].ha_mode
+            == HAModeTypeEnum.load_balancing.value
+            for state in states.values()
+        )
+        if load_balancing and len(active) > 1 and is_read_only_command(command):
+            offset = next(self._round_robin) % len(active)
+            active = active[offset:] + active[:offset]
+
+        return active + reachable + unreachable
+
+    def call(self, method: str, *args, **kwargs):
+        """Sends a command to the right partner and fails over to the other server
+        if it doesn't answer. Writes which timed out may have been applied so they are
+        never sent to the partner. If neither server answers, the error of the first
+        server tried is raised
+
+        Args:
+            method:     Daemon method name (eg. lease4_add, reservation_get_all)
+        """
+        read_only = is_read_only_command(method)
+        # An open circuit fails before anything is sent so it is safe to try the partner
+        retry_on = (RequestsConnectionError, Timeout, KeaCircuitOpenException)
+        if not read_only:
+            retry_on = (RequestsConnectionError, KeaCircuitOpenException)
+
+        errors = []
+        for name in self.route(method):
+            daemon = self.monitor.targets[name]
+            try:
+                return getattr(daemon, method)(*args, **kwargs)
+            except retry_on as err:
+                errors.append(err)
+                self._refreshed_at = None
+
+        if errors:
+            raise errors[0]
+        raise KeaHAPairUnavailableException(method, "no server to send it to")
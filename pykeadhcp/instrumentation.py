@@ -0,0 +1,73 @@
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+
+class Instrumentation:
+    """Thread-safe counters and event hooks shared by everything using a Kea instance
+    (server.instrumentation). Counters are incremented for work done or skipped (eg.
+    config_refresh_skipped) and hooks are called for every emitted event (eg. request).
+
+    server.instrumentation.add_hook("request", lambda event, **data: print(data["command"], data["duration"]))
+    print(server.instrumentation.get_counters())
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.hooks: Dict[str, List[Callable]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add_hook(self, event: str, callback: Callable) -> None:
+        """Calls callback(event, **data) every time the event is emitted
+
+        Args:
+            event:      Name of the event (eg. request or config_refresh)
+            callback:   Callable
+        """
+        with self._lock:
+            self.hooks[event].append(callback)
+
+    def remove_hook(self, event: str, callback: Callable) -> None:
+        """Stops calling a callback for an event
+
+        Args:
+            event:      Name of the event
+            callback:   Callable previously added with add_hook
+        """
+        with self._lock:
+            if callback in self.hooks[event]:
+                self.hooks[event].remove(callback)
+
+    def increment(self, counter: str, value: int = 1) -> None:
+        """Increments a counter
+
+        Args:
+            counter:    Name of the counter
+            value:      Value to add
+        """
+        with self._lock:
+            self.counters[counter] += value
+
+    def emit(self, event: str, **data) -> None:
+        """Calls every hook registered for an event
+
+        Args:
+            event:      Name of the event
+            data:       Keyword arguments passed to the hooks
+        """
+        hooks = self.hooks.get(event)
+        if not hooks:
+            return
+
+        for callback in list(hooks):
+            callback(event, **data)
+
+    def get_counters(self) -> Dict[str, int]:
+        """Returns a copy of every counter"""
+        with self._lock:
+            return dict(self.counters)
+
+    def reset(self) -> None:
+        """Resets every counter to 0"""
+        with self._lock:
+            self.counters.clear()
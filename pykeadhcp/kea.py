@@ -1,14 +1,24 @@
+import threading
+import time
 import requests
 from requests.auth import HTTPBasicAuth
-from requests.exceptions import HTTPError
+from requests.exceptions import (
+    ConnectionError as RequestsConnectionError,
+    HTTPError,
+    Timeout,
+)
 from pathlib import Path
-from typing import List, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 from pydantic import ValidationError
 
+from pykeadhcp.commands import is_read_only_command
 from pykeadhcp.daemons import CtrlAgent, Ddns, Dhcp4, Dhcp6
+from pykeadhcp.instrumentation import Instrumentation
 from pykeadhcp.models.generic import KeaResponse
 from pykeadhcp.models.generic.hook import Hook
 from pykeadhcp.models.generic.remote_map import RemoteMap
+from pykeadhcp.models.serializer import json_dumps
+from pykeadhcp.policy import CircuitBreaker, RetryPolicy
 from pykeadhcp.exceptions import (
     KeaGenericException,
     KeaCommandNotSupportedException,
@@ -17,6 +27,7 @@ from pykeadhcp.exceptions import (
     KeaUnauthorizedAccessException,
     KeaHookLibraryNotConfiguredException,
     KeaInvalidRemoteMapException,
+    KeaCircuitOpenException,
 )
 
 
@@ -37,6 +48,10 @@ class Kea:
             This status code is returned when a command returns no resources or affects no resources.`
         verify:                 Boolean is used if the server TLS cert is verified or not, however you can
             pass in a string which should be a path to a CA bundle to use with each request.
+        json_encoder:           Function encoding every request body to JSON bytes, defaults to json_dumps
+            which uses orjson if it is installed
+        retry_policy:           Retries read-only commands and opens a circuit per service after repeated
+            failures (see RetryPolicy), commands are sent once without any circuit breaker by default
     """
 
     def __init__(
@@ -49,6 +64,8 @@ class Kea:
         password: str = "",
         raise_generic_errors: bool = False,
         verify: Union[bool, str] = True,
+        json_encoder: Callable[[Any], bytes] = json_dumps,
+        retry_policy: RetryPolicy = None,
     ):
         self.host = host
         self.port = port
@@ -59,6 +76,10 @@ class Kea:
         self.url = f"{self.host}:{self.port}"
         self.raise_generic_errors = raise_generic_errors
         self.verify = verify
+        self.json_encoder = json_encoder
+        self.retry_policy = retry_policy
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self._breaker_lock = threading.Lock()
         self.RESPONSE_CODES = {
             1: KeaGenericException,
             2: KeaCommandNotSupportedException,
@@ -66,6 +87,7 @@ class Kea:
             4: KeaServerConflictException,
         }
         self.hook_library = {}
+        self.instrumentation = Instrumentation()
         self.ctrlagent = CtrlAgent(self)
         self.ddns = Ddns(self)
         self.dhcp4 = Dhcp4(self)
@@ -123,15 +145,43 @@ class Kea:
             endpoint:       API Endpoint
             body:           JSON body to send
         """
-        url = self.url + endpoint
-        response = requests.post(
-            url=url,
-            json=body,
-            headers=self.headers,
-            auth=self.basic_auth if self.use_basic_auth else None,
-            verify=self.verify,
-            **kwargs,
-        )
+        command = body.get("command")
+        breaker = self.get_circuit_breaker(body.get("service"))
+        if breaker and not breaker.allow():
+            self.instrumentation.increment("circuit_rejected")
+            raise KeaCircuitOpenException(breaker.name, breaker.retry_in())
+
+        attempts = 1
+        if self.retry_policy and is_read_only_command(command or ""):
+            attempts = max(self.retry_policy.max_attempts, 1)
+
+        for attempt in range(1, attempts + 1):
+            try:
+                response = self._post(endpoint, body, **kwargs)
+            except (RequestsConnectionError, Timeout):
+                if not self._retry(breaker, command, attempt, attempts):
+                    raise
+                continue
+            except BaseException:
+                # Other errors (eg. an invalid URL or body) didn't reach the server and say
+                # nothing about its health
+                if breaker:
+                    breaker.release_trial()
+                raise
+
+            if (
+                not self.retry_policy
+                or response.status_code not in self.retry_policy.retry_status_codes
+            ):
+                if breaker and response.status_code < 500:
+                    breaker.record_success()
+                elif breaker:
+                    # Server errors which aren't retried still count against the service
+                    breaker.record_failure()
+                break
+
+            if not self._retry(breaker, command, attempt, attempts):
+                response.raise_for_status()
 
         if response.status_code == 401:
             raise KeaUnauthorizedAccessException
@@ -152,6 +202,78 @@ class Kea:
 
         return KeaResponse(**data)
 
+    def get_circuit_breaker(
+        self, service: List[str] = None
+    ) -> Optional[CircuitBreaker]:
+        """Returns the circuit breaker of a service (eg. ["dhcp4"]) or None if the retry policy
+        doesn't use circuit breakers
+
+        Args:
+            service:    Service list of the command, the control agent is used if empty
+        """
+        if not self.retry_policy or self.retry_policy.failure_threshold <= 0:
+            return None
+
+        name = ",".join(service or []) or "ctrlagent"
+        with self._breaker_lock:
+            breaker = self.circuit_breakers.get(name)
+            if not breaker:
+                breaker = CircuitBreaker(
+                    name=name,
+                    failure_threshold=self.retry_policy.failure_threshold,
+                    reset_timeout=self.retry_policy.reset_timeout,
+                    instrumentation=self.instrumentation,
+                )
+                self.circuit_breakers[name] = breaker
+            return breaker
+
+    def _retry(
+        self,
+        breaker: Optional[CircuitBreaker],
+        command: str,
+        attempt: int,
+        attempts: int,
+    ) -> bool:
+        # Records a failed attempt and waits before the next one, returns False if the
+        # command shouldn't be sent again
+        if breaker:
+            breaker.record_failure()
+
+        if attempt >= attempts or (breaker and not breaker.allow()):
+            return False
+
+        delay = self.retry_policy.backoff.delay(attempt)
+        self.instrumentation.increment("retries")
+        self.instrumentation.emit(
+            "retry", command=command, attempt=attempt, delay=delay
+        )
+        time.sleep(delay)
+        return True
+
+    def _post(self, endpoint: str, body: dict, **kwargs) -> requests.Response:
+        url = self.url + endpoint
+        headers = self.headers
+        if "Content-Type" not in headers:
+            headers = {**headers, "Content-Type": "application/json"}
+
+        start = time.monotonic()
+        response = requests.post(
+            url=url,
+            data=self.json_encoder(body),
+            headers=headers,
+            auth=self.basic_auth if self.use_basic_auth else None,
+            verify=self.verify,
+            **kwargs,
+        )
+        self.instrumentation.increment("requests")
+        self.instrumentation.emit(
+            "request",
+            command=body.get("command"),
+            status_code=response.status_code,
+            duration=time.monotonic() - start,
+        )
+        return response
+
     def send_command(
         self, command: str, service: str, required_hook: str = ""
     ) -> KeaResponse:
@@ -235,16 +357,7 @@ class Kea:
         # Build remote payload if user wants to select a specific database instance as per API documentation
         # https://kea.readthedocs.io/en/kea-2.2.0/arm/hooks.html#command-structure
         if remote_map:
-            try:
-                remote_map_parsed = RemoteMap.parse_obj(remote_map)
-            except ValidationError as err:
-                raise KeaInvalidRemoteMapException(str(err))
-            except Exception as err:
-                raise KeaInvalidRemoteMapException(f"Generic Exception caught: {err}")
-
-            arguments["remote"] = remote_map_parsed.dict(
-                exclude_unset=True, exclude_none=True
-            )
+            arguments["remote"] = self.parse_remote_map(remote_map)
 
         command_results = self.post(
             endpoint="/",
@@ -256,6 +369,21 @@ class Kea:
         )
         return command_results
 
+    def parse_remote_map(self, remote_map: dict) -> dict:
+        """Validates a remote map and returns the `remote` argument used by the cb_cmds hook
+
+        Args:
+            remote_map:     (remote_type, remote_host or remote_port) to select a specific remote database
+        """
+        try:
+            remote_map_parsed = RemoteMap.parse_obj(remote_map)
+        except ValidationError as err:
+            raise KeaInvalidRemoteMapException(str(err))
+        except Exception as err:
+            raise KeaInvalidRemoteMapException(f"Generic Exception caught: {err}")
+
+        return remote_map_parsed.dict(exclude_unset=True, exclude_none=True)
+
     def get_next_available_subnet_id(self, subnet_ids: List[int]) -> int:
         """Returns the next available subnet-id based on a given list of
         existing subnet-ids
@@ -264,7 +392,8 @@ class Kea:
             subnet_ids:     Existing list of subnet-ids gathered via
                 subnet4_list/subnet6_list or manually gathered via parser
         """
-        next_id = next(
-            i for i, e in enumerate(sorted(subnet_ids) + [None], 1) if i != e
-        )
+        existing_ids = set(subnet_ids)
+        next_id = 1
+        while next_id in existing_ids:
+            next_id += 1
         return next_id
@@ -0,0 +1,8 @@
+from pykeadhcp.leases.memfile import get_memfile_paths, read_memfile_leases
+from pykeadhcp.leases.statistics import get_subnet_statistics, get_lease_counts
+from pykeadhcp.leases.index import LeaseIndex
+from pykeadhcp.leases.dump import dump_leases, shard_subnets
+from pykeadhcp.leases.digest import LeaseDigest, compare_leases, get_range_leases
+from pykeadhcp.leases.expiry import LeaseExpiryScheduler
+from pykeadhcp.leases.paging import iter_leases, iter_reservations
+from pykeadhcp.leases.export import StreamingExporter
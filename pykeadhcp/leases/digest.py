@@ -0,0 +1,263 @@
+import hashlib
+from ipaddress import ip_address
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from pykeadhcp.daemons import Dhcp4, Dhcp6
+from pykeadhcp.models.dhcp4.lease import Lease4
+from pykeadhcp.models.dhcp6.lease import Lease6
+from pykeadhcp.models.records import Lease4Record, Lease6Record
+from pykeadhcp.models.serializer import convert_value
+
+Lease = Union[Lease4, Lease6, Lease4Record, Lease6Record]
+
+# Lease fields which make up the hash of a lease, HA partners keep all of these in sync
+LEASE4_DIGEST_FIELDS = (
+    "ip_address",
+    "hw_address",
+    "client_id",
+    "subnet_id",
+    "valid_lft",
+    "cltt",
+    "hostname",
+    "state",
+)
+LEASE6_DIGEST_FIELDS = (
+    "ip_address",
+    "duid",
+    "iaid",
+    "type",
+    "prefix_len",
+    "hw_address",
+    "subnet_id",
+    "valid_lft",
+    "cltt",
+    "hostname",
+    "state",
+)
+
+# Hashes are added together so the digest doesn't depend on the order of the leases
+MODULO = 2**64
+
+# Number of leases and sum of their hashes
+Digest = Tuple[int, int]
+
+
+def lease_hash(lease: Lease, fields: Tuple[str, ...] = LEASE4_DIGEST_FIELDS) -> int:
+    """Returns a stable 64 bit hash of a lease (the same in every process, unlike hash())
+
+    Args:
+        lease:      Lease model or record
+        fields:     Fields to include in the hash
+    """
+    values = []
+    for name in fields:
+        # Models hold enums where records hold the raw values (eg. Lease6 type)
+        value = convert_value(getattr(lease, name, None))
+        if isinstance(value, str):
+            value = value.lower()
+        values.append("" if value is None else str(value))
+
+    data = "|".join(values).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class LeaseDigest:
+    """Order independent digest of a set of leases, organised as a tree of subnets and address
+    ranges of 2**range_bits addresses. Every range holds the number of leases and the sum of
+    their hashes, subnets and the whole digest are the sums of their ranges. Comparing two
+    digests (eg. of both HA partners, or the current and previous digest of a server) with
+    diff() only returns the ranges which differ, so only those ranges have to be fetched and
+    compared lease by lease (see compare_leases).
+
+    Leases can be streamed into the digest (eg. from dump_leases or read_memfile_leases), only
+    the range digests are kept in memory.
+
+    digest = LeaseDigest.from_leases(dump_leases(server.dhcp4))
+    changes = digest.diff(previous_digest)
+
+    Args:
+        version:        4 or 6
+        range_bits:     Size of every address range in bits (eg. 8 for ranges of 256 addresses)
+    """
+
+    def __init__(self, version: int = 4, range_bits: int = 8):
+        self.version = version
+        self.range_bits = range_bits
+        self.fields = LEASE4_DIGEST_FIELDS if version == 4 else LEASE6_DIGEST_FIELDS
+        self.ranges: Dict[int, Dict[int, List[int]]] = {}
+
+    @classmethod
+    def from_leases(
+        cls, leases: Iterable[Lease], version: int = 4, range_bits: int = 8
+    ) -> "LeaseDigest":
+        """Returns the digest of the leases
+
+        Args:
+            leases:         Leases (eg. dump_leases(server.dhcp4))
+            version:        4 or 6
+            range_bits:     Size of every address range in bits
+        """
+        digest = cls(version=version, range_bits=range_bits)
+        for lease in leases:
+            digest.add(lease)
+        return digest
+
+    def add(self, lease: Lease) -> None:
+        """Adds a lease to the digest
+
+        Args:
+            lease:      Lease model or record
+        """
+        self._update(lease, 1)
+
+    def remove(self, lease: Lease) -> None:
+        """Removes a lease which was added before from the digest (eg. when it was updated)
+
+        Args:
+            lease:      Lease model or record
+        """
+        self._update(lease, -1)
+
+    def digest(self) -> Digest:
+        """Returns the number of leases and the combined hash of every lease"""
+        return self._combine(self.subnet_digest(subnet_id) for subnet_id in self.ranges)
+
+    def subnet_digest(self, subnet_id: int) -> Digest:
+        """Returns the number of leases and the combined hash of a subnet
+
+        Args:
+            subnet_id:      Subnet ID
+        """
+        return self._combine(
+            (count, value) for count, value in self.ranges.get(subnet_id, {}).values()
+        )
+
+    def diff(self, other: "LeaseDigest") -> Dict[int, List[Tuple[str, str]]]:
+        """Returns the first and last address of every range which differs from another digest
+        by subnet ID, subnets with the same digest are skipped without comparing their ranges
+
+        Args:
+            other:      Digest to compare with (eg. of the HA partner or a previous digest)
+        """
+        if self.range_bits != other.range_bits or self.version != other.version:
+            raise ValueError(
+                "Only digests with the same version and range_bits can be compared"
+            )
+
+        differences = {}
+        for subnet_id in sorted(set(self.ranges) | set(other.ranges)):
+            if self.subnet_digest(subnet_id) == other.subnet_digest(subnet_id):
+                continue
+
+            ranges = self.ranges.get(subnet_id, {})
+            other_ranges = other.ranges.get(subnet_id, {})
+            differences[subnet_id] = [
+                self._range_addresses(start)
+                for start in sorted(set(ranges) | set(other_ranges))
+                if ranges.get(start) != other_ranges.get(start)
+            ]
+
+        return differences
+
+    def _update(self, lease: Lease, sign: int) -> None:
+        start = int(ip_address(lease.ip_address)) >> self.range_bits
+        ranges = self.ranges.setdefault(lease.subnet_id, {})
+        count, value = ranges.get(start, (0, 0))
+        count += sign
+        value = (value + sign * lease_hash(lease, self.fields)) % MODULO
+        if count:
+            ranges[start] = [count, value]
+        else:
+            ranges.pop(start, None)
+            if not ranges:
+                del self.ranges[lease.subnet_id]
+
+    def _combine(self, digests: Iterable[Digest]) -> Digest:
+        count = value = 0
+        for range_count, range_value in digests:
+            count += range_count
+            value = (value + range_value) % MODULO
+        return count, value
+
+    def _range_addresses(self, start: int) -> Tuple[str, str]:
+        first = ip_address(start << self.range_bits)
+        if self.version == 6 and first.version == 4:
+            first = ip_address(int(first).to_bytes(16, "big"))
+        return str(first), str(first + (2**self.range_bits - 1))
+
+
+def get_range_leases(
+    daemon: Union[Dhcp4, Dhcp6], first: str, last: str, page_size: int = 100
+) -> List[Union[Lease4Record, Lease6Record]]:
+    """Returns every lease between two addresses (inclusive) using lease4-get-page/lease6-get-page
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+        first:          First address of the range
+        last:           Last address of the range
+        page_size:      Number of leases to request per page
+    """
+    if isinstance(daemon, Dhcp4):
+        get_page = daemon.lease4_get_page_lite
+    else:
+        get_page = daemon.lease6_get_page_lite
+
+    first_address = ip_address(first)
+    last_address = ip_address(last)
+    # Pages start after the address in "from", so start from the address before the range
+    search_from = str(first_address - 1) if int(first_address) else "start"
+
+    leases = []
+    while True:
+        page = get_page(limit=page_size, search_from=search_from)
+        for lease in page:
+            address = ip_address(lease.ip_address)
+            if address > last_address:
+                return leases
+            if address >= first_address:
+                leases.append(lease)
+
+        if len(page) < page_size:
+            return leases
+        search_from = page[-1].ip_address
+
+
+def compare_leases(
+    daemon: Union[Dhcp4, Dhcp6],
+    other_daemon: Union[Dhcp4, Dhcp6],
+    differences: Dict[int, List[Tuple[str, str]]],
+    page_size: int = 100,
+) -> List[Tuple[str, Optional[Lease], Optional[Lease]]]:
+    """Fetches the leases of the ranges returned by LeaseDigest.diff from both daemons and
+    returns (address, lease, other_lease) for every lease that is different or only exists on
+    one of the daemons
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. primary.dhcp4)
+        other_daemon:   Daemon to compare with (eg. secondary.dhcp4)
+        differences:    Ranges to compare by subnet ID, from LeaseDigest.diff
+        page_size:      Number of leases to request per page
+    """
+    fields = LEASE4_DIGEST_FIELDS if isinstance(daemon, Dhcp4) else LEASE6_DIGEST_FIELDS
+    mismatches = []
+    for subnet_id, ranges in differences.items():
+        for first, last in ranges:
+            leases, other_leases = (
+                {
+                    lease.ip_address: lease
+                    for lease in get_range_leases(target, first, last, page_size)
+                    if lease.subnet_id == subnet_id
+                }
+                for target in (daemon, other_daemon)
+            )
+            for address in sorted(set(leases) | set(other_leases), key=ip_address):
+                lease = leases.get(address)
+                other_lease = other_leases.get(address)
+                if (
+                    lease is None
+                    or other_lease is None
+                    or lease_hash(lease, fields) != lease_hash(other_lease, fields)
+                ):
+                    mismatches.append((address, lease, other_lease))
+
+    return mismatches
@@ -0,0 +1,86 @@
+import heapq
+from typing import Dict, Iterator, List, Union
+
+from pykeadhcp.concurrency import AdaptiveLimit, bounded_map
+from pykeadhcp.daemons import Dhcp4, Dhcp6
+from pykeadhcp.exceptions import KeaLeaseNotFoundException
+from pykeadhcp.leases.statistics import get_lease_counts
+from pykeadhcp.models.dhcp4.lease import Lease4
+from pykeadhcp.models.dhcp6.lease import Lease6
+from pykeadhcp.models.records import Lease4Record, Lease6Record
+from pykeadhcp.parsers.lazy import LazyDhcp4Config, LazyDhcp6Config
+
+
+def shard_subnets(counts: Dict[int, int], shards: int) -> List[List[int]]:
+    """Splits subnets into shards with a similar number of leases, the largest subnets are
+    placed first on the shard with the fewest leases so far. Empty shards are left out
+
+    Args:
+        counts:     Number of leases by subnet ID (eg. from get_lease_counts)
+        shards:     Maximum number of shards
+    """
+    heap = [(0, shard) for shard in range(max(shards, 1))]
+    subnet_shards: List[List[int]] = [[] for _ in heap]
+    for subnet_id in sorted(
+        counts, key=lambda subnet_id: (-counts[subnet_id], subnet_id)
+    ):
+        # Subnets without leases still cost a lookup so they count as a single lease
+        total, shard = heapq.heappop(heap)
+        subnet_shards[shard].append(subnet_id)
+        heapq.heappush(heap, (total + max(counts[subnet_id], 1), shard))
+
+    return [sorted(subnet_ids) for subnet_ids in subnet_shards if subnet_ids]
+
+
+def dump_leases(
+    daemon: Union[Dhcp4, Dhcp6],
+    subnet_ids: List[int] = None,
+    max_workers: int = 4,
+    shards: int = None,
+    records: bool = True,
+    limit: AdaptiveLimit = None,
+) -> Iterator[Union[Lease4, Lease6, Lease4Record, Lease6Record]]:
+    """Yields every lease of a Dhcp4 or Dhcp6 daemon by splitting the subnets into shards
+    balanced by their lease count (from the subnet statistics) and fetching the shards
+    concurrently with lease4-get-all/lease6-get-all. With multi-threading enabled in Kea this
+    is a lot faster than a single lease4-get-all request. Leases are yielded shard by shard as
+    soon as they are received, no more than max_workers shards are requested at once
+
+    for lease in dump_leases(server.dhcp4, max_workers=8):
+        print(lease.ip_address)
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+        subnet_ids:     Subnets to dump, defaults to every subnet of the cached config
+        max_workers:    Maximum number of concurrent requests
+        shards:         Number of shards, defaults to 2x max_workers
+        records:        Yield Lease4Record/Lease6Record objects instead of validated models
+        limit:          Adaptive concurrency limit used instead of max_workers
+    """
+    version = 4 if isinstance(daemon, Dhcp4) else 6
+    if subnet_ids is None:
+        config_class = LazyDhcp4Config if version == 4 else LazyDhcp6Config
+        subnet_ids = config_class(config=daemon.cached_config).subnet_ids()
+
+    lease_counts = get_lease_counts(daemon)
+    counts = {subnet_id: lease_counts.get(subnet_id, 0) for subnet_id in subnet_ids}
+    if records:
+        get_all = (
+            daemon.lease4_get_all_lite if version == 4 else daemon.lease6_get_all_lite
+        )
+    else:
+        get_all = daemon.lease4_get_all if version == 4 else daemon.lease6_get_all
+
+    def get_shard(subnets: List[int]) -> list:
+        try:
+            return get_all(subnets=subnets)
+        except KeaLeaseNotFoundException:
+            return []
+
+    for leases in bounded_map(
+        get_shard,
+        shard_subnets(counts, shards or max_workers * 2),
+        max_workers=max_workers,
+        limit=limit,
+    ):
+        yield from leases
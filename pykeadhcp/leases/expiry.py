@@ -0,0 +1,202 @@
+import heapq
+import threading
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pykeadhcp.instrumentation import Instrumentation
+from pykeadhcp.models.dhcp4.lease import Lease4
+from pykeadhcp.models.dhcp6.lease import Lease6
+from pykeadhcp.models.records import Lease4Record, Lease6Record
+
+Lease = Union[Lease4, Lease6, Lease4Record, Lease6Record]
+
+LEASE_EXPIRING = "lease_expiring"
+LEASE_EXPIRED = "lease_expired"
+
+# Kea uses the maximum 32 bit value for leases which never expire
+INFINITE_LIFETIME = 0xFFFFFFFF
+
+# Lease state 2 is expired-reclaimed
+STATE_EXPIRED_RECLAIMED = 2
+
+# The heap is rebuilt once it holds this many times more entries than tracked leases
+COMPACT_RATIO = 2
+
+# Leases are read (eg. paged from Kea) without holding the lock and scheduled in chunks
+UPDATE_CHUNK_SIZE = 1000
+
+
+class LeaseExpiryScheduler:
+    """Tracks the expiry time (cltt + valid_lft) of leases in a heap and emits an event when
+    a lease is about to expire (lease_expiring, warning seconds before) and when it expired
+    (lease_expired). Events are sent to the hooks of the instrumentation (eg. pass
+    server.instrumentation) and returned by poll() or yielded by events().
+
+    Leases can be added again at any time (eg. from LeaseIndex, dump_leases or
+    read_memfile_leases), only leases whose expiry time changed are rescheduled. Leases that
+    are renewed before they expire are rescheduled without emitting any event. Old heap
+    entries are skipped when they come up and the heap is compacted once most of it is stale.
+
+    scheduler = LeaseExpiryScheduler(warning=300)
+    scheduler.instrumentation.add_hook("lease_expired", lambda event, lease, expire: print(lease.ip_address))
+    scheduler.update(dump_leases(server.dhcp4))
+    scheduler.poll()
+
+    Args:
+        warning:            Seconds before the expiry of a lease to emit lease_expiring, 0 to disable
+        instrumentation:    Instrumentation to emit events to, a new one is created by default
+    """
+
+    def __init__(self, warning: float = 0, instrumentation: Instrumentation = None):
+        self.warning = warning
+        self.instrumentation = instrumentation or Instrumentation()
+        # Address -> (expire, lease) of every tracked lease
+        self.leases: Dict[str, Tuple[int, Lease]] = {}
+        # (event time, address, expire) where event time is either the warning or the expiry
+        self._heap: List[Tuple[float, str, int]] = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        return len(self.leases)
+
+    def update(self, leases: Iterable[Lease], replace: bool = False) -> int:
+        """Adds or reschedules leases, returns the number of leases (re)scheduled
+
+        Leases without a cltt, valid lifetime or with an infinite lifetime are not tracked.
+        Leases are consumed in chunks without holding the lock, so poll() and events() keep
+        running while the leases are paged from Kea
+
+        Args:
+            leases:     Leases (eg. LeaseIndex.leases.values() or dump_leases(server.dhcp4))
+            replace:    Stop tracking every lease which is not part of leases
+        """
+        scheduled = 0
+        seen = set()
+        leases = iter(leases)
+        while True:
+            chunk = list(islice(leases, UPDATE_CHUNK_SIZE))
+            if not chunk:
+                break
+
+            with self._lock:
+                for lease in chunk:
+                    seen.add(lease.ip_address)
+                    scheduled += self._schedule(lease)
+                self._changed.notify_all()
+
+        with self._lock:
+            if replace:
+                for ip_address in set(self.leases) - seen:
+                    del self.leases[ip_address]
+
+            self._compact()
+
+        return scheduled
+
+    def remove(self, ip_address: str) -> None:
+        """Stops tracking a lease (eg. after lease4_del)
+
+        Args:
+            ip_address:     IP address of the lease
+        """
+        with self._lock:
+            self.leases.pop(ip_address, None)
+            self._compact()
+
+    def next_event_at(self) -> Optional[float]:
+        """Returns the time of the next event or None if no leases are tracked"""
+        with self._lock:
+            self._skip_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def poll(self, now: float = None) -> List[Tuple[str, Lease]]:
+        """Emits and returns (event, lease) for every event due by now
+
+        Args:
+            now:    Time to compare the events with, defaults to the current time
+        """
+        now = time.time() if now is None else now
+        events = []
+        with self._lock:
+            while True:
+                self._skip_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+
+                event_at, ip_address, expire = heapq.heappop(self._heap)
+                lease = self.leases[ip_address][1]
+                if event_at < expire:
+                    events.append((LEASE_EXPIRING, lease, expire))
+                    heapq.heappush(self._heap, (expire, ip_address, expire))
+                else:
+                    events.append((LEASE_EXPIRED, lease, expire))
+                    del self.leases[ip_address]
+
+        # Hooks are called without holding the lock so they can update the scheduler
+        for event, lease, expire in events:
+            self.instrumentation.increment(event)
+            self.instrumentation.emit(event, lease=lease, expire=expire)
+
+        return [(event, lease) for event, lease, _ in events]
+
+    def events(
+        self, stop: threading.Event = None, max_wait: float = 60
+    ) -> Iterator[Tuple[str, Lease]]:
+        """Yields (event, lease) as events become due, waiting in between until stop is set
+
+        for event, lease in scheduler.events(stop=stop):
+            print(event, lease.ip_address)
+
+        stop is checked after every batch of events and at least every max_wait seconds
+
+        Args:
+            stop:       Event to stop waiting for more events
+            max_wait:   Maximum number of seconds to wait before checking for new leases again
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            yield from self.poll()
+            if stop.is_set():
+                break
+
+            next_event_at = self.next_event_at()
+            wait = max_wait if next_event_at is None else next_event_at - time.time()
+            if wait > 0:
+                with self._lock:
+                    # Woken up early when update() schedules new leases
+                    self._changed.wait(min(wait, max_wait))
+
+    def _schedule(self, lease: Lease) -> int:
+        valid_lft = lease.valid_lft or 0
+        if (
+            not valid_lft
+            or lease.cltt is None
+            or valid_lft >= INFINITE_LIFETIME
+            or lease.state == STATE_EXPIRED_RECLAIMED
+        ):
+            self.leases.pop(lease.ip_address, None)
+            return 0
+
+        expire = lease.cltt + valid_lft
+        current = self.leases.get(lease.ip_address)
+        self.leases[lease.ip_address] = (expire, lease)
+        if current and current[0] == expire:
+            return 0
+
+        heapq.heappush(self._heap, (expire - self.warning, lease.ip_address, expire))
+        return 1
+
+    def _is_stale(self, entry: Tuple[float, str, int]) -> bool:
+        current = self.leases.get(entry[1])
+        return not current or current[0] != entry[2]
+
+    def _skip_stale(self) -> None:
+        while self._heap and self._is_stale(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def _compact(self) -> None:
+        if len(self._heap) > COMPACT_RATIO * len(self.leases) + 1024:
+            self._heap = [entry for entry in self._heap if not self._is_stale(entry)]
+            heapq.heapify(self._heap)
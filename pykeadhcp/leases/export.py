@@ -0,0 +1,250 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+
+from pykeadhcp.models.records import Record
+from pykeadhcp.models.serializer import json_dumps, serialize_model
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMATS = ("ndjson", "csv")
+COMPRESSIONS = (None, "gzip", "zstd")
+EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+# Marks the end of the rows for the writer thread
+_END = object()
+
+
+class _ChecksumFile:
+    """Binary file which keeps the sha256 and size of everything written to it"""
+
+    def __init__(self, path: Path):
+        self.file = open(path, "wb")
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class StreamingExporter:
+    """Writes leases or reservations (models, records or dictionaries) to NDJSON or CSV files
+    while they are being fetched. Rows are handed to a background thread through a bounded
+    queue, so fetching the next page from Kea and compressing/writing the previous one
+    overlap, and only queue_size rows are held in memory at any time.
+
+    Once a file holds max_chunk_size bytes (before compression) the next rows are written to a
+    new file (<prefix>-00001.ndjson.gz, ...). close() writes <prefix>.manifest.json with the
+    number of rows, size and sha256 checksum of every file.
+
+    with StreamingExporter("/var/backups/kea", prefix="leases4", compression="gzip") as exporter:
+        exporter.write_all(iter_leases(server.dhcp4))
+    print(exporter.manifest["rows"])
+
+    Args:
+        directory:          Directory to write the files to, created if it doesn't exist
+        prefix:             Prefix of every file name
+        format:             ndjson or csv
+        compression:        None, gzip or zstd (requires the zstandard package)
+        max_chunk_size:     Bytes (before compression) per file, None for a single file
+        columns:            CSV columns, defaults to every field of the record or model type of the first row (required for dictionaries)
+        queue_size:         Maximum number of rows waiting to be written
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "export",
+        format: str = "ndjson",
+        compression: Optional[str] = None,
+        max_chunk_size: Optional[int] = None,
+        columns: List[str] = None,
+        queue_size: int = 10000,
+    ):
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        if compression not in COMPRESSIONS:
+            raise ValueError("compression must be None, gzip or zstd")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression requires the zstandard package")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.format = format
+        self.compression = compression
+        self.max_chunk_size = max_chunk_size
+        self.columns = columns
+        self.manifest: Optional[Dict[str, Any]] = None
+        self.chunks: List[Dict[str, Any]] = []
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._error: Optional[BaseException] = None
+        self._file: Optional[_ChecksumFile] = None
+        self._stream = None
+        self._chunk_rows = 0
+        self._chunk_size = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "StreamingExporter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
+
+    def write(self, row: Any) -> None:
+        """Queues a row, blocks while the queue is full
+
+        Args:
+            row:        Model, record or dictionary
+        """
+        if self._error:
+            raise self._error
+        if self.manifest is not None:
+            raise ValueError("Exporter is closed")
+
+        self._queue.put(row)
+
+    def write_all(self, rows: Iterable[Any]) -> None:
+        """Queues every row, rows are consumed lazily (eg. from iter_leases)
+
+        Args:
+            rows:       Models, records or dictionaries
+        """
+        for row in rows:
+            self.write(row)
+
+    def close(self) -> Dict[str, Any]:
+        """Waits for every queued row to be written, writes the manifest and returns it"""
+        if self.manifest is not None:
+            return self.manifest
+
+        self._queue.put(_END)
+        self._thread.join()
+        if self._error:
+            raise self._error
+
+        self.manifest = {
+            "format": self.format,
+            "compression": self.compression,
+            "columns": self.columns if self.format == "csv" else None,
+            "rows": sum(chunk["rows"] for chunk in self.chunks),
+            "created_at": time.time(),
+            "chunks": self.chunks,
+        }
+        path = self.directory / f"{self.prefix}.manifest.json"
+        path.write_text(json.dumps(self.manifest, indent=4))
+        return self.manifest
+
+    def _run(self) -> None:
+        row = None
+        try:
+            while True:
+                row = self._queue.get()
+                if row is _END:
+                    break
+                self._write_row(row)
+            self._close_chunk()
+        except BaseException as error:
+            self._error = error
+            # Keep draining the queue so write() and close() don't block forever
+            while row is not _END:
+                row = self._queue.get()
+
+    def _write_row(self, row: Any) -> None:
+        if self.format == "csv" and self.columns is None:
+            self.columns = self._get_columns(row)
+
+        if isinstance(row, Record):
+            row = row.to_dict()
+        elif isinstance(row, BaseModel):
+            row = serialize_model(row)
+
+        if self.format == "ndjson":
+            data = json_dumps(row) + b"\n"
+        else:
+            data = self._csv_line(
+                [self._csv_value(row.get(column)) for column in self.columns]
+            )
+
+        if self._stream is None:
+            self._open_chunk()
+        self._stream.write(data)
+        self._chunk_rows += 1
+        self._chunk_size += len(data)
+        if self.max_chunk_size and self._chunk_size >= self.max_chunk_size:
+            self._close_chunk()
+
+    def _get_columns(self, row: Any) -> List[str]:
+        # Empty values are left out of every row, so the columns come from the row type
+        if isinstance(row, Record):
+            return list(row._aliases)
+        if isinstance(row, BaseModel):
+            return [field.alias for field in row.__fields__.values()]
+        raise ValueError("columns are required to export dictionaries as CSV")
+
+    def _open_chunk(self) -> None:
+        name = f"{self.prefix}-{len(self.chunks):05d}.{self.format}{EXTENSIONS[self.compression]}"
+        self._file = _ChecksumFile(self.directory / name)
+        if self.compression == "gzip":
+            self._stream = gzip.GzipFile(
+                filename="", mode="wb", fileobj=self._file, mtime=0
+            )
+        elif self.compression == "zstd":
+            self._stream = zstandard.ZstdCompressor().stream_writer(
+                self._file, closefd=False
+            )
+        else:
+            self._stream = self._file
+        self.chunks.append({"file": name, "rows": 0, "size": 0, "sha256": None})
+        self._chunk_rows = self._chunk_size = 0
+
+        if self.format == "csv":
+            header = self._csv_line(self.columns)
+            self._stream.write(header)
+            self._chunk_size += len(header)
+
+    def _close_chunk(self) -> None:
+        if self._stream is None:
+            return
+
+        if self._stream is not self._file:
+            self._stream.close()
+        self._file.close()
+        self.chunks[-1].update(
+            rows=self._chunk_rows,
+            size=self._file.size,
+            sha256=self._file.sha256.hexdigest(),
+        )
+        self._stream = self._file = None
+
+    def _csv_line(self, values: List[Any]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow(values)
+        return buffer.getvalue().encode()
+
+    def _csv_value(self, value: Any) -> Any:
+        # Nested values (eg. option-data or user-context) are written as JSON
+        if isinstance(value, (dict, list)):
+            return json_dumps(value).decode()
+        return "" if value is None else value
@@ -0,0 +1,220 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from pykeadhcp.daemons import Dhcp4, Dhcp6
+from pykeadhcp.exceptions import KeaLeaseNotFoundException
+from pykeadhcp.leases.paging import iter_leases
+from pykeadhcp.leases.statistics import get_subnet_statistics
+from pykeadhcp.models.records import Lease4Record, Lease6Record
+
+LeaseRecord = Union[Lease4Record, Lease6Record]
+
+# Statistics which change whenever a lease is added, released, declined or reclaimed
+TRACKED_STATISTICS = (
+    "assigned-addresses",
+    "cumulative-assigned-addresses",
+    "assigned-nas",
+    "cumulative-assigned-nas",
+    "assigned-pds",
+    "cumulative-assigned-pds",
+    "declined-addresses",
+    "reclaimed-leases",
+    "reclaimed-declined-addresses",
+)
+
+
+class LeaseIndex:
+    """In-memory index of every lease of a Dhcp4 or Dhcp6 daemon, answering lookups by IP
+    address, hw-address, client-id, duid (and iaid), hostname and subnet without a request
+    to Kea. Leases are stored as Lease4Record/Lease6Record objects.
+
+    load() pages through every lease with lease4-get-page/lease6-get-page. refresh() compares
+    the subnet statistics (assigned, cumulative assigned, declined and reclaimed leases) with the
+    statistics seen during the previous refresh and only fetches the leases of the subnets where
+    they changed. Renewing or updating a lease doesn't change any statistic, so the cltt and
+    valid_lft of a lease can be out of date until the next load().
+
+    index = LeaseIndex(server.dhcp4)
+    index.load()
+    print(index.get_by_hw_address("aa:bb:cc:dd:ee:ff"))
+    changed_subnets = index.refresh()
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+        page_size:      Number of leases to request per page when loading every lease
+        subnet_batch:   Number of subnets to request at once when refreshing
+    """
+
+    def __init__(
+        self,
+        daemon: Union[Dhcp4, Dhcp6],
+        page_size: int = 1000,
+        subnet_batch: int = 50,
+    ):
+        self.daemon = daemon
+        self.version = 4 if isinstance(daemon, Dhcp4) else 6
+        self.page_size = page_size
+        self.subnet_batch = subnet_batch
+        self.statistics: Dict[int, Tuple[int, ...]] = {}
+        self._lock = threading.RLock()
+        self._clear()
+
+    def __len__(self) -> int:
+        return len(self.leases)
+
+    def __contains__(self, ip_address: str) -> bool:
+        return ip_address in self.leases
+
+    def load(self) -> int:
+        """Fetches every lease page by page and rebuilds the indexes, returns the number of
+        leases loaded"""
+        # Statistics are taken first so any change made while paging is picked up by refresh()
+        statistics = self._get_statistics()
+        leases = list(iter_leases(self.daemon, page_size=self.page_size))
+
+        with self._lock:
+            self._clear()
+            for lease in leases:
+                self._add(lease)
+            self.statistics = statistics
+
+        return len(leases)
+
+    def refresh(self) -> List[int]:
+        """Fetches the leases of every subnet whose statistics changed since the last refresh
+        (or load) and returns the IDs of those subnets"""
+        statistics = self._get_statistics()
+        changed = sorted(
+            subnet_id
+            for subnet_id in set(statistics) | set(self.statistics)
+            if statistics.get(subnet_id) != self.statistics.get(subnet_id)
+        )
+
+        for start in range(0, len(changed), self.subnet_batch):
+            subnet_ids = changed[start : start + self.subnet_batch]
+            leases = self._get_subnet_leases(
+                [subnet_id for subnet_id in subnet_ids if subnet_id in statistics]
+            )
+            with self._lock:
+                for subnet_id in subnet_ids:
+                    for ip_address in list(self.by_subnet.get(subnet_id, ())):
+                        self._remove(ip_address)
+
+                for lease in leases:
+                    self._add(lease)
+
+        self.statistics = statistics
+        return changed
+
+    def get_by_ip(self, ip_address: str) -> Optional[LeaseRecord]:
+        """Returns the lease of an IP address (or delegated prefix)
+
+        Args:
+            ip_address:     IP address
+        """
+        return self.leases.get(ip_address)
+
+    def get_by_hw_address(self, hw_address: str) -> List[LeaseRecord]:
+        """Returns every lease of a hardware address
+
+        Args:
+            hw_address:     Hardware address (eg. aa:bb:cc:dd:ee:ff)
+        """
+        return self._lookup(self.by_hw_address, hw_address.lower())
+
+    def get_by_client_id(self, client_id: str) -> List[LeaseRecord]:
+        """Returns every lease of a client-id (Dhcp4)
+
+        Args:
+            client_id:      Client ID
+        """
+        return self._lookup(self.by_client_id, client_id.lower())
+
+    def get_by_duid(self, duid: str, iaid: int = None) -> List[LeaseRecord]:
+        """Returns every lease of a DUID (Dhcp6), optionally only for a specific IAID
+
+        Args:
+            duid:       DUID
+            iaid:       Identity Association Identifier
+        """
+        leases = self._lookup(self.by_duid, duid.lower())
+        if iaid is None:
+            return leases
+        return [lease for lease in leases if lease.iaid == iaid]
+
+    def get_by_hostname(self, hostname: str) -> List[LeaseRecord]:
+        """Returns every lease of a hostname (case insensitive)
+
+        Args:
+            hostname:   Hostname
+        """
+        return self._lookup(self.by_hostname, hostname.lower())
+
+    def get_by_subnet(self, subnet_id: int) -> List[LeaseRecord]:
+        """Returns every lease of a subnet
+
+        Args:
+            subnet_id:  Subnet ID
+        """
+        return self._lookup(self.by_subnet, subnet_id)
+
+    def _clear(self) -> None:
+        self.leases: Dict[str, LeaseRecord] = {}
+        self.by_hw_address: Dict[str, Set[str]] = {}
+        self.by_client_id: Dict[str, Set[str]] = {}
+        self.by_duid: Dict[str, Set[str]] = {}
+        self.by_hostname: Dict[str, Set[str]] = {}
+        self.by_subnet: Dict[int, Set[str]] = {}
+
+    def _keys(self, lease: LeaseRecord) -> Iterable[Tuple[dict, object]]:
+        yield self.by_subnet, lease.subnet_id
+        if lease.hw_address:
+            yield self.by_hw_address, lease.hw_address.lower()
+        if lease.hostname:
+            yield self.by_hostname, lease.hostname.lower()
+        if self.version == 4:
+            if lease.client_id:
+                yield self.by_client_id, lease.client_id.lower()
+        elif lease.duid:
+            yield self.by_duid, lease.duid.lower()
+
+    def _add(self, lease: LeaseRecord) -> None:
+        if lease.ip_address in self.leases:
+            self._remove(lease.ip_address)
+
+        self.leases[lease.ip_address] = lease
+        for index, key in self._keys(lease):
+            index.setdefault(key, set()).add(lease.ip_address)
+
+    def _remove(self, ip_address: str) -> None:
+        lease = self.leases.pop(ip_address, None)
+        if not lease:
+            return
+
+        for index, key in self._keys(lease):
+            addresses = index.get(key)
+            if addresses:
+                addresses.discard(ip_address)
+                if not addresses:
+                    del index[key]
+
+    def _lookup(self, index: dict, key) -> List[LeaseRecord]:
+        with self._lock:
+            return [self.leases[ip_address] for ip_address in index.get(key, ())]
+
+    def _get_statistics(self) -> Dict[int, Tuple[int, ...]]:
+        return {
+            subnet_id: tuple(values.get(name) for name in TRACKED_STATISTICS)
+            for subnet_id, values in get_subnet_statistics(self.daemon).items()
+        }
+
+    def _get_subnet_leases(self, subnet_ids: List[int]) -> List[LeaseRecord]:
+        if not subnet_ids:
+            return []
+
+        try:
+            if self.version == 4:
+                return self.daemon.lease4_get_all_lite(subnets=subnet_ids)
+            return self.daemon.lease6_get_all_lite(subnets=subnet_ids)
+        except KeaLeaseNotFoundException:
+            return []
@@ -0,0 +1,211 @@
+import mmap
+import os
+import time
+from operator import itemgetter
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+from pykeadhcp.models.dhcp4.lease import Lease4
+from pykeadhcp.models.dhcp6.lease import Lease6
+from pykeadhcp.models.records import Lease4Record, Lease6Record
+
+# Kea escapes commas in hostnames and user contexts
+ESCAPED_COMMA = "&#x2c"
+
+LEASE6_TYPES = {"0": "IA_NA", "1": "IA_TA", "2": "IA_PD"}
+
+# Lease state 2 is expired-reclaimed
+STATE_EXPIRED_RECLAIMED = 2
+
+# Columns used to build a lease, Kea adds new columns over time so the header of every
+# file is used to find them
+LEASE_COLUMNS = (
+    "address",
+    "hwaddr",
+    "valid_lifetime",
+    "expire",
+    "subnet_id",
+    "fqdn_fwd",
+    "fqdn_rev",
+    "hostname",
+    "state",
+)
+LEASE4_COLUMNS = LEASE_COLUMNS + ("client_id",)
+LEASE6_COLUMNS = LEASE_COLUMNS + ("duid", "iaid", "prefix_len", "lease_type")
+
+# Address (and lease type for Dhcp6) -> values of LEASE4_COLUMNS/LEASE6_COLUMNS of the latest entry
+Rows = Dict[Union[str, Tuple[str, str]], Tuple[str, ...]]
+
+
+def get_memfile_paths(path: str) -> List[Path]:
+    """Returns every file that makes up a memfile lease file in the order Kea loads them.
+    The lease file cleanup (LFC) leaves the previous lease file as <path>.1 and the cleaned
+    up leases as <path>.2 (or <path>.completed while it is running)
+
+    Args:
+        path:       Path of the lease file (eg. /var/lib/kea/kea-leases4.csv)
+    """
+    path = Path(path)
+    completed = path.with_name(f"{path.name}.completed")
+    if completed.exists():
+        previous = [completed]
+    else:
+        previous = [
+            path.with_name(f"{path.name}.{suffix}")
+            for suffix in (2, 1)
+            if path.with_name(f"{path.name}.{suffix}").exists()
+        ]
+    return previous + [path]
+
+
+def read_memfile_leases(
+    paths: Union[str, List[str]],
+    version: int = 4,
+    include_expired: bool = False,
+    now: float = None,
+    records: bool = False,
+    executor: Executor = None,
+    chunk_size: int = 64 * 1024 * 1024,
+) -> Iterator[Union[Lease4, Lease6, Lease4Record, Lease6Record]]:
+    """Reads Kea memfile lease files (eg. kea-leases4.csv) directly from disk and yields the
+    current leases. The files are memory-mapped and parsed in chunks of chunk_size bytes.
+
+    Kea only appends to the lease files, so only the latest entry per address (and lease type
+    for Dhcp6) is kept. Deleted leases (valid lifetime 0) are dropped and so are expired and
+    expired-reclaimed leases unless include_expired is set.
+
+    Pass an executor (eg. ProcessPoolExecutor) to parse the chunks of multi-GB files in parallel.
+
+    for lease in read_memfile_leases(get_memfile_paths("/var/lib/kea/kea-leases4.csv")):
+        print(lease.ip_address, lease.hw_address)
+
+    Args:
+        paths:              Lease file or list of lease files in the order they were written (see get_memfile_paths)
+        version:            4 or 6
+        include_expired:    Also yield leases which have expired
+        now:                Time to compare the lease expiry with, defaults to the current time
+        records:            Yield Lease4Record/Lease6Record objects instead of validated models
+        executor:           Optional executor used to parse the chunks in parallel
+        chunk_size:         Size of every chunk in bytes
+    """
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+
+    now = time.time() if now is None else now
+    rows: Rows = {}
+    for path in paths:
+        header, chunks = _split_file(path, chunk_size)
+        if not header:
+            continue
+
+        # Every file is decoded with its own header, Kea may have added columns between them
+        arguments = [(str(path), start, end, header, version) for start, end in chunks]
+        if executor:
+            results = executor.map(_parse_chunk, *zip(*arguments))
+        else:
+            results = (_parse_chunk(*argument) for argument in arguments)
+
+        # Chunks are merged in file order so later entries replace earlier ones
+        for result in results:
+            rows.update(result)
+
+    record_class = Lease4Record if version == 4 else Lease6Record
+    for values in rows.values():
+        valid_lifetime = int(values[2] or 0)
+        if not valid_lifetime:
+            continue
+
+        expire = int(values[3] or 0)
+        state = int(values[8] or 0)
+        if not include_expired and (expire < now or state == STATE_EXPIRED_RECLAIMED):
+            continue
+
+        lease = {
+            "ip-address": values[0],
+            "hw-address": values[1] or None,
+            "valid-lft": valid_lifetime,
+            "cltt": expire - valid_lifetime,
+            "subnet-id": int(values[4]),
+            "fqdn-fwd": values[5] == "1",
+            "fqdn-rev": values[6] == "1",
+            "hostname": values[7].replace(ESCAPED_COMMA, ","),
+            "state": state,
+        }
+        if version == 4:
+            lease["client-id"] = values[9] or None
+        else:
+            lease["duid"] = values[9]
+            lease["iaid"] = int(values[10])
+            lease["prefix-len"] = int(values[11])
+            lease["type"] = LEASE6_TYPES.get(values[12])
+
+        if records:
+            yield record_class.from_dict(lease)
+        elif version == 4:
+            yield Lease4.parse_obj(lease)
+        else:
+            yield Lease6.parse_obj(lease)
+
+
+def _split_file(
+    path: str, chunk_size: int
+) -> Tuple[Tuple[str, ...], List[Tuple[int, int]]]:
+    size = os.path.getsize(path)
+    if not size:
+        return (), []
+
+    with open(path, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        header_end = data.find(b"\n")
+        if header_end == -1:
+            return (), []
+
+        header = tuple(data[:header_end].decode().strip().split(","))
+        chunks = []
+        start = header_end + 1
+        while start < size:
+            end = min(start + chunk_size, size)
+            if end < size:
+                newline = data.find(b"\n", end)
+                end = size if newline == -1 else newline + 1
+            chunks.append((start, end))
+            start = end
+
+    return header, chunks
+
+
+def _parse_chunk(
+    path: str, start: int, end: int, columns: Tuple[str, ...], version: int
+) -> Rows:
+    rows: Rows = {}
+    count = len(columns)
+    address = columns.index("address")
+    lease_type = columns.index("lease_type") if version == 6 else None
+
+    # Columns missing from older files point at the empty value appended to every row
+    index = {column: position for position, column in enumerate(columns)}
+    names = LEASE4_COLUMNS if version == 4 else LEASE6_COLUMNS
+    get_columns = itemgetter(*[index.get(name, count) for name in names])
+
+    with open(path, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        lines = data[start:end].decode().split("\n")
+
+    # The last line is either empty or incomplete (eg. while Kea is writing)
+    lines.pop()
+    for line in lines:
+        row = tuple(line.rstrip("\r").split(","))
+        # Headers are repeated by Kea when a file is reopened
+        if len(row) != count or row[address] == "address":
+            continue
+
+        values = get_columns(row + ("",))
+        if lease_type is None:
+            rows[row[address]] = values
+        else:
+            rows[(row[address], row[lease_type])] = values
+
+    return rows
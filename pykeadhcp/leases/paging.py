@@ -0,0 +1,72 @@
+from typing import Iterator, Union
+
+from pykeadhcp.daemons import Dhcp4, Dhcp6
+from pykeadhcp.models.records import (
+    Lease4Record,
+    Lease6Record,
+    Reservation4Record,
+    Reservation6Record,
+)
+
+
+def iter_leases(
+    daemon: Union[Dhcp4, Dhcp6], page_size: int = 1000
+) -> Iterator[Union[Lease4Record, Lease6Record]]:
+    """Yields every lease of a daemon as Lease4Record/Lease6Record objects, fetching the next
+    page with lease4-get-page/lease6-get-page only once the previous page was consumed
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+        page_size:      Number of leases to request per page
+    """
+    if isinstance(daemon, Dhcp4):
+        get_page = daemon.lease4_get_page_lite
+    else:
+        get_page = daemon.lease6_get_page_lite
+
+    search_from = "start"
+    while True:
+        page = get_page(limit=page_size, search_from=search_from)
+        yield from page
+        if len(page) < page_size:
+            return
+        search_from = page[-1].ip_address
+
+
+def iter_reservations(
+    daemon: Union[Dhcp4, Dhcp6], subnet_id: int = None, page_size: int = 1000
+) -> Iterator[Union[Reservation4Record, Reservation6Record]]:
+    """Yields every host reservation of a daemon (from the configuration file and any host
+    database) as Reservation4Record/Reservation6Record objects using reservation-get-page
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+        subnet_id:      Only yield the reservations of a specific subnet
+        page_size:      Number of reservations to request per page
+    """
+    record_class = (
+        Reservation4Record if isinstance(daemon, Dhcp4) else Reservation6Record
+    )
+    source_index = from_host_id = 0
+    while True:
+        data = daemon._reservation_get_page(
+            subnet_id=subnet_id,
+            limit=page_size,
+            source_index=source_index,
+            from_host_id=from_host_id,
+        )
+        arguments = data.arguments or {}
+        hosts = arguments.get("hosts") or []
+        next_page = arguments.get("next")
+        for host in hosts:
+            # Kea leaves out the subnet-id when the page is filtered by subnet
+            if subnet_id is not None:
+                host.setdefault("subnet-id", subnet_id)
+            yield record_class.from_dict(host)
+
+        # Kea returns an empty page once every host source has been read
+        if not hosts or not next_page:
+            return
+
+        source_index = next_page["source-index"]
+        from_host_id = next_page["from"]
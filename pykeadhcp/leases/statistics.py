@@ -0,0 +1,42 @@
+import re
+from typing import Dict, Union
+
+from pykeadhcp.daemons import Dhcp4, Dhcp6
+
+# Subnet level statistics (eg. subnet[1].assigned-addresses), pool level statistics
+# (eg. subnet[1].pool[0].assigned-addresses) are ignored
+SUBNET_STATISTIC = re.compile(r"^subnet\[(\d+)\]\.([a-z-]+)$")
+
+
+def get_subnet_statistics(daemon: Union[Dhcp4, Dhcp6]) -> Dict[int, Dict[str, int]]:
+    """Returns the latest value of every subnet statistic (eg. assigned-addresses) by subnet ID
+    using a single statistic-get-all request
+
+    Args:
+        daemon:     Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+    """
+    data = daemon.statistic_get_all()
+    statistics: Dict[int, Dict[str, int]] = {}
+    for name, samples in (data.arguments or {}).items():
+        match = SUBNET_STATISTIC.match(name)
+        if not match or not samples:
+            continue
+
+        # Samples are [value, timestamp] pairs with the latest sample first
+        statistics.setdefault(int(match.group(1)), {})[match.group(2)] = samples[0][0]
+
+    return statistics
+
+
+def get_lease_counts(daemon: Union[Dhcp4, Dhcp6]) -> Dict[int, int]:
+    """Returns the number of assigned leases (addresses and prefixes) by subnet ID
+
+    Args:
+        daemon:     Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+    """
+    return {
+        subnet_id: statistics.get("assigned-addresses", 0)
+        + statistics.get("assigned-nas", 0)
+        + statistics.get("assigned-pds", 0)
+        for subnet_id, statistics in get_subnet_statistics(daemon).items()
+    }
@@ -3,7 +3,7 @@ from pykeadhcp.models.generic.lease import Lease, LeasePage
 
 
 class Lease4(Lease):
-    pass
+    client_id: Optional[str]
 
 
 class Lease4Page(LeasePage):
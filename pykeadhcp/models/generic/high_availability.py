@@ -25,3 +25,10 @@ class HAServers(KeaBaseModel):
 class HighAvailability(KeaBaseModel):
     ha_mode: HAModeTypeEnum
     ha_servers: HAServers
+
+
+class HAHeartbeat(KeaBaseModel):
+    state: HAStateTypeEnum
+    date_time: Optional[str]
+    scopes: List[str] = []
+    unsent_update_count: Optional[int]
@@ -0,0 +1,108 @@
+from operator import itemgetter
+from typing import Any, ClassVar, Dict, Tuple, Type
+
+from pydantic import BaseModel
+
+from pykeadhcp.models.dhcp4.lease import Lease4
+from pykeadhcp.models.dhcp4.reservation import Reservation4
+from pykeadhcp.models.dhcp6.lease import Lease6
+from pykeadhcp.models.dhcp6.reservation import Reservation6
+from pykeadhcp.models.serializer import convert_value
+
+
+class Record(tuple):
+    """Lightweight read-only copy of a model stored as a tuple of its values (like a
+    namedtuple, with empty __slots__ so there is no __dict__, __fields_set__ or validation),
+    which makes them suitable for holding millions of leases or reservations in memory. Values
+    can be read as attributes and records can be converted to and from the full model with
+    to_model/from_model.
+
+    Values are not validated, use to_model() to validate a record.
+    """
+
+    __slots__ = ()
+    model: ClassVar[Type[BaseModel]]
+    _fields: ClassVar[Tuple[str, ...]]
+    _aliases: ClassVar[Tuple[str, ...]]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._aliases = tuple(cls.model.__fields__[name].alias for name in cls._fields)
+        for position, name in enumerate(cls._fields):
+            setattr(cls, name, property(itemgetter(position)))
+
+    def __new__(cls, *args, **kwargs):
+        if len(args) > len(cls._fields):
+            raise TypeError(f"{cls.__name__} got too many values")
+
+        values = list(args)
+        values += [kwargs.pop(name, None) for name in cls._fields[len(args) :]]
+        if kwargs:
+            raise TypeError(f"{cls.__name__} got unexpected fields {', '.join(kwargs)}")
+        return tuple.__new__(cls, values)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        """Returns a record from a dictionary returned by the API (eg. a lease from lease4-get-all),
+        keys which are not part of the model are ignored
+
+        Args:
+            data:       Dictionary using the API keys (eg. ip-address)
+        """
+        return tuple.__new__(cls, map(data.get, cls._aliases))
+
+    @classmethod
+    def from_model(cls, model: BaseModel) -> "Record":
+        """Returns a record from a full model
+
+        Args:
+            model:      Model (eg. Lease4)
+        """
+        return tuple.__new__(cls, map(model.__dict__.get, cls._fields))
+
+    def to_model(self) -> BaseModel:
+        """Returns the validated full model of the record"""
+        return self.model.parse_obj(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the record as a dictionary using the API keys, None values are left out"""
+        return {
+            alias: convert_value(value)
+            for alias, value in zip(self._aliases, self)
+            if value is not None
+        }
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{name}={value!r}"
+            for name, value in zip(self._fields, self)
+            if value is not None
+        )
+        return f"{type(self).__name__}({values})"
+
+
+class Lease4Record(Record):
+    __slots__ = ()
+    _fields = tuple(Lease4.__fields__)
+    model = Lease4
+
+
+class Lease6Record(Record):
+    __slots__ = ()
+    _fields = tuple(Lease6.__fields__)
+    model = Lease6
+
+
+class Reservation4Record(Record):
+    __slots__ = ()
+    _fields = tuple(Reservation4.__fields__)
+    model = Reservation4
+
+
+class Reservation6Record(Record):
+    __slots__ = ()
+    _fields = tuple(Reservation6.__fields__)
+    model = Reservation6
@@ -1,3 +1,6 @@
 from pykeadhcp.parsers.ctrlagent import CtrlAgentParser
 from pykeadhcp.parsers.dhcp4 import Dhcp4Parser
 from pykeadhcp.parsers.dhcp6 import Dhcp6Parser
+from pykeadhcp.parsers.allocator import Allocator
+from pykeadhcp.parsers.cache import ParserCache
+from pykeadhcp.parsers.lazy import LazyDhcp4Config, LazyDhcp6Config
@@ -0,0 +1,537 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from ipaddress import IPv4Address, IPv4Network, IPv6Address, IPv6Network
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pykeadhcp.models.dhcp6.pd_pool import PDPool
+from pykeadhcp.models.generic.option_data import OptionData
+from pykeadhcp.models.generic.pool import Pool
+from pykeadhcp.models.generic.shared_network import SharedNetwork
+from pykeadhcp.models.generic.subnet import Subnet
+from pykeadhcp.models.generic.reservation import Reservation
+from pykeadhcp.parsers.generic import ParserChange
+from pykeadhcp.parsers.dhcp4 import Dhcp4Parser
+from pykeadhcp.parsers.dhcp6 import Dhcp6Parser
+from pykeadhcp.parsers import exceptions
+
+
+class IntervalSet:
+    """Sorted set of closed integer intervals. Overlapping or adjacent intervals are merged
+    when added so looking up a value or the next free block only needs a binary search.
+
+    Args:
+        intervals:  Iterable of (start, end) tuples
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        for start, end in sorted(intervals):
+            if self.ends and start <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def add(self, start: int, end: int) -> None:
+        """Adds an interval, merging it with any overlapping or adjacent intervals
+
+        Args:
+            start:  First value of the interval
+            end:    Last value of the interval
+        """
+        first = bisect_left(self.ends, start - 1)
+        last = bisect_right(self.starts, end + 1)
+        if first < last:
+            start = min(start, self.starts[first])
+            end = max(end, self.ends[last - 1])
+
+        self.starts[first:last] = [start]
+        self.ends[first:last] = [end]
+
+    def remove(self, start: int, end: int) -> None:
+        """Removes every value between start and end (inclusive), splitting the intervals
+        which are only partly removed
+
+        Args:
+            start:  First value to remove
+            end:    Last value to remove
+        """
+        first = bisect_left(self.ends, start)
+        last = bisect_right(self.starts, end)
+        if first >= last:
+            return
+
+        starts, ends = [], []
+        if self.starts[first] < start:
+            starts.append(self.starts[first])
+            ends.append(start - 1)
+        if self.ends[last - 1] > end:
+            starts.append(end + 1)
+            ends.append(self.ends[last - 1])
+
+        self.starts[first:last] = starts
+        self.ends[first:last] = ends
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """Returns True if any value between start and end (inclusive) is in the set
+
+        Args:
+            start:  First value
+            end:    Last value
+        """
+        index = bisect_right(self.starts, end) - 1
+        return index >= 0 and self.ends[index] >= start
+
+    def __contains__(self, value: int) -> bool:
+        return self.overlaps(value, value)
+
+    def next_free(
+        self, low: int, high: int, size: int = 1, align: int = 1
+    ) -> Optional[int]:
+        """Returns the first value between low and high where a block of size values
+        (starting on a multiple of align) doesn't overlap the set. Every step is a binary
+        search and skips a used interval entirely.
+
+        Args:
+            low:    Lowest value to consider
+            high:   Highest value to consider
+            size:   Number of consecutive free values required
+            align:  Start of the block must be a multiple of align
+        """
+        candidate = -(-low // align) * align
+        while candidate + size - 1 <= high:
+            index = bisect_right(self.starts, candidate + size - 1) - 1
+            if index < 0 or self.ends[index] < candidate:
+                return candidate
+
+            candidate = -(-(self.ends[index] + 1) // align) * align
+
+        return None
+
+
+class IntervalIndex(IntervalSet):
+    """IntervalSet which counts the intervals it was built from (eg. the pools and reservations
+    of a subnet) so a single interval can be discarded without rebuilding the set. Intervals
+    are expected to be either single values, CIDR aligned blocks (which are nested or disjoint)
+    or a few unaligned ranges (eg. pools given as start - end).
+
+    Args:
+        intervals:  Iterable of (start, end) tuples
+        bits:       Number of bits of the values (eg. 32 for IPv4 addresses)
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = (), bits: int = 32):
+        intervals = list(intervals)
+        super().__init__(intervals)
+        self.bits = bits
+        self.counts: Counter = Counter(intervals)
+        self.intervals: List[Tuple[int, int]] = sorted(self.counts)
+        self.unaligned = {
+            interval for interval in self.counts if not self._is_aligned(*interval)
+        }
+
+    def add(self, start: int, end: int) -> None:
+        """Counts an interval and adds it to the set
+
+        Args:
+            start:  First value of the interval
+            end:    Last value of the interval
+        """
+        interval = (start, end)
+        self.counts[interval] += 1
+        if self.counts[interval] == 1:
+            insort(self.intervals, interval)
+            if not self._is_aligned(start, end):
+                self.unaligned.add(interval)
+        super().add(start, end)
+
+    def discard(self, start: int, end: int) -> None:
+        """Uncounts an interval added before, its values are removed from the set once no
+        other interval uses them
+
+        Args:
+            start:  First value of the interval
+            end:    Last value of the interval
+        """
+        interval = (start, end)
+        if self.counts[interval] > 1:
+            self.counts[interval] -= 1
+            return
+        if not self.counts.pop(interval, 0):
+            return
+
+        del self.intervals[bisect_left(self.intervals, interval)]
+        self.unaligned.discard(interval)
+        self.remove(start, end)
+
+        # Intervals overlapping the removed one either start inside it, are aligned blocks
+        # containing its start or are one of the few unaligned ranges
+        first = bisect_left(self.intervals, (start, start))
+        last = bisect_right(self.intervals, (end, float("inf")))
+        overlapping = set(self.intervals[first:last])
+        overlapping.update(self._aligned_containing(start))
+        overlapping.update(
+            other for other in self.unaligned if other[0] <= end and other[1] >= start
+        )
+        for other in overlapping:
+            super().add(*other)
+
+    def _aligned_containing(self, value: int) -> Iterator[Tuple[int, int]]:
+        for bits in range(self.bits + 1):
+            start = value >> bits << bits
+            interval = (start, start + (1 << bits) - 1)
+            if interval in self.counts:
+                yield interval
+
+    @staticmethod
+    def _is_aligned(start: int, end: int) -> bool:
+        size = end - start + 1
+        return size & (size - 1) == 0 and start % size == 0
+
+
+class Allocator:
+    """Finds free subnet IDs, subnets, addresses and delegated prefixes in a parsed Dhcp4
+    or Dhcp6 configuration. The used values are indexed as sorted interval sets when the
+    allocator is created so every lookup is a binary search instead of a scan of every
+    subnet, pool and reservation.
+
+    The indexes follow the add_*/remove_* methods of the parser: the allocator keeps a parser
+    snapshot and applies the journal changes made since to the indexes, so a lookup after a
+    change only costs the changed subnets, pools and reservations. The indexes are rebuilt if
+    the snapshot can no longer be used (eg. after parser.restore to an older snapshot or
+    clear_journal). Call refresh() if parser.config is changed directly.
+
+    parser = Dhcp4Parser(config=server.dhcp4.cached_config)
+    allocator = Allocator(parser)
+    subnet = allocator.allocate_subnet(supernet="10.0.0.0/16", prefix_len=24)
+
+    Args:
+        parser:     Dhcp4Parser or Dhcp6Parser
+    """
+
+    def __init__(self, parser: Union[Dhcp4Parser, Dhcp6Parser]):
+        self.parser = parser
+        self.version = 4 if isinstance(parser, Dhcp4Parser) else 6
+        self.address_class = IPv4Address if self.version == 4 else IPv6Address
+        self.network_class = IPv4Network if self.version == 4 else IPv6Network
+        self.bits = 32 if self.version == 4 else 128
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Rebuilds the indexes from the parser configuration"""
+        self.subnet_ids = IntervalIndex()
+        self.networks = IntervalIndex(bits=self.bits)
+        self.subnets: Dict[int, Subnet] = {}
+        self.addresses: Dict[int, IntervalIndex] = {}
+        self.prefixes: Dict[int, IntervalIndex] = {}
+        self._subnet_refs: Counter = Counter()
+        self._networks_of: Dict[int, Counter] = {}
+        self._owners: Dict[int, int] = {}
+        self._indexed_lists = set()
+
+        self.snapshot = self.parser.snapshot()
+        for subnet in self._iter_subnets():
+            self._index_subnet(subnet)
+
+        self.revision = self.parser.revision
+
+    def next_subnet_id(self, start: int = 1) -> int:
+        """Returns the lowest unused subnet ID
+
+        Args:
+            start:  Lowest subnet ID to consider
+        """
+        self._sync()
+        return self.subnet_ids.next_free(start, 2**32 - 1)
+
+    def next_free_subnet(self, supernet: str, prefix_len: int) -> Optional[str]:
+        """Returns the first subnet of the given prefix length inside the supernet that
+        doesn't overlap any configured subnet, PD pool or reserved prefix
+
+        Args:
+            supernet:       CIDR to allocate from (eg. 10.0.0.0/16)
+            prefix_len:     Prefix length of the subnet to allocate (eg. 24)
+        """
+        self._sync()
+        network = self.network_class(supernet, strict=False)
+        size = 2 ** (network.max_prefixlen - prefix_len)
+        start = self.networks.next_free(
+            int(network.network_address),
+            int(network.broadcast_address),
+            size=size,
+            align=size,
+        )
+        if start is None:
+            return None
+
+        return str(self.network_class((start, prefix_len)))
+
+    def next_free_address(self, id: int) -> Optional[str]:
+        """Returns the first address in a subnet which is not part of a pool, reserved or
+        used as a router (option 3). For Dhcp4, the network and broadcast addresses are
+        never returned
+
+        Args:
+            id:     Subnet ID
+        """
+        self._sync()
+        subnet = self._get_subnet(id)
+        network = self.network_class(subnet.subnet, strict=False)
+        low = int(network.network_address)
+        high = int(network.broadcast_address)
+        if self.version == 4 and network.prefixlen < 31:
+            high -= 1
+        if self.version == 6 or network.prefixlen < 31:
+            low += 1
+
+        address = self.addresses[id].next_free(low, high)
+        return str(self.address_class(address)) if address is not None else None
+
+    def next_free_delegated_prefix(self, id: int) -> Optional[str]:
+        """Returns the first prefix (of the delegated length) inside the PD pools of a
+        subnet which is not reserved
+
+        Args:
+            id:     Subnet ID
+        """
+        self._sync()
+        subnet = self._get_subnet(id)
+        for pd_pool in subnet.pd_pools:
+            network = self.network_class(
+                (pd_pool.prefix, pd_pool.prefix_len), strict=False
+            )
+            size = 2 ** (network.max_prefixlen - pd_pool.delegated_len)
+            start = self.prefixes[id].next_free(
+                int(network.network_address),
+                int(network.broadcast_address),
+                size=size,
+                align=size,
+            )
+            if start is not None:
+                return str(self.network_class((start, pd_pool.delegated_len)))
+
+    def allocate_subnet(self, supernet: str, prefix_len: int, **kwargs) -> Subnet:
+        """Adds a subnet to the parser using the next free subnet ID and the next free
+        subnet inside the supernet
+
+        Args:
+            supernet:       CIDR to allocate from (eg. 10.0.0.0/16)
+            prefix_len:     Prefix length of the subnet to allocate (eg. 24)
+            kwargs:         Passed to parser.add_subnet
+        """
+        cidr = self.next_free_subnet(supernet, prefix_len)
+        if not cidr:
+            raise exceptions.ParserNoFreeSpaceError(supernet, f"/{prefix_len}")
+
+        subnet = self.parser.add_subnet(id=self.next_subnet_id(), subnet=cidr, **kwargs)
+        self._sync()
+        return subnet
+
+    def allocate_reservation(self, id: int, **kwargs) -> Reservation:
+        """Adds a reservation to a subnet using the next free address
+
+        Args:
+            id:         Subnet ID
+            kwargs:     Passed to parser.add_reservation_to_subnet (eg. hw_address)
+        """
+        address = self.next_free_address(id)
+        if not address:
+            raise exceptions.ParserNoFreeSpaceError(self.subnets[id].subnet, "address")
+
+        reservation = self.parser.add_reservation_to_subnet(
+            id=id, ip_address=address, **kwargs
+        )
+        self._sync()
+        return reservation
+
+    def _sync(self) -> None:
+        if self.revision == self.parser.revision:
+            return
+
+        try:
+            changes = self.parser.diff(self.snapshot)
+        except exceptions.ParserSnapshotError:
+            # Changes already indexed were undone
+            self.refresh()
+            return
+
+        self.snapshot = self.parser.snapshot()
+        self._indexed_lists = set()
+        for change in changes:
+            self._apply(change)
+        self.revision = self.parser.revision
+
+    def _apply(self, change: ParserChange) -> None:
+        # Subnets are indexed as they are now, which already includes the later changes
+        # made to their lists, so changes to a list indexed during this sync are skipped
+        if id(change.items) in self._indexed_lists:
+            return
+
+        index = change.action == "add"
+        item = change.item
+        if isinstance(item, (SharedNetwork, Subnet)):
+            subnets = [item]
+            if isinstance(item, SharedNetwork):
+                subnets = getattr(item, f"subnet{self.version}") or []
+            for subnet in subnets:
+                if index:
+                    self._index_subnet(subnet)
+                else:
+                    self._unindex_subnet(subnet)
+            if index and isinstance(item, SharedNetwork):
+                self._indexed_lists.add(id(subnets))
+            return
+
+        # Pools, reservations and options only matter when they belong to a subnet
+        subnet_id = self._owners.get(id(change.items))
+        if subnet_id is None:
+            return
+
+        addresses = []
+        prefixes = []
+        networks = []
+        if isinstance(item, Reservation):
+            addresses = self._reservation_addresses(item)
+            prefixes = self._reservation_prefixes(item)
+            networks = prefixes
+        elif isinstance(item, Pool):
+            addresses = [self._pool_range(item.pool)]
+        elif isinstance(item, OptionData):
+            addresses = self._router_addresses(item)
+        elif isinstance(item, PDPool):
+            networks = [self._pd_pool_range(item)]
+
+        for interval in addresses:
+            if index:
+                self.addresses[subnet_id].add(*interval)
+            else:
+                self.addresses[subnet_id].discard(*interval)
+        for interval in prefixes:
+            if index:
+                self.prefixes[subnet_id].add(*interval)
+            else:
+                self.prefixes[subnet_id].discard(*interval)
+
+        contributed = self._networks_of[subnet_id]
+        for interval in networks:
+            if index:
+                contributed[interval] += 1
+                self.networks.add(*interval)
+            elif contributed[interval] > 0:
+                contributed[interval] -= 1
+                self.networks.discard(*interval)
+
+    def _get_subnet(self, id: int) -> Subnet:
+        subnet = self.subnets.get(id)
+        if not subnet:
+            raise exceptions.ParserSubnetNotFoundError(id)
+        return subnet
+
+    def _iter_subnets(self) -> Iterable[Subnet]:
+        subnets_field = f"subnet{self.version}"
+        yield from getattr(self.parser.config, subnets_field)
+        for shared_network in self.parser.config.shared_networks:
+            yield from getattr(shared_network, subnets_field)
+
+    def _index_subnet(self, subnet: Subnet) -> None:
+        # A subnet is listed twice while it is moved (eg. remove_shared_network with
+        # keep_subnets), it is only indexed once
+        self._subnet_refs[subnet.id] += 1
+        if self._subnet_refs[subnet.id] > 1:
+            return
+
+        used = [self._pool_range(pool.pool) for pool in subnet.pools or []]
+        delegated = []
+        for reservation in subnet.reservations or []:
+            used.extend(self._reservation_addresses(reservation))
+            delegated.extend(self._reservation_prefixes(reservation))
+        for option_data in subnet.option_data or []:
+            used.extend(self._router_addresses(option_data))
+
+        self.subnets[subnet.id] = subnet
+        self.subnet_ids.add(subnet.id, subnet.id)
+        self.addresses[subnet.id] = IntervalIndex(used, bits=self.bits)
+        self.prefixes[subnet.id] = IntervalIndex(delegated, bits=self.bits)
+
+        # What the subnet added to the shared indexes is kept so removing it later undoes
+        # exactly that, even if the subnet was changed in the meantime
+        self._networks_of[subnet.id] = Counter(self._subnet_networks(subnet))
+        for interval in self._networks_of[subnet.id].elements():
+            self.networks.add(*interval)
+        for items in self._subnet_lists(subnet):
+            self._owners[id(items)] = subnet.id
+            self._indexed_lists.add(id(items))
+
+    def _unindex_subnet(self, subnet: Subnet) -> None:
+        self._subnet_refs[subnet.id] -= 1
+        if self._subnet_refs[subnet.id] > 0:
+            return
+
+        del self._subnet_refs[subnet.id]
+        self.subnet_ids.discard(subnet.id, subnet.id)
+        for interval in self._networks_of.pop(subnet.id).elements():
+            self.networks.discard(*interval)
+        self.subnets.pop(subnet.id, None)
+        self.addresses.pop(subnet.id, None)
+        self.prefixes.pop(subnet.id, None)
+        for items in self._subnet_lists(subnet):
+            self._owners.pop(id(items), None)
+            self._indexed_lists.discard(id(items))
+
+    def _subnet_networks(self, subnet: Subnet) -> List[Tuple[int, int]]:
+        networks = [self._network_range(subnet.subnet)]
+        for pd_pool in getattr(subnet, "pd_pools", None) or []:
+            networks.append(self._pd_pool_range(pd_pool))
+        for reservation in subnet.reservations or []:
+            networks.extend(self._reservation_prefixes(reservation))
+        return networks
+
+    def _subnet_lists(self, subnet: Subnet) -> List[list]:
+        lists = [subnet.pools, subnet.reservations, subnet.option_data]
+        lists.append(getattr(subnet, "pd_pools", None))
+        return [items for items in lists if items is not None]
+
+    def _reservation_addresses(self, reservation: Reservation) -> List[Tuple[int, int]]:
+        if self.version == 4:
+            addresses = [reservation.ip_address] if reservation.ip_address else []
+        else:
+            # Prefix only reservations have no addresses
+            addresses = reservation.ip_addresses or []
+        return [(int(self.address_class(address)),) * 2 for address in addresses]
+
+    def _reservation_prefixes(self, reservation: Reservation) -> List[Tuple[int, int]]:
+        return [
+            self._network_range(prefix)
+            for prefix in getattr(reservation, "prefixes", None) or []
+        ]
+
+    def _router_addresses(self, option_data: OptionData) -> List[Tuple[int, int]]:
+        if self.version != 4 or option_data.code != 3 or not option_data.data:
+            return []
+        return [
+            (int(self.address_class(address.strip())),) * 2
+            for address in option_data.data.split(",")
+        ]
+
+    def _pd_pool_range(self, pd_pool: PDPool) -> Tuple[int, int]:
+        return self._network_range(f"{pd_pool.prefix}/{pd_pool.prefix_len}")
+
+    def _network_range(self, cidr: str) -> Tuple[int, int]:
+        network = self.network_class(cidr, strict=False)
+        return int(network.network_address), int(network.broadcast_address)
+
+    def _pool_range(self, pool: str) -> Tuple[int, int]:
+        if "-" in pool:
+            start, end = pool.split("-")
+            return int(self.address_class(start.strip())), int(
+                self.address_class(end.strip())
+            )
+
+        return self._network_range(pool.strip())
@@ -0,0 +1,137 @@
+import gc
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from importlib import metadata
+from pathlib import Path
+from typing import Type, TypeVar
+
+import pydantic
+
+from pykeadhcp.parsers.generic import GenericParser
+
+P = TypeVar("P", bound=GenericParser)
+
+
+def get_cache_version() -> str:
+    """Returns the pykeadhcp and pydantic versions the cached models depend on, pickles
+    written by other versions can be missing fields or refer to renamed classes"""
+    try:
+        version = metadata.version("pykeadhcp")
+    except metadata.PackageNotFoundError:
+        version = "dev"
+    return f"{version}-pydantic{pydantic.VERSION}"
+
+
+def get_config_hash(config: dict) -> str:
+    """Returns the hash of a configuration returned by config-get. Kea (2.4+) includes
+    the SHA-256 of the configuration as the hash key, otherwise the SHA-256 of the
+    canonical JSON of the configuration is calculated
+
+    Args:
+        config:     Configuration (eg. server.dhcp4.cached_config)
+    """
+    if config.get("hash"):
+        return config["hash"]
+
+    document = {key: value for key, value in config.items() if key != "hash"}
+    data = json.dumps(document, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest().upper()
+
+
+class ParserCache:
+    """On-disk cache of parsed configurations keyed by the hash of the raw configuration and
+    the pykeadhcp and pydantic versions.
+    Loading a cached parser unpickles the already validated models, which is a lot faster
+    than validating every subnet and reservation again with parse_obj. Only the entry of
+    the latest configuration is kept per parser, so a configuration with a new hash (eg. after
+    refresh_cached_config) is parsed once and replaces the previous entry.
+
+    The cache uses pickle, only point it at a directory that is not writable by untrusted users.
+
+    cache = ParserCache("/var/cache/pykeadhcp")
+    parser = cache.load(Dhcp4Parser, server.dhcp4.cached_config)
+
+    Args:
+        directory:  Directory to store the cached parsers in
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get_path(self, parser_class: Type[P], config_hash: str) -> Path:
+        """Returns the path of a cache entry
+
+        Args:
+            parser_class:   Parser class (eg. Dhcp4Parser)
+            config_hash:    Hash of the raw configuration
+        """
+        return (
+            self.directory
+            / f"{parser_class.__name__}-{get_cache_version()}-{config_hash}.pickle"
+        )
+
+    def load(self, parser_class: Type[P], config: dict) -> P:
+        """Returns a parser for the configuration, loaded from the cache if the configuration
+        has been parsed before or parsed and stored in the cache otherwise
+
+        Args:
+            parser_class:   Parser class (eg. Dhcp4Parser)
+            config:         Configuration (eg. server.dhcp4.cached_config)
+        """
+        config_hash = get_config_hash(config)
+        path = self.get_path(parser_class, config_hash)
+        try:
+            with path.open("rb") as cached:
+                return parser_class.from_model(self._unpickle(cached))
+        except Exception:
+            # Corrupt entries and pickles of incompatible versions (eg. AttributeError or
+            # ImportError for a renamed model) are parsed again and replaced
+            pass
+
+        parser = parser_class(config=config)
+        self.store(parser, config_hash)
+        return parser
+
+    def store(self, parser: GenericParser, config_hash: str) -> Path:
+        """Stores the parsed configuration of a parser and removes the entries of any
+        other configuration for the same parser
+
+        Args:
+            parser:         Parser (eg. Dhcp4Parser)
+            config_hash:    Hash of the raw configuration
+        """
+        path = self.get_path(type(parser), config_hash)
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as cached:
+                pickle.dump(parser.config, cached, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        for stale in self.directory.glob(f"{type(parser).__name__}-*.pickle"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+        return path
+
+    def clear(self) -> None:
+        """Removes every cached parser"""
+        for cached in self.directory.glob("*.pickle"):
+            cached.unlink(missing_ok=True)
+
+    def _unpickle(self, cached):
+        # Unpickling creates a huge number of objects in one go, the garbage collector
+        # would otherwise run many times while loading and dominate the load time
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return pickle.load(cached)
+        finally:
+            if enabled:
+                gc.enable()
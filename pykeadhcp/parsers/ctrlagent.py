@@ -10,4 +10,6 @@ class CtrlAgentParser(GenericParser):
     """
 
     def __init__(self, config: dict):
-        self.config = CtrlAgentDaemonConfig.parse_obj(config["Control-agent"])
+        super().__init__(
+            config=CtrlAgentDaemonConfig.parse_obj(config["Control-agent"])
+        )
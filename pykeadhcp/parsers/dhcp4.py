@@ -1,4 +1,4 @@
-from pykeadhcp.parsers.generic import GenericParser
+from pykeadhcp.parsers.generic import GenericParser, modifies_config
 from pykeadhcp.models.dhcp4.config import Dhcp4DaemonConfig
 from pykeadhcp.models.dhcp4.shared_network import SharedNetwork4
 from pykeadhcp.models.dhcp4.subnet import Subnet4
@@ -9,6 +9,7 @@ from pykeadhcp.models.enums import HostReservationIdentifierEnum
 from pykeadhcp.parsers import exceptions
 
 from ipaddress import IPv4Address, IPv4Network
+from typing import Callable, Iterable
 
 
 class Dhcp4Parser(GenericParser):
@@ -19,7 +20,7 @@ class Dhcp4Parser(GenericParser):
     """
 
     def __init__(self, config: dict):
-        self.config = Dhcp4DaemonConfig.parse_obj(config["Dhcp4"])
+        super().__init__(config=Dhcp4DaemonConfig.parse_obj(config["Dhcp4"]))
 
     def get_shared_network(self, name: str) -> SharedNetwork4:
         """Returns a specific Dhcp4 shared-network
@@ -63,6 +64,7 @@ class Dhcp4Parser(GenericParser):
                 if subnet.subnet == cidr:
                     return subnet
 
+    @modifies_config
     def add_shared_network(self, name: str, **kwargs) -> SharedNetwork4:
         """Attempts to add a shared network if it doesn't already
         exist
@@ -73,9 +75,10 @@ class Dhcp4Parser(GenericParser):
         if self.get_shared_network(name):
             raise exceptions.ParserSharedNetworkAlreadyExistError(name)
         network = SharedNetwork4(name=name, **kwargs)
-        self.config.shared_networks.append(network)
+        self._append(self.config.shared_networks, network)
         return network
 
+    @modifies_config
     def add_subnet(self, id: int, subnet: str, **kwargs) -> Subnet4:
         """Attempts to add a Subnet if it doesn't already exist
 
@@ -90,9 +93,10 @@ class Dhcp4Parser(GenericParser):
             raise exceptions.ParserSubnetCIDRAlreadyExistError(subnet)
 
         subnet = Subnet4(id=id, subnet=subnet, **kwargs)
-        self.config.subnet4.append(subnet)
+        self._append(self.config.subnet4, subnet)
         return subnet
 
+    @modifies_config
     def add_subnet_to_shared_network(self, id: int, name: str) -> Subnet4:
         """Attempts to assosicate an existing subnet to a shared-network and returns
         the shared-network
@@ -113,10 +117,11 @@ class Dhcp4Parser(GenericParser):
             if existing_subnet.id != subnet.id:
                 continue
 
-            subnet_to_assosicate = self.config.subnet4.pop(index)
-            existing_network.subnet4.append(subnet_to_assosicate)
+            subnet_to_assosicate = self._pop(self.config.subnet4, index)
+            self._append(existing_network.subnet4, subnet_to_assosicate)
             return subnet_to_assosicate
 
+    @modifies_config
     def add_reservation_to_subnet(
         self, id: int, ip_address: str, **kwargs
     ) -> Reservation4:
@@ -134,9 +139,78 @@ class Dhcp4Parser(GenericParser):
             raise exceptions.ParserSubnetNotFoundError(id)
 
         reservation = Reservation4(ip_address=ip_address, **kwargs)
-        existing_subnet.reservations.append(reservation)
+        self._append(existing_subnet.reservations, reservation)
         return reservation
 
+    @modifies_config
+    def add_reservations(
+        self,
+        reservations: Iterable[Reservation4],
+        subnet_id: int = None,
+        on_error: Callable[[Reservation4, exceptions.GenericParserError], None] = None,
+    ) -> int:
+        """Adds many reservations at once and returns the number of reservations added. Unlike
+        add_reservation_to_subnet the existing IP addresses, identifiers and subnets are only
+        looked up once. Every reservation is copied and added to subnet_id or the subnet in its
+        own subnet_id (which is cleared on the copy as it isn't valid inside a subnet). Nothing is
+        added if any reservation fails, unless on_error is provided in which case the failing
+        reservations are passed to on_error and skipped
+
+        Args:
+            reservations:   Reservation4 models
+            subnet_id:      Subnet ID to add every reservation to
+            on_error:       Called with the reservation and the error of every failing reservation
+        """
+        subnets = {}
+        for subnet in self.config.subnet4:
+            subnets.setdefault(subnet.id, subnet)
+
+        for network in self.config.shared_networks:
+            for subnet in network.subnet4:
+                subnets.setdefault(subnet.id, subnet)
+
+        addresses = set()
+        identifiers = set()
+        for subnet in subnets.values():
+            for reservation in subnet.reservations:
+                addresses.add(reservation.ip_address)
+                identifiers.update(self._get_identifiers(subnet.id, reservation))
+
+        added = 0
+        for reservation in reservations:
+            target = subnet_id if subnet_id is not None else reservation.subnet_id
+            try:
+                existing_subnet = subnets.get(target)
+                if not existing_subnet:
+                    raise exceptions.ParserSubnetNotFoundError(target)
+
+                if reservation.ip_address in addresses:
+                    raise exceptions.ParserReservationAlreadyExistError(
+                        reservation.ip_address
+                    )
+
+                reservation_identifiers = self._get_identifiers(target, reservation)
+                for identifier in reservation_identifiers:
+                    if identifier in identifiers:
+                        raise exceptions.ParserReservationIdentifierAlreadyExistError(
+                            identifier[1], identifier[2], target
+                        )
+            except exceptions.GenericParserError as error:
+                if on_error is None:
+                    raise
+                on_error(reservation, error)
+                continue
+
+            addresses.add(reservation.ip_address)
+            identifiers.update(reservation_identifiers)
+            reservation = reservation.copy()
+            reservation.subnet_id = None
+            self._append(existing_subnet.reservations, reservation)
+            added += 1
+
+        return added
+
+    @modifies_config
     def add_dhcp_option_to_subnet(
         self, id: int, code: int, data: str, **kwargs
     ) -> Subnet4:
@@ -158,9 +232,10 @@ class Dhcp4Parser(GenericParser):
                 )
 
         option_data = OptionData(code=code, data=data, **kwargs)
-        existing_subnet.option_data.append(option_data)
+        self._append(existing_subnet.option_data, option_data)
         return existing_subnet
 
+    @modifies_config
     def add_dhcp_option_to_shared_network(
         self, name: str, code: int, data: str, **kwargs
     ) -> SharedNetwork4:
@@ -182,9 +257,10 @@ class Dhcp4Parser(GenericParser):
                 )
 
         option_data = OptionData(code=code, data=data, **kwargs)
-        existing_shared_network.option_data.append(option_data)
+        self._append(existing_shared_network.option_data, option_data)
         return existing_shared_network
 
+    @modifies_config
     def add_pool_to_subnet(self, id: int, start: str, end: str, **kwargs) -> Subnet4:
         """Attempts to add a pool to an existing subnet
 
@@ -216,7 +292,7 @@ class Dhcp4Parser(GenericParser):
                 raise exceptions.ParserSubnetPoolAlreadyExistError(id, pool_str)
 
         pool = Pool(pool=pool_str, **kwargs)
-        existing_subnet.pools.append(pool)
+        self._append(existing_subnet.pools, pool)
         return existing_subnet
 
     def get_shared_network_by_subnet(self, subnet: str) -> SharedNetwork4:
@@ -383,6 +459,7 @@ class Dhcp4Parser(GenericParser):
         """
         return self.get_reservation_by(HostReservationIdentifierEnum.flex_id, flex_id)
 
+    @modifies_config
     def remove_reservation(self, id: int, ip_address: str) -> Reservation4:
         """Attempts to remove a reservation from a given subnet and returns
         the reservation
@@ -397,9 +474,10 @@ class Dhcp4Parser(GenericParser):
 
         for index, existing_reservation in enumerate(existing_subnet.reservations):
             if existing_reservation.ip_address == ip_address:
-                reservation = existing_subnet.reservations.pop(index)
+                reservation = self._pop(existing_subnet.reservations, index)
                 return reservation
 
+    @modifies_config
     def remove_subnet_pool(self, id: int, pool: str) -> Pool:
         """Attempts to remove a pool from a given subnet and returns
         the reservation
@@ -414,9 +492,10 @@ class Dhcp4Parser(GenericParser):
 
         for index, existing_pool in enumerate(existing_subnet.pools):
             if existing_pool.pool == pool:
-                pool = existing_subnet.pools.pop(index)
+                pool = self._pop(existing_subnet.pools, index)
                 return pool
 
+    @modifies_config
     def remove_subnet_from_shared_network(self, id: int, name: str) -> Subnet4:
         """Attempts to remove a subnet from a given shared network and
         returns the subnet
@@ -431,9 +510,10 @@ class Dhcp4Parser(GenericParser):
 
         for index, existing_subnet in enumerate(existing_shared_network.subnet4):
             if existing_subnet.id == id:
-                subnet = existing_shared_network.subnet4.pop(index)
+                subnet = self._pop(existing_shared_network.subnet4, index)
                 return subnet
 
+    @modifies_config
     def remove_subnet(self, id: int) -> Subnet4:
         """Attempts to remove a subnet from the global subnets and returns
         the subnet
@@ -443,9 +523,10 @@ class Dhcp4Parser(GenericParser):
         """
         for index, existing_subnet in enumerate(self.config.subnet4):
             if existing_subnet.id == id:
-                subnet = self.config.subnet4.pop(index)
+                subnet = self._pop(self.config.subnet4, index)
                 return subnet
 
+    @modifies_config
     def remove_shared_network(
         self, name: str, keep_subnets: bool = False
     ) -> SharedNetwork4:
@@ -461,7 +542,7 @@ class Dhcp4Parser(GenericParser):
             if existing_shared_network.name == name:
                 if keep_subnets:
                     for subnet in existing_shared_network.subnet4:
-                        self.config.subnet4.append(subnet)
+                        self._append(self.config.subnet4, subnet)
 
-                shared_network = self.config.shared_networks.pop(index)
+                shared_network = self._pop(self.config.shared_networks, index)
                 return shared_network
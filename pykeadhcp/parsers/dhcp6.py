@@ -1,4 +1,4 @@
-from pykeadhcp.parsers.generic import GenericParser
+from pykeadhcp.parsers.generic import GenericParser, modifies_config
 from pykeadhcp.models.dhcp6.config import Dhcp6DaemonConfig
 from pykeadhcp.models.dhcp6.shared_network import SharedNetwork6
 from pykeadhcp.models.dhcp6.subnet import Subnet6
@@ -10,6 +10,7 @@ from pykeadhcp.models.enums import HostReservationIdentifierEnum
 from pykeadhcp.parsers import exceptions
 
 from ipaddress import IPv6Address, IPv6Network
+from typing import Callable, Iterable
 
 
 class Dhcp6Parser(GenericParser):
@@ -20,7 +21,7 @@ class Dhcp6Parser(GenericParser):
     """
 
     def __init__(self, config: dict):
-        self.config = Dhcp6DaemonConfig.parse_obj(config["Dhcp6"])
+        super().__init__(config=Dhcp6DaemonConfig.parse_obj(config["Dhcp6"]))
 
     def get_shared_network(self, name: str) -> SharedNetwork6:
         """Returns a specific Dhcp6 shared-network
@@ -64,6 +65,7 @@ class Dhcp6Parser(GenericParser):
                 if subnet.subnet == cidr:
                     return subnet
 
+    @modifies_config
     def add_shared_network(self, name: str, **kwargs) -> SharedNetwork6:
         """Attempts to add a shared network if it doesn't already
         exist
@@ -74,9 +76,10 @@ class Dhcp6Parser(GenericParser):
         if self.get_shared_network(name):
             raise exceptions.ParserSharedNetworkAlreadyExistError(name)
         network = SharedNetwork6(name=name, **kwargs)
-        self.config.shared_networks.append(network)
+        self._append(self.config.shared_networks, network)
         return network
 
+    @modifies_config
     def add_subnet(self, id: int, subnet: str, **kwargs) -> Subnet6:
         """Attempts to add a Subnet if it doesn't already exist
 
@@ -91,9 +94,10 @@ class Dhcp6Parser(GenericParser):
             raise exceptions.ParserSubnetCIDRAlreadyExistError(subnet)
 
         subnet = Subnet6(id=id, subnet=subnet, **kwargs)
-        self.config.subnet6.append(subnet)
+        self._append(self.config.subnet6, subnet)
         return subnet
 
+    @modifies_config
     def add_subnet_to_shared_network(self, id: int, name: str) -> Subnet6:
         """Attempts to assosicate an existing subnet to a shared-network and returns
         the shared-network
@@ -114,10 +118,11 @@ class Dhcp6Parser(GenericParser):
             if existing_subnet.id != subnet.id:
                 continue
 
-            subnet_to_assosicate = self.config.subnet6.pop(index)
-            existing_network.subnet6.append(subnet_to_assosicate)
+            subnet_to_assosicate = self._pop(self.config.subnet6, index)
+            self._append(existing_network.subnet6, subnet_to_assosicate)
             return subnet_to_assosicate
 
+    @modifies_config
     def add_reservation_to_subnet(
         self, id: int, ip_address: str, **kwargs
     ) -> Reservation6:
@@ -135,9 +140,94 @@ class Dhcp6Parser(GenericParser):
             raise exceptions.ParserSubnetNotFoundError(id)
 
         reservation = Reservation6(ip_addresses=[ip_address], **kwargs)
-        existing_subnet.reservations.append(reservation)
+        self._append(existing_subnet.reservations, reservation)
         return reservation
 
+    @modifies_config
+    def add_reservations(
+        self,
+        reservations: Iterable[Reservation6],
+        subnet_id: int = None,
+        on_error: Callable[[Reservation6, exceptions.GenericParserError], None] = None,
+    ) -> int:
+        """Adds many reservations at once and returns the number of reservations added. Unlike
+        add_reservation_to_subnet the existing IP addresses, prefixes, identifiers and subnets are
+        only looked up once. Reserved prefixes which overlap a PD pool of the subnet must be one
+        of its delegated prefixes. Every reservation is added to subnet_id or the subnet in its own
+        subnet_id (which is then cleared as it isn't valid inside a subnet). Nothing is added if
+        any reservation fails, unless on_error is provided in which case the failing reservations
+        are passed to on_error and skipped
+
+        Args:
+            reservations:   Reservation6 models
+            subnet_id:      Subnet ID to add every reservation to
+            on_error:       Called with the reservation and the error of every failing reservation
+        """
+        subnets = {}
+        for subnet in self.config.subnet6:
+            subnets.setdefault(subnet.id, subnet)
+
+        for network in self.config.shared_networks:
+            for subnet in network.subnet6:
+                subnets.setdefault(subnet.id, subnet)
+
+        addresses = set()
+        prefixes = set()
+        identifiers = set()
+        for subnet in subnets.values():
+            for reservation in subnet.reservations:
+                addresses.update(reservation.ip_addresses or [])
+                prefixes.update(
+                    IPv6Network(prefix, strict=False)
+                    for prefix in reservation.prefixes or []
+                )
+                identifiers.update(self._get_identifiers(subnet.id, reservation))
+
+        added = 0
+        for reservation in reservations:
+            target = subnet_id if subnet_id is not None else reservation.subnet_id
+            try:
+                existing_subnet = subnets.get(target)
+                if not existing_subnet:
+                    raise exceptions.ParserSubnetNotFoundError(target)
+
+                for ip in reservation.ip_addresses or []:
+                    if ip in addresses:
+                        raise exceptions.ParserReservationAlreadyExistError(ip)
+
+                reservation_prefixes = [
+                    IPv6Network(prefix, strict=False)
+                    for prefix in reservation.prefixes or []
+                ]
+                for prefix in reservation_prefixes:
+                    if prefix in prefixes:
+                        raise exceptions.ParserReservationPrefixAlreadyExistError(
+                            str(prefix)
+                        )
+
+                reservation_identifiers = self._get_identifiers(target, reservation)
+                for identifier in reservation_identifiers:
+                    if identifier in identifiers:
+                        raise exceptions.ParserReservationIdentifierAlreadyExistError(
+                            identifier[1], identifier[2], target
+                        )
+            except exceptions.GenericParserError as error:
+                if on_error is None:
+                    raise
+                on_error(reservation, error)
+                continue
+
+            addresses.update(reservation.ip_addresses or [])
+            prefixes.update(reservation_prefixes)
+            identifiers.update(reservation_identifiers)
+            reservation = reservation.copy()
+            reservation.subnet_id = None
+            self._append(existing_subnet.reservations, reservation)
+            added += 1
+
+        return added
+
+    @modifies_config
     def add_dhcp_option_to_subnet(
         self, id: int, code: int, data: str, **kwargs
     ) -> Subnet6:
@@ -159,9 +249,10 @@ class Dhcp6Parser(GenericParser):
                 )
 
         option_data = OptionData(code=code, data=data, **kwargs)
-        existing_subnet.option_data.append(option_data)
+        self._append(existing_subnet.option_data, option_data)
         return existing_subnet
 
+    @modifies_config
     def add_dhcp_option_to_shared_network(
         self, name: str, code: int, data: str, **kwargs
     ) -> SharedNetwork6:
@@ -183,9 +274,10 @@ class Dhcp6Parser(GenericParser):
                 )
 
         option_data = OptionData(code=code, data=data, **kwargs)
-        existing_shared_network.option_data.append(option_data)
+        self._append(existing_shared_network.option_data, option_data)
         return existing_shared_network
 
+    @modifies_config
     def add_pool_to_subnet(self, id: int, start: str, end: str, **kwargs) -> Subnet6:
         """Attempts to add a pool to an existing subnet
 
@@ -217,7 +309,7 @@ class Dhcp6Parser(GenericParser):
                 raise exceptions.ParserSubnetPoolAlreadyExistError(id, pool_str)
 
         pool = Pool(pool=pool_str, **kwargs)
-        existing_subnet.pools.append(pool)
+        self._append(existing_subnet.pools, pool)
         return existing_subnet
 
     def get_shared_network_by_subnet(self, subnet: str) -> SharedNetwork6:
@@ -377,6 +469,7 @@ class Dhcp6Parser(GenericParser):
         """
         return self.get_reservation_by(HostReservationIdentifierEnum.duid, duid)
 
+    @modifies_config
     def remove_reservation(self, id: int, ip_address: str) -> Reservation6:
         """Attempts to remove a reservation from a given subnet and returns
         the reservation
@@ -392,9 +485,10 @@ class Dhcp6Parser(GenericParser):
         for index, existing_reservation in enumerate(existing_subnet.reservations):
             for ip in existing_reservation.ip_addresses:
                 if ip == ip_address:
-                    reservation = existing_subnet.reservations.pop(index)
+                    reservation = self._pop(existing_subnet.reservations, index)
                     return reservation
 
+    @modifies_config
     def remove_subnet_pool(self, id: int, pool: str) -> Pool:
         """Attempts to remove a pool from a given subnet and returns
         the reservation
@@ -409,9 +503,10 @@ class Dhcp6Parser(GenericParser):
 
         for index, existing_pool in enumerate(existing_subnet.pools):
             if existing_pool.pool == pool:
-                pool = existing_subnet.pools.pop(index)
+                pool = self._pop(existing_subnet.pools, index)
                 return pool
 
+    @modifies_config
     def remove_subnet_from_shared_network(self, id: int, name: str) -> Subnet6:
         """Attempts to remove a subnet from a given shared network and
         returns the subnet
@@ -426,9 +521,10 @@ class Dhcp6Parser(GenericParser):
 
         for index, existing_subnet in enumerate(existing_shared_network.subnet6):
             if existing_subnet.id == id:
-                subnet = existing_shared_network.subnet6.pop(index)
+                subnet = self._pop(existing_shared_network.subnet6, index)
                 return subnet
 
+    @modifies_config
     def remove_subnet(self, id: int) -> Subnet6:
         """Attempts to remove a subnet from the global subnets and returns
         the subnet
@@ -438,9 +534,10 @@ class Dhcp6Parser(GenericParser):
         """
         for index, existing_subnet in enumerate(self.config.subnet6):
             if existing_subnet.id == id:
-                subnet = self.config.subnet6.pop(index)
+                subnet = self._pop(self.config.subnet6, index)
                 return subnet
 
+    @modifies_config
     def remove_shared_network(
         self, name: str, keep_subnets: bool = False
     ) -> SharedNetwork6:
@@ -456,9 +553,9 @@ class Dhcp6Parser(GenericParser):
             if existing_shared_network.name == name:
                 if keep_subnets:
                     for subnet in existing_shared_network.subnet6:
-                        self.config.subnet6.append(subnet)
+                        self._append(self.config.subnet6, subnet)
 
-                shared_network = self.config.shared_networks.pop(index)
+                shared_network = self._pop(self.config.shared_networks, index)
                 return shared_network
 
     def get_subnet_from_pd_pool(self, prefix: str, prefix_len: int) -> Subnet6:
@@ -476,6 +573,7 @@ class Dhcp6Parser(GenericParser):
                     if pd_pool.prefix == prefix and pd_pool.prefix_len == prefix_len:
                         return subnet
 
+    @modifies_config
     def add_pd_pool(
         self, id: int, prefix: str, prefix_len: int, delegated_len: int, **kwargs
     ) -> PDPool:
@@ -500,9 +598,10 @@ class Dhcp6Parser(GenericParser):
         pool = PDPool(
             prefix=prefix, prefix_len=prefix_len, delegated_len=delegated_len, **kwargs
         )
-        existing_subnet.pd_pools.append(pool)
+        self._append(existing_subnet.pd_pools, pool)
         return pool
 
+    @modifies_config
     def remove_pd_pool(self, id: int, prefix: str, prefix_len: int) -> PDPool:
         """Attempts to remove a PD Pool from a given subnet
 
@@ -520,5 +619,5 @@ class Dhcp6Parser(GenericParser):
                 existing_pd_pool.prefix == prefix
                 and existing_pd_pool.prefix_len == prefix_len
             ):
-                pd_pool = existing_subnet_from_pd_pool.pd_pools.pop(index)
+                pd_pool = self._pop(existing_subnet_from_pd_pool.pd_pools, index)
                 return pd_pool
@@ -42,6 +42,18 @@ class ParserReservationAlreadyExistError(GenericParserError):
         super().__init__(self.message)
 
 
+class ParserReservationIdentifierAlreadyExistError(GenericParserError):
+    def __init__(self, identifier_type: str, identifier: str, id: int):
+        self.message = f"Reservation with {identifier_type} {identifier} already exist in subnet {id}"
+        super().__init__(self.message)
+
+
+class ParserReservationPrefixAlreadyExistError(GenericParserError):
+    def __init__(self, prefix: str):
+        self.message = f"Reservation with prefix {prefix} already exist"
+        super().__init__(self.message)
+
+
 class ParserReservationNotFoundError(GenericParserError):
     def __init__(self, ip_address: str):
         self.message = f"Reservation with IP Address {ip_address} not found"
@@ -94,3 +106,15 @@ class ParserPDPoolNotFoundError(GenericParserError):
     def __init__(self, id: int, prefix: str, prefix_len: int):
         self.message = f"Unable to find PD Prefix {prefix}/{prefix_len} in subnet {id}"
         super().__init__(self.message)
+
+
+class ParserNoFreeSpaceError(GenericParserError):
+    def __init__(self, within: str, size: str):
+        self.message = f"No free {size} available within {within}"
+        super().__init__(self.message)
+
+
+class ParserSnapshotError(GenericParserError):
+    def __init__(self, sequence: int):
+        self.message = f"Snapshot at change {sequence} no longer matches the parser journal, it was taken before a restore or clear_journal"
+        super().__init__(self.message)
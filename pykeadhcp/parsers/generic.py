@@ -1,4 +1,78 @@
-from typing import List
+import weakref
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from pykeadhcp.parsers import exceptions
+
+# Reservation identifier fields, Kea rejects two reservations of a subnet with the same identifier
+IDENTIFIER_FIELDS = ("hw_address", "duid", "circuit_id", "client_id", "flex_id")
+
+# Separators allowed in hex identifiers (eg. aa-bb-cc-dd-ee-ff or aabb.ccdd.eeff)
+IDENTIFIER_SEPARATORS = str.maketrans("", "", ":-. ")
+
+
+class ParserChange(NamedTuple):
+    """Single list operation made by a parser method, used to undo the change"""
+
+    sequence: int
+    method: str
+    action: str  # add or remove
+    items: list
+    index: int
+    item: Any
+
+    def __repr__(self) -> str:
+        # The list itself is left out as it can contain the whole configuration
+        return f"ParserChange(sequence={self.sequence}, method={self.method!r}, action={self.action!r}, index={self.index}, item={self.item!r})"
+
+
+class ParserSnapshot:
+    """Position in the parser journal, restoring it undoes every change made after it. The
+    parser only records changes while a snapshot is referenced, so drop snapshots (and leave
+    transactions) once they are no longer needed
+
+    Args:
+        sequence:   Sequence number of the last change before the snapshot
+    """
+
+    __slots__ = ("sequence", "__weakref__")
+
+    def __init__(self, sequence: int):
+        self.sequence = sequence
+
+    def __repr__(self) -> str:
+        return f"ParserSnapshot(sequence={self.sequence})"
+
+
+def modifies_config(func):
+    """Marks a parser method that changes the configuration. Every change made by the
+    method is recorded in the parser journal, the changes are undone if the method raises
+    an exception and the parser revision is incremented once the method returns, allowing
+    anything built from the parsed configuration (eg. the Allocator indexes) to detect it
+    is out of date"""
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self._method:
+            return func(self, *args, **kwargs)
+
+        snapshot = self.snapshot()
+        self._method = func.__name__
+        try:
+            result = func(self, *args, **kwargs)
+        except Exception:
+            self._method = None
+            self.restore(snapshot)
+            raise
+
+        self._method = None
+        self.revision += 1
+        del snapshot
+        self._trim()
+        return result
+
+    return wrapper
 
 
 class GenericParser:
@@ -11,7 +85,173 @@ class GenericParser:
 
     The recommended option is to use the functions within the Daemon class (eg. server.dhcp4) and to
     use these parsers as a last resort as tests are not currently performed as extensively vs the API
-    functionality"""
+    functionality
+
+    While a snapshot or transaction is open, every add_*/remove_* function records the list
+    operations it makes in a journal so changes can be undone in O(changes) without copying the
+    configuration. Changes older than the oldest snapshot still referenced are dropped:
+
+    with parser.transaction():
+        parser.add_subnet(id=10, subnet="192.0.2.0/24")
+        parser.add_pool_to_subnet(id=10, start="192.0.2.10", end="192.0.2.20")  # rolls back both on error
+
+    snapshot = parser.snapshot()
+    parser.remove_subnet(id=10)
+    print(parser.diff(snapshot))
+    parser.restore(snapshot)
+    """
 
     def __init__(self, config: dict):
         self.config = config
+        self.revision = 0
+        self.journal: List[ParserChange] = []
+        self._sequence = 0
+        self._base_sequence = 0
+        self._method = None
+        self._snapshots = weakref.WeakSet()
+
+    @classmethod
+    def from_model(cls, config):
+        """Returns a parser for an already parsed configuration model without validating
+        it again (eg. Dhcp4Parser.from_model(Dhcp4DaemonConfig))
+
+        Args:
+            config:     Parsed configuration model
+        """
+        parser = cls.__new__(cls)
+        GenericParser.__init__(parser, config=config)
+        return parser
+
+    def snapshot(self) -> ParserSnapshot:
+        """Returns a snapshot of the current configuration, this only records the current
+        position in the journal so it is free to take"""
+        sequence = self.journal[-1].sequence if self.journal else self._base_sequence
+        snapshot = ParserSnapshot(sequence=sequence)
+        self._snapshots.add(snapshot)
+        return snapshot
+
+    def restore(self, snapshot: ParserSnapshot) -> List[ParserChange]:
+        """Undoes every change made after the snapshot and returns the undone changes
+
+        Args:
+            snapshot:   Snapshot returned by snapshot()
+        """
+        position = self._get_position(snapshot)
+        undone = self.journal[position:]
+        for change in reversed(undone):
+            if change.action == "add":
+                change.items.pop(change.index)
+            else:
+                change.items.insert(change.index, change.item)
+
+        del self.journal[position:]
+        if undone:
+            self.revision += 1
+        return undone
+
+    def diff(
+        self, snapshot: ParserSnapshot, other: Optional[ParserSnapshot] = None
+    ) -> List[ParserChange]:
+        """Returns the changes made between two snapshots (or since a snapshot if other is not
+        provided)
+
+        Args:
+            snapshot:   Older snapshot
+            other:      Newer snapshot, defaults to the current configuration
+        """
+        end = self._get_position(other) if other else len(self.journal)
+        return self.journal[self._get_position(snapshot) : end]
+
+    @contextmanager
+    def transaction(self):
+        """Context manager which undoes every change made inside it if an exception is raised,
+        transactions can be nested"""
+        snapshot = self.snapshot()
+        try:
+            yield snapshot
+        except Exception:
+            self.restore(snapshot)
+            raise
+        finally:
+            del snapshot
+            self._trim()
+
+    def clear_journal(self) -> None:
+        """Drops every recorded change, existing snapshots can no longer be restored"""
+        self.journal.clear()
+        self._base_sequence = self._sequence
+
+    def _get_identifiers(
+        self, subnet_id: int, reservation: Any
+    ) -> List[Tuple[int, str, str]]:
+        # (subnet id, identifier type, identifier) of every identifier of a reservation, hex
+        # identifiers are compared without separators and case insensitive
+        identifiers = []
+        for field in IDENTIFIER_FIELDS:
+            identifier = getattr(reservation, field, None)
+            if not identifier:
+                continue
+            if not identifier.startswith("'"):
+                identifier = identifier.translate(IDENTIFIER_SEPARATORS).lower()
+            identifiers.append((subnet_id, field.replace("_", "-"), identifier))
+        return identifiers
+
+    def _append(self, items: list, item: Any) -> None:
+        self._record("add", items, len(items), item)
+        items.append(item)
+
+    def _pop(self, items: list, index: int) -> Any:
+        item = items.pop(index)
+        self._record("remove", items, index, item)
+        return item
+
+    def _record(self, action: str, items: list, index: int, item: Any) -> None:
+        self._sequence += 1
+        self._trim()
+        if not self._snapshots:
+            # Nothing can be restored to a point before this change
+            self._base_sequence = self._sequence
+            return
+
+        self.journal.append(
+            ParserChange(
+                sequence=self._sequence,
+                method=self._method,
+                action=action,
+                items=items,
+                index=index,
+                item=item,
+            )
+        )
+
+    def _trim(self) -> None:
+        # Drops the changes no referenced snapshot can be restored to
+        oldest = min(
+            (snapshot.sequence for snapshot in list(self._snapshots)), default=None
+        )
+        count = 0
+        for change in self.journal:
+            if oldest is not None and change.sequence > oldest:
+                break
+            count += 1
+
+        if count:
+            self._base_sequence = self.journal[count - 1].sequence
+            del self.journal[:count]
+
+    def _get_position(self, snapshot: ParserSnapshot) -> int:
+        if snapshot.sequence == self._base_sequence:
+            return 0
+
+        # Sequence numbers only increase, restored changes leave gaps
+        low, high = 0, len(self.journal)
+        while low < high:
+            middle = (low + high) // 2
+            if self.journal[middle].sequence < snapshot.sequence:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low == len(self.journal) or self.journal[low].sequence != snapshot.sequence:
+            raise exceptions.ParserSnapshotError(snapshot.sequence)
+        return low + 1
@@ -0,0 +1,315 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.errors import MissingError
+
+from pykeadhcp.models.dhcp4.config import Dhcp4DaemonConfig
+from pykeadhcp.models.dhcp6.config import Dhcp6DaemonConfig
+from pykeadhcp.models.enums import HostReservationIdentifierEnum
+from pykeadhcp.models.generic.daemon import CommonDhcpDaemonConfig
+from pykeadhcp.parsers import exceptions
+
+# Location of a raw object: every list and dict between the root of the configuration
+# and the object itself
+Path = Tuple[Any, ...]
+
+
+class LazyConfig:
+    """Read-mostly view of a raw daemon configuration (eg. server.dhcp4.cached_config) which
+    only validates the parts that are accessed. Global parameters are validated the first time
+    they are read and shared networks, subnets and reservations are parsed into their models
+    when they are returned by one of the get_* methods. Every model is memoised, so getting the
+    same subnet twice (or a subnet of an already parsed shared network) returns the same object.
+
+    The raw configuration is never modified and stays the source of truth. dump() returns a
+    configuration which can be used with config-test/config-set, only the accessed models are
+    serialised again while everything else (including keys the models do not know about) is
+    reused as is. Values assigned to a model are part of the dump, but fields the raw configuration
+    didn't contain are only included once they are assigned (eg. subnet.reservations = [...]).
+
+    config = LazyDhcp4Config(config=server.dhcp4.cached_config)
+    print(config.interfaces_config)
+    subnet = config.get_subnet(id=10)
+    subnet.valid_lifetime = 7200
+    server.dhcp4.config_set(config=config.dump())
+
+    Args:
+        config:     Raw configuration (eg. server.dhcp4.cached_config)
+    """
+
+    model: Type[CommonDhcpDaemonConfig]
+    root: str
+    subnets_field: str
+
+    def __init__(self, config: dict):
+        self.raw = config[self.root]
+        self._fields: Dict[str, Any] = {}
+        self._models: Dict[int, Tuple[dict, BaseModel]] = {}
+        self._raws: Dict[int, Tuple[BaseModel, dict]] = {}
+        self._touched: Dict[int, Any] = {}
+        self._subnets: Optional[Dict[int, Path]] = None
+
+    def __getattr__(self, name: str) -> Any:
+        field = self.model.__fields__.get(name)
+        if not field or name.startswith("_"):
+            raise AttributeError(name)
+
+        if name not in self._fields:
+            self._fields[name] = self._get_field(name)
+        return self._fields[name]
+
+    def shared_network_names(self) -> List[str]:
+        """Returns the name of every shared network without parsing them"""
+        return [
+            network.get("name")
+            for network in self._raw_list(self.raw, "shared-networks")
+        ]
+
+    def subnet_ids(self) -> List[int]:
+        """Returns the ID of every subnet (global subnets first) without parsing them"""
+        return list(self._get_subnet_index())
+
+    def get_shared_network(self, name: str):
+        """Returns a specific shared-network
+
+        Args:
+            name:       Name of the shared-network
+        """
+        networks = self._raw_list(self.raw, "shared-networks")
+        for network in networks:
+            if network.get("name") == name:
+                return self._get_model(
+                    self._model_field("shared_networks"), (self.raw, networks, network)
+                )
+
+    def get_subnet(self, id: int):
+        """Returns a subnet based on its id from the global subnets or shared-networks
+
+        Args:
+            id:     ID of the subnet
+        """
+        path = self._get_subnet_index().get(id)
+        if path:
+            return self._get_model(self._model_field(self.subnets_field), path)
+
+    def get_subnet_by_cidr(self, cidr: str):
+        """Returns the first subnet matching the cidr using global subnets first and then
+        shared-networks last
+
+        Args:
+            cidr:       CIDR (eg. 192.0.2.0/24)
+        """
+        for path in self._iter_subnet_paths():
+            if path[-1].get("subnet") == cidr:
+                return self._get_model(self._model_field(self.subnets_field), path)
+
+    def iter_subnets(self) -> Iterator:
+        """Yields every subnet (global subnets first), parsing them one at a time"""
+        model = self._model_field(self.subnets_field)
+        for path in self._iter_subnet_paths():
+            yield self._get_model(model, path)
+
+    def get_reservation_by(
+        self,
+        identifier_type: HostReservationIdentifierEnum,
+        identifier_data: str,
+        subnet_id: int = None,
+    ):
+        """Returns the first reservation matching the identifier from the subnets (or only a
+        specific subnet) and the global reservations last. Only the matching reservation
+        is parsed
+
+        Args:
+            identifier_type:    HostReservationIdentifierEnum
+            identifier_data:    Data to match identifier type
+            subnet_id:          Only look at the reservations of a specific subnet
+        """
+        model = self._model_field("reservations")
+        field = model.__fields__.get(identifier_type.value.replace("-", "_"))
+        if not field:
+            raise exceptions.ParserInvalidHostReservationIdentifierError(
+                identifier_type.value
+            )
+
+        if subnet_id is not None:
+            path = self._get_subnet_index().get(subnet_id)
+            if not path:
+                raise exceptions.ParserSubnetNotFoundError(subnet_id)
+            paths = [path]
+        else:
+            paths = list(self._iter_subnet_paths()) + [(self.raw,)]
+
+        for path in paths:
+            reservations = self._raw_list(path[-1], "reservations")
+            for reservation in reservations:
+                value = reservation.get(field.alias)
+                if value == identifier_data or (
+                    isinstance(value, list) and identifier_data in value
+                ):
+                    return self._get_model(model, path + (reservations, reservation))
+
+    def dump(self) -> dict:
+        """Returns the configuration with every accessed model serialised again, the returned
+        configuration shares every part which wasn't accessed with the raw configuration
+        """
+        config = self._dump_raw(self.raw)
+        if config is self.raw:
+            config = dict(self.raw)
+
+        for name, value in self._fields.items():
+            field = self.model.__fields__[name]
+            alias = field.alias
+            if alias not in self.raw and value == field.get_default():
+                continue
+
+            if value is None:
+                config.pop(alias, None)
+            else:
+                config[alias] = self._dump_value(value)
+
+        return {self.root: config}
+
+    def _get_field(self, name: str) -> Any:
+        field = self.model.__fields__[name]
+        if field.alias not in self.raw:
+            if field.required:
+                raise ValidationError(
+                    [ErrorWrapper(MissingError(), loc=field.alias)], self.model
+                )
+            return field.get_default()
+
+        raw = self.raw[field.alias]
+        value, errors = field.validate(raw, {}, loc=field.alias, cls=self.model)
+        if errors:
+            raise ValidationError([errors], self.model)
+
+        if isinstance(raw, list) and isinstance(value, list):
+            for index, item in enumerate(value):
+                if isinstance(item, BaseModel) and index < len(raw):
+                    value[index] = self._register(item, raw[index], (raw,))
+        elif isinstance(value, BaseModel):
+            value = self._register(value, raw, ())
+        return value
+
+    def _get_model(self, model: Type[BaseModel], path: Path) -> BaseModel:
+        # Parsing an object also registers every object inside it, so the object may
+        # have been parsed already as part of a shared network or subnet
+        raw = path[-1]
+        existing = self._models.get(id(raw))
+        if existing:
+            return existing[1]
+
+        return self._register(model.parse_obj(raw), raw, path[:-1])
+
+    def _register(self, model: BaseModel, raw: dict, parents: Path) -> BaseModel:
+        existing = self._models.get(id(raw))
+        if existing:
+            return existing[1]
+
+        self._models[id(raw)] = (raw, model)
+        self._raws[id(model)] = (model, raw)
+        for parent in parents:
+            self._touched[id(parent)] = parent
+        self._touched[id(raw)] = raw
+
+        # Link every nested model to its raw dict, reusing models which were parsed before
+        for name, field in model.__fields__.items():
+            value = getattr(model, name)
+            raw_value = raw.get(field.alias)
+            if isinstance(value, list) and isinstance(raw_value, list):
+                if len(value) != len(raw_value):
+                    continue
+                for index, item in enumerate(value):
+                    if isinstance(item, BaseModel) and isinstance(
+                        raw_value[index], dict
+                    ):
+                        value[index] = self._register(
+                            item, raw_value[index], parents + (raw, raw_value)
+                        )
+            elif isinstance(value, BaseModel) and isinstance(raw_value, dict):
+                setattr(model, name, self._register(value, raw_value, parents + (raw,)))
+
+        return model
+
+    def _dump_raw(self, raw: Any) -> Any:
+        if id(raw) not in self._touched:
+            return raw
+
+        if isinstance(raw, dict):
+            existing = self._models.get(id(raw))
+            if existing:
+                return self._dump_model(existing[1])
+            return {key: self._dump_raw(value) for key, value in raw.items()}
+
+        return [self._dump_raw(value) for value in raw]
+
+    def _dump_model(self, model: BaseModel) -> dict:
+        data = {}
+        linked = self._raws.get(id(model))
+        if linked:
+            aliases = {field.alias for field in model.__fields__.values()}
+            data = {
+                key: value for key, value in linked[1].items() if key not in aliases
+            }
+
+        for name in model.__fields_set__:
+            value = getattr(model, name)
+            if value is not None:
+                data[model.__fields__[name].alias] = self._dump_value(value)
+        return data
+
+    def _dump_value(self, value: Any) -> Any:
+        if isinstance(value, BaseModel):
+            return self._dump_model(value)
+        if isinstance(value, list):
+            return [self._dump_value(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._dump_value(item) for key, item in value.items()}
+        return value
+
+    def _get_subnet_index(self) -> Dict[int, Path]:
+        if self._subnets is None:
+            self._subnets = {}
+            for path in self._iter_subnet_paths():
+                self._subnets.setdefault(path[-1].get("id"), path)
+        return self._subnets
+
+    def _iter_subnet_paths(self) -> Iterator[Path]:
+        subnets = self._raw_list(self.raw, self.subnets_field)
+        for subnet in subnets:
+            yield (self.raw, subnets, subnet)
+
+        networks = self._raw_list(self.raw, "shared-networks")
+        for network in networks:
+            network_subnets = self._raw_list(network, self.subnets_field)
+            for subnet in network_subnets:
+                yield (self.raw, networks, network, network_subnets, subnet)
+
+    def _raw_list(self, raw: dict, key: str) -> list:
+        return raw.get(key) or []
+
+    def _model_field(self, name: str) -> Type[BaseModel]:
+        return self.model.__fields__[name].type_
+
+
+class LazyDhcp4Config(LazyConfig):
+    """Lazy view of a Dhcp4 configuration, see LazyConfig
+
+    config = LazyDhcp4Config(config=server.dhcp4.cached_config)
+    """
+
+    model = Dhcp4DaemonConfig
+    root = "Dhcp4"
+    subnets_field = "subnet4"
+
+
+class LazyDhcp6Config(LazyConfig):
+    """Lazy view of a Dhcp6 configuration, see LazyConfig
+
+    config = LazyDhcp6Config(config=server.dhcp6.cached_config)
+    """
+
+    model = Dhcp6DaemonConfig
+    root = "Dhcp6"
+    subnets_field = "subnet6"
@@ -0,0 +1,157 @@
+import random
+import threading
+import time
+from typing import Optional, Set
+
+from pydantic import BaseModel
+
+from pykeadhcp.instrumentation import Instrumentation
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class BackoffPolicy(BaseModel):
+    """Exponential backoff with jitter
+
+    Args:
+        initial:        Delay in seconds after the first failure
+        maximum:        Upper bound for the delay in seconds
+        multiplier:     Factor applied to the delay for every consecutive failure
+        jitter:         Fraction of the delay that is randomised to avoid retrying in lockstep
+    """
+
+    initial: float = 1.0
+    maximum: float = 60.0
+    multiplier: float = 2.0
+    jitter: float = 0.1
+
+    def delay(self, failures: int) -> float:
+        """Returns the number of seconds to wait before trying again
+
+        Args:
+            failures:   Number of consecutive failures
+        """
+        if failures <= 0:
+            return 0.0
+
+        delay = min(self.maximum, self.initial * self.multiplier ** (failures - 1))
+        return delay + delay * self.jitter * random.random()
+
+
+class RetryPolicy(BaseModel):
+    """Retries and circuit breaking applied by Kea.post. Only read-only commands (see
+    is_read_only_command) are retried, commands that change the server could otherwise be
+    applied twice. Connection errors, timeouts and retry_status_codes count as failures of the
+    service (eg. dhcp4) the command was sent to, after failure_threshold consecutive failures its
+    circuit opens and commands fail straight away with KeaCircuitOpenException until
+    reset_timeout seconds have passed and a single trial command succeeds.
+
+    Args:
+        max_attempts:       Attempts per read-only command (1 disables retries)
+        backoff:            Delay between attempts
+        retry_status_codes: HTTP status codes treated as a failure of the server
+        failure_threshold:  Consecutive failures before the circuit opens (0 disables the circuit breaker)
+        reset_timeout:      Seconds before an open circuit lets a trial command through
+    """
+
+    max_attempts: int = 3
+    backoff: BackoffPolicy = BackoffPolicy(initial=0.2, maximum=5.0, jitter=0.5)
+    retry_status_codes: Set[int] = {502, 503, 504}
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+class CircuitBreaker:
+    """Tracks the consecutive failures of a single endpoint (eg. the dhcp4 service of a Kea
+    server). State changes are emitted to the instrumentation as circuit_breaker events with the
+    name, state and previous_state of the breaker.
+
+    closed:     Commands are sent
+    open:       Commands fail straight away until reset_timeout has passed
+    half-open:  A single trial command is sent, its result closes or opens the circuit again
+
+    Args:
+        name:               Name of the endpoint
+        failure_threshold:  Consecutive failures before the circuit opens
+        reset_timeout:      Seconds before an open circuit lets a trial command through
+        instrumentation:    Instrumentation to emit state changes to
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        instrumentation: Instrumentation = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.instrumentation = instrumentation or Instrumentation()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Returns True if a command can be sent, an open circuit lets a single trial command
+        through once reset_timeout has passed"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._transition(HALF_OPEN)
+
+            if self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def retry_in(self) -> float:
+        """Returns the number of seconds before an open circuit lets a trial command through"""
+        if self.state != OPEN:
+            return 0.0
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+    def record_success(self) -> None:
+        """Closes the circuit"""
+        with self._lock:
+            self.failures = 0
+            self._trial = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        """Counts a failure, opens the circuit after failure_threshold consecutive failures or
+        if the trial command failed"""
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED and self.failures >= self.failure_threshold
+            ):
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def release_trial(self) -> None:
+        """Ends a trial command without a result (eg. the request couldn't be built), so the
+        next command is let through as the trial instead"""
+        with self._lock:
+            self._trial = False
+
+    def _transition(self, state: str) -> None:
+        previous_state = self.state
+        self.state = state
+        self.instrumentation.increment(f"circuit_{state.replace('-', '_')}")
+        self.instrumentation.emit(
+            "circuit_breaker",
+            name=self.name,
+            state=state,
+            previous_state=previous_state,
+        )
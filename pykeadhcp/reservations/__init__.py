@@ -0,0 +1,21 @@
+from pykeadhcp.reservations.identity import (
+    reservation_hash,
+    reservation_identity,
+    reservation_to_dict,
+)
+from pykeadhcp.reservations.reconcile import (
+    ReservationChanges,
+    ReservationReconciler,
+    ReservationReconcileReport,
+)
+from pykeadhcp.reservations.importer import (
+    ReservationImporter,
+    ReservationImportReport,
+    read_reservation_rows,
+    validate_reservation_rows,
+)
+from pykeadhcp.reservations.cache import (
+    HostCacheWarmer,
+    HostCacheWarmReport,
+    cache_get_by_ids,
+)
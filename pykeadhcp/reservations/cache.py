@@ -0,0 +1,187 @@
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from pykeadhcp.concurrency import AdaptiveLimit, bounded_map
+from pykeadhcp.daemons import Dhcp4, Dhcp6
+from pykeadhcp.exceptions import KeaException, KeaObjectNotFoundException
+from pykeadhcp.leases.digest import Lease
+from pykeadhcp.models.dhcp4.reservation import Reservation4
+from pykeadhcp.models.dhcp6.reservation import Reservation6
+from pykeadhcp.models.enums import HostReservationIdentifierEnum
+from pykeadhcp.reservations.identity import (
+    Identity,
+    ReservationLike,
+    _normalize_identifier,
+    reservation_identity,
+    reservation_to_dict,
+)
+
+# Lease fields which identify the client of a lease and the matching reservation identifier
+LEASE4_IDENTIFIERS = (("hw_address", "hw-address"), ("client_id", "client-id"))
+LEASE6_IDENTIFIERS = (("duid", "duid"), ("hw_address", "hw-address"))
+
+
+def cache_get_by_ids(
+    daemon: Union[Dhcp4, Dhcp6],
+    identifiers: Iterable[Tuple[HostReservationIdentifierEnum, str]],
+    max_workers: int = 8,
+    limit: AdaptiveLimit = None,
+) -> Dict[
+    Tuple[str, str], Union[List[Union[Reservation4, Reservation6]], KeaException, None]
+]:
+    """Looks up many identifiers in the host cache with concurrent cache-get-by-id requests
+    and returns the cached reservations of every identifier. Identifiers which aren't in the
+    cache map to None and identifiers whose lookup failed map to the KeaException raised, so
+    one failed lookup doesn't discard the others
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+        identifiers:    (identifier type, identifier) tuples (eg. ("hw-address", "aa:bb:cc:dd:ee:ff"))
+        max_workers:    Maximum number of concurrent requests
+        limit:          Adaptive concurrency limit used instead of max_workers
+    """
+
+    def get(identifier: Tuple[str, str]):
+        try:
+            reservations = daemon.cache_get_by_id(
+                identifier_type=identifier[0], identifier=identifier[1]
+            )
+        except KeaObjectNotFoundException:
+            return identifier, None
+        except KeaException as error:
+            return identifier, error
+        return identifier, reservations or None
+
+    return dict(bounded_map(get, identifiers, max_workers=max_workers, limit=limit))
+
+
+class HostCacheWarmReport(BaseModel):
+    candidates: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    errors: List[str] = []
+    cache_size: Optional[int]
+    duration: float = 0.0
+
+
+class HostCacheWarmer:
+    """Preloads the host cache (host_cache hook) with reservations so a restarted server
+    doesn't send a host database query for every client. With recent leases the reservations
+    of the most recently active clients (by cltt) are inserted first and reservations without
+    any lease are only inserted if there is room left. No more than target_size entries are
+    put in the cache (including the entries already in it).
+
+    warmer = HostCacheWarmer(server.dhcp4, target_size=50000)
+    report = warmer.warm(iter_reservations(server.dhcp4, subnet_id=1), leases=dump_leases(server.dhcp4))
+    print(report.inserted, report.cache_size)
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+        max_workers:    Maximum number of concurrent cache-insert requests
+        target_size:    Maximum number of entries in the cache, unlimited by default
+        limit:          Adaptive concurrency limit used instead of max_workers
+    """
+
+    def __init__(
+        self,
+        daemon: Union[Dhcp4, Dhcp6],
+        max_workers: int = 8,
+        target_size: int = None,
+        limit: AdaptiveLimit = None,
+    ):
+        self.daemon = daemon
+        self.version = 4 if isinstance(daemon, Dhcp4) else 6
+        self.max_workers = max_workers
+        self.target_size = target_size
+        self.limit = limit
+
+    def get_cache_size(self) -> Optional[int]:
+        """Returns the number of entries in the host cache"""
+        data = self.daemon.cache_size()
+        return (data.arguments or {}).get("size")
+
+    def rank(
+        self, reservations: Iterable[ReservationLike], leases: Iterable[Lease]
+    ) -> List[dict]:
+        """Returns the reservations ordered by the latest cltt of the leases with the same
+        subnet and identifier, reservations without a lease come last in their original order
+
+        Args:
+            reservations:   Reservations with a subnet-id (models, records or dictionaries)
+            leases:         Recent leases (eg. from LeaseIndex or dump_leases)
+        """
+        activity: Dict[Identity, int] = {}
+        fields = LEASE4_IDENTIFIERS if self.version == 4 else LEASE6_IDENTIFIERS
+        for lease in leases:
+            for field, identifier_type in fields:
+                identifier = getattr(lease, field, None)
+                if not identifier:
+                    continue
+                key = (
+                    lease.subnet_id,
+                    identifier_type,
+                    _normalize_identifier(identifier),
+                )
+                activity[key] = max(activity.get(key, 0), lease.cltt or 0)
+
+        ranked = [
+            (activity.get(reservation_identity(data), -1), data)
+            for data in map(reservation_to_dict, reservations)
+        ]
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return [data for _, data in ranked]
+
+    def warm(
+        self,
+        reservations: Iterable[ReservationLike],
+        leases: Iterable[Lease] = None,
+    ) -> HostCacheWarmReport:
+        """Inserts the (hottest) reservations into the host cache with concurrent cache-insert
+        requests until the cache holds target_size entries
+
+        Args:
+            reservations:   Reservations with a subnet-id (models, records or dictionaries)
+            leases:         Recent leases used to insert the most active clients first
+        """
+        started_at = time.time()
+        if leases is not None:
+            candidates = self.rank(reservations, leases)
+        else:
+            candidates = [
+                reservation_to_dict(reservation) for reservation in reservations
+            ]
+
+        report = HostCacheWarmReport(candidates=len(candidates))
+        if self.target_size is not None:
+            room = max(self.target_size - (self.get_cache_size() or 0), 0)
+            report.skipped = max(len(candidates) - room, 0)
+            candidates = candidates[:room]
+
+        for identity, error in bounded_map(
+            self._insert, candidates, max_workers=self.max_workers, limit=self.limit
+        ):
+            if error:
+                report.errors.append(f"Inserting {identity}: {error}")
+            else:
+                report.inserted += 1
+
+        report.cache_size = self.get_cache_size()
+        report.duration = time.time() - started_at
+        return report
+
+    def _insert(self, reservation: dict) -> Tuple[Identity, Optional[str]]:
+        identity = reservation_identity(reservation)
+        if identity[0] is None:
+            return identity, "Reservation has no subnet-id"
+
+        host = {key: value for key, value in reservation.items() if key != "subnet-id"}
+        try:
+            response = self.daemon._cache_insert(identity[0], host)
+        except KeaException as error:
+            return identity, error.message
+
+        if response.result != 0:
+            return identity, response.text or f"result {response.result}"
+        return identity, None
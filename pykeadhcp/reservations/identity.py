@@ -0,0 +1,156 @@
+import hashlib
+import json
+import string
+from typing import Tuple, Union
+
+from pydantic import BaseModel
+
+from pykeadhcp.exceptions import KeaInvalidReservationException
+from pykeadhcp.models.dhcp4.reservation import Reservation4
+from pykeadhcp.models.dhcp6.reservation import Reservation6
+from pykeadhcp.models.records import Record
+from pykeadhcp.models.serializer import serialize_model
+from pykeadhcp.reservations.options import STANDARD_OPTION_CODES
+
+ReservationLike = Union[Reservation4, Reservation6, Record, dict]
+
+# Identifier types in the order Kea checks them
+IDENTIFIER_TYPES = ("hw-address", "duid", "circuit-id", "client-id", "flex-id")
+
+# (subnet-id, identifier type, identifier) of a reservation
+Identity = Tuple[int, str, str]
+
+# Values Kea returns for fields which were not set when the reservation was added
+DEFAULT_VALUES = {"next-server": ("0.0.0.0", "::")}
+OPTION_DEFAULT_VALUES = {
+    "always-send": (False,),
+    "never-send": (False,),
+    "csv-format": (True,),
+}
+
+# Keys only found in Dhcp6 reservations
+DHCP6_KEYS = ("ip-addresses", "prefixes", "duid")
+
+# Separators allowed in hex identifiers (eg. aa-bb-cc-dd-ee-ff or aabb.ccdd.eeff)
+IDENTIFIER_SEPARATORS = str.maketrans("", "", ":-. ")
+
+
+def reservation_to_dict(reservation: ReservationLike) -> dict:
+    """Returns a reservation model, record or dictionary as a dictionary using the API keys
+
+    Args:
+        reservation:    Reservation4/Reservation6 model, record or dictionary
+    """
+    if isinstance(reservation, Record):
+        return reservation.to_dict()
+    if isinstance(reservation, BaseModel):
+        return serialize_model(reservation)
+    return reservation
+
+
+def reservation_identity(reservation: dict, subnet_id: int = None) -> Identity:
+    """Returns the subnet ID and the first identifier of a reservation, hex identifiers are
+    written as lowercase colon separated hex (eg. AA-BB-CC-DD-EE-FF becomes aa:bb:cc:dd:ee:ff)
+    so they match regardless of their format, quoted text identifiers such as 'flex' are kept
+
+    Args:
+        reservation:    Reservation dictionary using the API keys
+        subnet_id:      Subnet ID to use if the reservation doesn't have one
+    """
+    subnet = reservation.get("subnet-id", subnet_id)
+    for identifier_type in IDENTIFIER_TYPES:
+        identifier = reservation.get(identifier_type)
+        if identifier:
+            return subnet, identifier_type, _normalize_identifier(identifier)
+
+    raise KeaInvalidReservationException(
+        f"Reservation {reservation} has none of the identifiers {', '.join(IDENTIFIER_TYPES)}"
+    )
+
+
+def normalize_reservation(reservation: dict, version: int = None) -> dict:
+    """Returns a reservation without empty values, Kea defaults and the subnet-id so a
+    reservation returned by Kea and the one that was added compare equal. Identifiers are
+    written as lowercase colon separated hex and options are keyed by their space and code
+    (standard options given by name are looked up), with Kea defaults removed and sorted
+
+    Args:
+        reservation:    Reservation dictionary using the API keys
+        version:        4 or 6, guessed from the keys of the reservation by default
+    """
+    if version is None:
+        version = 6 if any(key in reservation for key in DHCP6_KEYS) else 4
+
+    normalized = {}
+    for key, value in reservation.items():
+        if key == "subnet-id" or value in (None, "", [], {}):
+            continue
+        if value in DEFAULT_VALUES.get(key, ()):
+            continue
+        if key in IDENTIFIER_TYPES:
+            value = _normalize_identifier(value)
+        elif key == "option-data":
+            options = [_normalize_option(option, f"dhcp{version}") for option in value]
+            value = sorted(
+                options,
+                key=lambda option: (
+                    option.get("space", ""),
+                    option.get("code", -1),
+                    option.get("name", ""),
+                ),
+            )
+        normalized[key] = value
+    return normalized
+
+
+def reservation_hash(reservation: dict, version: int = None) -> str:
+    """Returns a hash of the content of a reservation, see normalize_reservation
+
+    Args:
+        reservation:    Reservation dictionary using the API keys
+        version:        4 or 6, guessed from the keys of the reservation by default
+    """
+    data = json.dumps(normalize_reservation(reservation, version), sort_keys=True)
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def _normalize_identifier(identifier: str) -> str:
+    if identifier.startswith("'"):
+        return identifier
+
+    digits = identifier.translate(IDENTIFIER_SEPARATORS).lower()
+    if not digits or len(digits) % 2 or not set(digits) <= set(string.hexdigits):
+        return identifier.lower()
+    return ":".join(digits[index : index + 2] for index in range(0, len(digits), 2))
+
+
+def _normalize_option(option: dict, default_space: str) -> dict:
+    # Kea returns the code, name, space and every flag of an option while an option is
+    # usually added with only its code or name
+    space = option.get("space") or default_space
+    code = option.get("code")
+    if code is None:
+        code = STANDARD_OPTION_CODES.get(space, {}).get(option.get("name"))
+
+    normalized = {
+        key: value
+        for key, value in option.items()
+        if key not in ("code", "name", "space", "data")
+        and value not in OPTION_DEFAULT_VALUES.get(key, ())
+    }
+    if space != default_space:
+        normalized["space"] = space
+    if code is not None:
+        normalized["code"] = code
+    elif option.get("name"):
+        normalized["name"] = option["name"]
+
+    data = option.get("data")
+    if isinstance(data, str):
+        if option.get("csv-format", True):
+            data = ",".join(value.strip() for value in data.split(","))
+        else:
+            data = data.translate(IDENTIFIER_SEPARATORS).lower()
+    if data not in (None, ""):
+        normalized["data"] = data
+    return normalized
@@ -0,0 +1,271 @@
+import csv
+import gzip
+import json
+import time
+from concurrent.futures import Executor
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from pydantic import BaseModel, ValidationError
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+
+from pykeadhcp.concurrency import AdaptiveLimit, bounded_map
+from pykeadhcp.daemons import Dhcp4, Dhcp6
+from pykeadhcp.exceptions import KeaException, KeaInvalidReservationException
+from pykeadhcp.models.dhcp4.reservation import Reservation4
+from pykeadhcp.models.dhcp6.reservation import Reservation6
+from pykeadhcp.models.serializer import serialize_model
+from pykeadhcp.parsers.dhcp4 import Dhcp4Parser
+from pykeadhcp.parsers.dhcp6 import Dhcp6Parser
+from pykeadhcp.parsers.exceptions import GenericParserError
+from pykeadhcp.reservations.identity import reservation_identity
+
+Reservation = Union[Reservation4, Reservation6]
+
+# (line number, row) read from a file, line numbers start at 1 and skip the CSV header
+Row = Tuple[int, dict]
+
+# (line number, validated reservation, error)
+ValidatedRow = Tuple[int, Optional[Reservation], Optional[str]]
+
+
+def read_reservation_rows(path: str, format: str = None) -> Iterator[Row]:
+    """Yields every row of a CSV or NDJSON file (optionally gzip compressed) one at a time,
+    CSV columns use the API keys (eg. hw-address) and nested values (eg. option-data) are JSON
+
+    Args:
+        path:       Path of the file (eg. reservations.csv or reservations.ndjson.gz)
+        format:     csv or ndjson, detected from the file extension by default
+    """
+    path = Path(path)
+    suffixes = [suffix for suffix in path.suffixes if suffix != ".gz"]
+    format = format or (suffixes[-1].lstrip(".") if suffixes else "ndjson")
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", newline="") as file:
+        if format == "csv":
+            for line, row in enumerate(csv.DictReader(file), start=2):
+                yield line, {
+                    key: _csv_value(value) for key, value in row.items() if value
+                }
+        else:
+            for line, data in enumerate(file, start=1):
+                if data.strip():
+                    yield line, json.loads(data)
+
+
+def validate_reservation_rows(rows: List[Row], version: int = 4) -> List[ValidatedRow]:
+    """Validates a batch of rows into Reservation4/Reservation6 models, this is a module level
+    function so it can run in a ProcessPoolExecutor
+
+    Args:
+        rows:       (line number, row) tuples
+        version:    4 or 6
+    """
+    model = Reservation4 if version == 4 else Reservation6
+    validated = []
+    for line, row in rows:
+        try:
+            validated.append((line, model.parse_obj(row), None))
+        except ValidationError as error:
+            message = ", ".join(
+                f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}"
+                for item in error.errors()
+            )
+            validated.append((line, None, message))
+    return validated
+
+
+class ReservationImportReport(BaseModel):
+    rows: int = 0
+    valid: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    errors: List[str] = []
+    duration: float = 0.0
+
+
+class ReservationImporter:
+    """Imports host reservations from CSV/NDJSON files (or any iterable of dictionaries)
+    without loading them into memory. Rows are validated in batches by a worker pool, checked
+    for duplicate addresses and identifiers within the same subnet in a single pass and either
+    sent to a daemon with reservation-add or added to a parser in bulk.
+
+    Every stage only holds a bounded number of rows: reading stops while validation is behind and
+    validation stops while the reservation-add requests are behind. Invalid and duplicate rows are
+    reported with their line number and skipped.
+
+    importer = ReservationImporter(version=4, max_workers=8)
+    report = importer.to_daemon(server.dhcp4, "reservations.csv")
+    print(report.imported, report.errors)
+
+    Args:
+        version:        4 or 6
+        max_workers:    Maximum number of concurrent validation batches and requests
+        batch_size:     Number of rows per validation batch
+        executor:       Executor to validate batches with (eg. ProcessPoolExecutor), defaults to threads
+        limit:          Adaptive concurrency limit for the reservation-add requests used instead of max_workers
+    """
+
+    def __init__(
+        self,
+        version: int = 4,
+        max_workers: int = 8,
+        batch_size: int = 500,
+        executor: Executor = None,
+        limit: AdaptiveLimit = None,
+    ):
+        self.version = version
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.executor = executor
+        self.limit = limit
+
+    def validate(
+        self, rows: Union[str, Path, Iterable[dict]], report: ReservationImportReport
+    ) -> Iterator[Reservation]:
+        """Yields every valid reservation which doesn't duplicate an earlier row, invalid and
+        duplicate rows are added to the report
+
+        Args:
+            rows:       Path of a CSV/NDJSON file or an iterable of dictionaries
+            report:     Report to update
+        """
+        addresses = set()
+        identities = set()
+        for batch in bounded_map(
+            partial(validate_reservation_rows, version=self.version),
+            self._batches(rows),
+            max_workers=self.max_workers,
+            executor=self.executor,
+        ):
+            for line, reservation, error in batch:
+                report.rows += 1
+                if error:
+                    report.errors.append(f"Line {line}: {error}")
+                    continue
+
+                data = serialize_model(reservation)
+                try:
+                    identity = reservation_identity(data)
+                except KeaInvalidReservationException as error:
+                    report.errors.append(f"Line {line}: {error.message}")
+                    continue
+
+                keys = [
+                    (reservation.subnet_id, address)
+                    for address in self._addresses(reservation)
+                ]
+                duplicate = identity in identities or any(
+                    key in addresses for key in keys
+                )
+                if duplicate:
+                    report.duplicates += 1
+                    report.errors.append(
+                        f"Line {line}: duplicate reservation {identity}"
+                    )
+                    continue
+
+                identities.add(identity)
+                addresses.update(keys)
+                report.valid += 1
+                yield reservation
+
+    def to_daemon(
+        self,
+        daemon: Union[Dhcp4, Dhcp6],
+        rows: Union[str, Path, Iterable[dict]],
+    ) -> ReservationImportReport:
+        """Sends every valid reservation to a daemon with reservation-add, no more than
+        max_workers requests are in flight at once. Reservations rejected by Kea or failing
+        with a connection error or timeout are reported and skipped
+
+        Args:
+            daemon:     Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+            rows:       Path of a CSV/NDJSON file or an iterable of dictionaries
+        """
+        started_at = time.time()
+        report = ReservationImportReport()
+
+        def add(reservation: Reservation) -> Tuple[Reservation, Optional[str]]:
+            try:
+                response = daemon._reservation_add(serialize_model(reservation))
+            except KeaException as error:
+                return reservation, error.message
+            except (RequestsConnectionError, Timeout) as error:
+                # Only this row failed, the limit still backs off as if the call had raised
+                if self.limit:
+                    self.limit.record_error()
+                return reservation, str(error) or type(error).__name__
+            if response.result != 0:
+                return reservation, response.text or f"result {response.result}"
+            return reservation, None
+
+        for reservation, error in bounded_map(
+            add,
+            self.validate(rows, report),
+            max_workers=self.max_workers,
+            limit=self.limit,
+        ):
+            if error:
+                addresses = ", ".join(self._addresses(reservation))
+                report.errors.append(f"Adding {addresses}: {error}")
+            else:
+                report.imported += 1
+
+        report.duration = time.time() - started_at
+        return report
+
+    def to_parser(
+        self,
+        parser: Union[Dhcp4Parser, Dhcp6Parser],
+        rows: Union[str, Path, Iterable[dict]],
+        subnet_id: int = None,
+    ) -> ReservationImportReport:
+        """Adds every valid reservation to a parser with add_reservations, reservations which
+        conflict with the configuration (eg. an unknown subnet or an existing address, prefix or
+        identifier) are reported and skipped
+
+        Args:
+            parser:     Dhcp4Parser or Dhcp6Parser
+            rows:       Path of a CSV/NDJSON file or an iterable of dictionaries
+            subnet_id:  Subnet ID to add every reservation to, defaults to the subnet-id of each row
+        """
+        started_at = time.time()
+        report = ReservationImportReport()
+
+        def on_error(reservation: Reservation, error: GenericParserError) -> None:
+            addresses = ", ".join(self._addresses(reservation))
+            report.errors.append(f"Adding {addresses}: {error.message}")
+
+        report.imported = parser.add_reservations(
+            self.validate(rows, report), subnet_id=subnet_id, on_error=on_error
+        )
+        report.duration = time.time() - started_at
+        return report
+
+    def _batches(self, rows: Union[str, Path, Iterable[dict]]) -> Iterator[List[Row]]:
+        if isinstance(rows, (str, Path)):
+            rows = read_reservation_rows(rows)
+        else:
+            rows = enumerate(rows, start=1)
+
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _addresses(self, reservation: Reservation) -> List[str]:
+        if self.version == 4:
+            return [reservation.ip_address]
+        return list(reservation.ip_addresses or []) + list(reservation.prefixes or [])
+
+
+def _csv_value(value: str):
+    if value[:1] in ("[", "{"):
+        return json.loads(value)
+    return value
@@ -0,0 +1,272 @@
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+
+from pykeadhcp.concurrency import AdaptiveLimit, bounded_map
+from pykeadhcp.daemons import Dhcp4, Dhcp6
+from pykeadhcp.exceptions import KeaException, KeaInvalidReservationException
+from pykeadhcp.leases.paging import iter_reservations
+from pykeadhcp.reservations.identity import (
+    Identity,
+    ReservationLike,
+    reservation_hash,
+    reservation_identity,
+    reservation_to_dict,
+)
+
+
+class ReservationChanges:
+    """Reservations to add, update and delete to get from the actual to the desired state
+
+    Args:
+        add:            Reservations to add
+        update:         (identity, desired, actual) of the reservations to replace (deleted and added again)
+        delete:         Identities of the reservations to delete
+        unchanged:      Number of reservations which are already up to date
+        actual:         Number of reservations in Kea
+    """
+
+    def __init__(
+        self,
+        add: List[dict],
+        update: List[Tuple[Identity, dict, dict]],
+        delete: List[Identity],
+        unchanged: int,
+        actual: int,
+    ):
+        self.add = add
+        self.update = update
+        self.delete = delete
+        self.unchanged = unchanged
+        self.actual = actual
+
+    def __len__(self) -> int:
+        return len(self.add) + len(self.update) + len(self.delete)
+
+
+class ReservationReconcileReport(BaseModel):
+    dry_run: bool = False
+    actual: int = 0
+    unchanged: int = 0
+    added: int = 0
+    updated: int = 0
+    deleted: int = 0
+    errors: List[str] = []
+    duration: float = 0.0
+
+    @property
+    def diff_size(self) -> int:
+        return self.added + self.updated + self.deleted
+
+
+class ReservationReconciler:
+    """Brings the host reservations of a set of subnets in line with a desired state (eg. an
+    IPAM) using as few commands as possible. Reservations are matched by subnet-id and their
+    identifier (hw-address, duid, circuit-id, client-id or flex-id) and compared by a hash of
+    their content, so only new, changed and removed reservations are sent to Kea.
+
+    Only subnets with desired reservations (or the subnet_ids passed to plan/reconcile) are
+    loaded and reservations of other subnets are never deleted. Kea has no reservation-update
+    command before 2.6, so changed reservations are deleted and added again. If the new
+    reservation is rejected the previous one is added back and the update is reported as failed.
+
+    reconciler = ReservationReconciler(server.dhcp4, max_workers=8)
+    report = reconciler.reconcile(desired=reservations_from_ipam, dry_run=True)
+    print(report.added, report.updated, report.deleted)
+
+    Args:
+        daemon:         Dhcp4 or Dhcp6 daemon (eg. server.dhcp4)
+        max_workers:    Maximum number of concurrent requests when applying changes
+        page_size:      Number of reservations to request per page when loading the actual state
+        limit:          Adaptive concurrency limit used instead of max_workers
+    """
+
+    def __init__(
+        self,
+        daemon: Union[Dhcp4, Dhcp6],
+        max_workers: int = 8,
+        page_size: int = 1000,
+        limit: AdaptiveLimit = None,
+    ):
+        self.daemon = daemon
+        self.version = 4 if isinstance(daemon, Dhcp4) else 6
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.limit = limit
+
+    def plan(
+        self, desired: Iterable[ReservationLike], subnet_ids: Iterable[int] = None
+    ) -> ReservationChanges:
+        """Loads the reservations of every managed subnet from Kea and returns the changes
+        needed to reach the desired state
+
+        Args:
+            desired:        Every desired reservation (models, records or dictionaries) with a subnet-id
+            subnet_ids:     Subnets to manage, defaults to the subnets of the desired reservations
+        """
+        wanted: Dict[Identity, Tuple[str, dict]] = {}
+        for reservation in desired:
+            data = reservation_to_dict(reservation)
+            identity = reservation_identity(data)
+            if identity[0] is None:
+                raise KeaInvalidReservationException(
+                    f"Reservation {data} has no subnet-id"
+                )
+            wanted[identity] = (reservation_hash(data, self.version), data)
+
+        subnets = set(subnet_ids) if subnet_ids is not None else set()
+        subnets |= {identity[0] for identity in wanted}
+
+        actual: Dict[Identity, Tuple[str, dict]] = {}
+        for subnet_id in sorted(subnets):
+            for reservation in iter_reservations(
+                self.daemon, subnet_id=subnet_id, page_size=self.page_size
+            ):
+                data = reservation.to_dict()
+                actual[reservation_identity(data, subnet_id)] = (
+                    reservation_hash(data, self.version),
+                    data,
+                )
+
+        add, update = [], []
+        unchanged = 0
+        for identity, (content_hash, data) in wanted.items():
+            current = actual.get(identity)
+            if current is None:
+                add.append(data)
+            elif current[0] != content_hash:
+                update.append((identity, data, current[1]))
+            else:
+                unchanged += 1
+
+        delete = [identity for identity in actual if identity not in wanted]
+        return ReservationChanges(
+            add=add,
+            update=update,
+            delete=delete,
+            unchanged=unchanged,
+            actual=len(actual),
+        )
+
+    def apply(
+        self, changes: ReservationChanges, dry_run: bool = False
+    ) -> ReservationReconcileReport:
+        """Sends the changes to Kea, deletes first so addresses can move between hosts
+
+        Args:
+            changes:    Changes returned by plan()
+            dry_run:    Only report the changes without sending them
+        """
+        started_at = time.time()
+        report = ReservationReconcileReport(
+            dry_run=dry_run, actual=changes.actual, unchanged=changes.unchanged
+        )
+        if dry_run:
+            report.added = len(changes.add)
+            report.updated = len(changes.update)
+            report.deleted = len(changes.delete)
+            return report
+
+        for identity, error in bounded_map(
+            self._delete, changes.delete, max_workers=self.max_workers, limit=self.limit
+        ):
+            if error:
+                report.errors.append(f"Deleting {identity}: {error}")
+            else:
+                report.deleted += 1
+
+        for identity, error in bounded_map(
+            self._update, changes.update, max_workers=self.max_workers, limit=self.limit
+        ):
+            if error:
+                report.errors.append(f"Updating {identity}: {error}")
+            else:
+                report.updated += 1
+
+        for identity, error in bounded_map(
+            self._add, changes.add, max_workers=self.max_workers, limit=self.limit
+        ):
+            if error:
+                report.errors.append(f"Adding {identity}: {error}")
+            else:
+                report.added += 1
+
+        report.duration = time.time() - started_at
+        return report
+
+    def reconcile(
+        self,
+        desired: Iterable[ReservationLike],
+        subnet_ids: Iterable[int] = None,
+        dry_run: bool = False,
+    ) -> ReservationReconcileReport:
+        """Plans and applies the changes needed to reach the desired state
+
+        Args:
+            desired:        Every desired reservation (models, records or dictionaries) with a subnet-id
+            subnet_ids:     Subnets to manage, defaults to the subnets of the desired reservations
+            dry_run:        Only report the changes without sending them
+        """
+        started_at = time.time()
+        report = self.apply(self.plan(desired, subnet_ids), dry_run=dry_run)
+        report.duration = time.time() - started_at
+        return report
+
+    def _delete(self, identity: Identity) -> Tuple[Identity, Optional[str]]:
+        subnet_id, identifier_type, identifier = identity
+        return identity, self._check(
+            lambda: self.daemon.reservation_del_by_identifier(
+                subnet_id=subnet_id,
+                identifier_type=identifier_type,
+                identifier=identifier,
+            )
+        )
+
+    def _add(self, reservation: dict) -> Tuple[Identity, Optional[str]]:
+        return reservation_identity(reservation), self._check(
+            lambda: self.daemon._reservation_add(reservation)
+        )
+
+    def _update(
+        self, change: Tuple[Identity, dict, dict]
+    ) -> Tuple[Identity, Optional[str]]:
+        identity, reservation, current = change
+        error = self._delete(identity)[1]
+        if error:
+            return identity, error
+
+        error = self._send(reservation)
+        if not error:
+            return identity, None
+
+        # The host must not stay deleted when the new reservation is rejected
+        restore_error = self._send(current)
+        if restore_error:
+            return (
+                identity,
+                f"{error}, restoring the previous reservation failed: {restore_error}",
+            )
+        return identity, f"{error}, the previous reservation was restored"
+
+    def _send(self, reservation: dict) -> Optional[str]:
+        try:
+            return self._check(lambda: self.daemon._reservation_add(reservation))
+        except Exception as error:
+            return str(error) or type(error).__name__
+
+    def _check(self, send) -> Optional[str]:
+        try:
+            response = send()
+        except KeaException as error:
+            return error.message
+        except (RequestsConnectionError, Timeout) as error:
+            # Only this identity failed, the limit still backs off as if the call had raised
+            if self.limit:
+                self.limit.record_error()
+            return str(error) or type(error).__name__
+
+        if response.result != 0:
+            return response.text or f"result {response.result}"
+        return None
@@ -0,0 +1,2 @@
+from pykeadhcp.validation.overlap import ConfigIssue, check_overlaps
+from pykeadhcp.validation.config import validate_config, validate_ctrlagent_config
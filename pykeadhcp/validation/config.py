@@ -0,0 +1,343 @@
+from collections import Counter
+from concurrent.futures import Executor
+from typing import Iterable, List, Optional, Set, Tuple, Union
+
+from pykeadhcp.models.ctrlagent.config import CtrlAgentDaemonConfig
+from pykeadhcp.models.dhcp4.config import Dhcp4DaemonConfig
+from pykeadhcp.models.dhcp6.config import Dhcp6DaemonConfig
+from pykeadhcp.models.generic.option_data import OptionData
+from pykeadhcp.models.enums import HostReservationIdentifierEnum
+from pykeadhcp.validation.overlap import ConfigIssue, check_overlaps
+
+# Option codes Kea (2.2) defines in the dhcp4 and dhcp6 option spaces
+STANDARD_OPTION_CODES = {
+    4: set(range(0, 79))
+    | {81, 82, 85, 86, 87, 88, 89, 90, 91, 92, 93, 94, 95, 97, 99, 100, 101}
+    | {112, 113, 114, 116, 117, 118, 119, 121, 124, 125, 136, 137, 138, 141}
+    | {146, 159, 212, 213, 255},
+    6: set(range(1, 75)) - {10, 19, 35, 58, 63}
+    | {79, 80, 82, 83, 88, 89, 90, 91, 92, 94, 95, 103, 112, 136, 143},
+}
+
+# Classes Kea assigns automatically and can be referenced without being defined
+BUILT_IN_CLASSES = {"ALL", "KNOWN", "UNKNOWN", "BOOTP", "DROP"}
+BUILT_IN_CLASS_PREFIXES = ("VENDOR_CLASS_", "HA_", "SPAWN_")
+
+RESERVATION_IDENTIFIERS = {
+    4: [
+        HostReservationIdentifierEnum.hw_address.value,
+        HostReservationIdentifierEnum.duid.value,
+        HostReservationIdentifierEnum.circuit_id.value,
+        HostReservationIdentifierEnum.client_id.value,
+        HostReservationIdentifierEnum.flex_id.value,
+    ],
+    6: [
+        HostReservationIdentifierEnum.hw_address.value,
+        HostReservationIdentifierEnum.duid.value,
+        HostReservationIdentifierEnum.flex_id.value,
+    ],
+}
+
+
+def validate_config(
+    config: Union[Dhcp4DaemonConfig, Dhcp6DaemonConfig, CtrlAgentDaemonConfig],
+    executor: Executor = None,
+) -> List[ConfigIssue]:
+    """Validates a daemon configuration locally and returns every issue found, catching the
+    most common reasons Kea rejects config-test/config-set without sending the configuration:
+
+    - Duplicate subnet IDs, subnet CIDRs, shared network, client class and option definition names
+    - Overlapping subnets and pools, pools outside of their subnet (see check_overlaps)
+    - Reservations without exactly one identifier allowed by host-reservation-identifiers
+    - References to client classes which are not defined
+    - Option data using a code which isn't a standard option and has no option-def
+    - Control Agent control sockets and TLS settings
+
+    Subnets in every shared network are validated independently, pass an executor
+    (eg. ProcessPoolExecutor) to validate shared networks in parallel.
+
+    Args:
+        config:     Dhcp4DaemonConfig, Dhcp6DaemonConfig or CtrlAgentDaemonConfig (eg. parser.config)
+        executor:   Optional executor used to validate every shared network in parallel
+    """
+    if isinstance(config, CtrlAgentDaemonConfig):
+        return validate_ctrlagent_config(config)
+
+    version = 4 if isinstance(config, Dhcp4DaemonConfig) else 6
+    subnets_field = f"subnet{version}"
+    client_classes = config.client_classes or []
+    option_defs = config.option_def or []
+
+    classes = {client_class.name for client_class in client_classes}
+    options = {(option_def.code, option_def.space) for option_def in option_defs}
+    for client_class in client_classes:
+        for option_def in getattr(client_class, "option_def", None) or []:
+            options.add((option_def.code, option_def.space))
+
+    identifiers = (
+        config.host_reservation_identifiers or RESERVATION_IDENTIFIERS[version]
+    )
+
+    issues = []
+    issues += _duplicates(
+        "option-def-duplicate",
+        "Option definition",
+        (f"{option.space or f'dhcp{version}'}/{option.code}" for option in option_defs),
+    )
+    issues += _duplicates(
+        "client-class-duplicate",
+        "Client class",
+        (client_class.name for client_class in client_classes),
+    )
+    issues += _duplicates(
+        "shared-network-duplicate",
+        "Shared network",
+        (network.name for network in config.shared_networks or []),
+    )
+
+    subnets = list(getattr(config, subnets_field) or [])
+    for shared_network in config.shared_networks or []:
+        subnets += getattr(shared_network, subnets_field) or []
+    issues += _duplicates(
+        "subnet-id-duplicate", "Subnet ID", (subnet.id for subnet in subnets)
+    )
+    issues += _duplicates(
+        "subnet-duplicate", "Subnet", (subnet.subnet for subnet in subnets)
+    )
+    issues += check_overlaps(config)
+
+    scopes = [(None, getattr(config, subnets_field) or [])]
+    scopes += [
+        (shared_network, getattr(shared_network, subnets_field) or [])
+        for shared_network in config.shared_networks or []
+    ]
+    arguments = [
+        (version, shared_network, scope_subnets, classes, options, identifiers)
+        for shared_network, scope_subnets in scopes
+    ]
+    if executor:
+        results = executor.map(_validate_scope, *zip(*arguments))
+    else:
+        results = (_validate_scope(*argument) for argument in arguments)
+
+    for result in results:
+        issues += result
+
+    issues += _check_options(version, "global", config.option_data, options)
+    issues += _check_reservations(
+        version, None, config.reservations or [], classes, options, identifiers
+    )
+    for client_class in client_classes:
+        issues += _check_options(
+            version,
+            f"client class {client_class.name}",
+            client_class.option_data,
+            options,
+        )
+
+    return issues
+
+
+def validate_ctrlagent_config(config: CtrlAgentDaemonConfig) -> List[ConfigIssue]:
+    """Validates a Control Agent configuration locally (http-port, control sockets and
+    TLS settings)
+
+    Args:
+        config:     CtrlAgentDaemonConfig
+    """
+    issues = []
+    if not 0 < config.http_port < 65536:
+        issues.append(
+            ConfigIssue(
+                type="http-port-invalid",
+                message=f"http-port {config.http_port} is not a valid TCP port",
+            )
+        )
+
+    sockets = []
+    if config.control_sockets:
+        for service in ("dhcp4", "dhcp6", "d2"):
+            socket = getattr(config.control_sockets, service)
+            if not socket:
+                continue
+
+            sockets.append(socket.socket_name)
+            if socket.socket_type != "unix":
+                issues.append(
+                    ConfigIssue(
+                        type="control-socket-invalid",
+                        message=f"Control socket for {service} must be of type unix (not {socket.socket_type})",
+                        objects=[service],
+                    )
+                )
+
+    issues += _duplicates("control-socket-duplicate", "Control socket", sockets)
+
+    tls = [config.trust_anchor, config.cert_file, config.key_file]
+    if any(tls) and not all(tls):
+        issues.append(
+            ConfigIssue(
+                type="tls-incomplete",
+                message="trust-anchor, cert-file and key-file must all be set to enable TLS",
+            )
+        )
+
+    return issues
+
+
+def _validate_scope(
+    version: int,
+    shared_network,
+    subnets: list,
+    classes: Set[str],
+    options: Set[Tuple[Optional[int], Optional[str]]],
+    identifiers: List[str],
+) -> List[ConfigIssue]:
+    issues = []
+    if shared_network:
+        name = f"shared network {shared_network.name}"
+        issues += _check_options(version, name, shared_network.option_data, options)
+        issues += _check_classes(name, None, classes, _scope_classes(shared_network))
+
+    for subnet in subnets:
+        name = f"subnet {subnet.id} ({subnet.subnet})"
+        issues += _check_options(version, name, subnet.option_data, options, subnet.id)
+        issues += _check_classes(name, subnet.id, classes, _scope_classes(subnet))
+
+        pools = list(subnet.pools or []) + list(getattr(subnet, "pd_pools", None) or [])
+        for pool in pools:
+            pool_name = f"pool {getattr(pool, 'pool', None) or pool.prefix}"
+            issues += _check_options(
+                version, pool_name, pool.option_data, options, subnet.id
+            )
+            issues += _check_classes(
+                pool_name, subnet.id, classes, _scope_classes(pool)
+            )
+
+        issues += _check_reservations(
+            version, subnet.id, subnet.reservations or [], classes, options, identifiers
+        )
+
+    return issues
+
+
+def _check_reservations(
+    version: int,
+    subnet_id: Optional[int],
+    reservations: list,
+    classes: Set[str],
+    options: Set[Tuple[Optional[int], Optional[str]]],
+    identifiers: List[str],
+) -> List[ConfigIssue]:
+    issues = []
+    for reservation in reservations:
+        configured = [
+            identifier
+            for identifier in RESERVATION_IDENTIFIERS[version]
+            if getattr(reservation, identifier.replace("-", "_"), None)
+        ]
+        name = (
+            f"reservation {', '.join(configured) or reservation.hostname or ''}".strip()
+        )
+
+        if len(configured) != 1:
+            issues.append(
+                ConfigIssue(
+                    type="reservation-identifier-invalid",
+                    message=f"Reservation must have exactly one identifier (found {len(configured)})",
+                    subnet_id=subnet_id,
+                    objects=[name],
+                )
+            )
+        elif configured[0] not in identifiers:
+            issues.append(
+                ConfigIssue(
+                    type="reservation-identifier-unknown",
+                    message=f"Reservation identifier {configured[0]} is not in host-reservation-identifiers",
+                    subnet_id=subnet_id,
+                    objects=[name],
+                )
+            )
+
+        issues += _check_options(
+            version, name, reservation.option_data, options, subnet_id
+        )
+        issues += _check_classes(
+            name, subnet_id, classes, reservation.client_classes or []
+        )
+
+    return issues
+
+
+def _check_options(
+    version: int,
+    name: str,
+    option_data: Optional[List[OptionData]],
+    options: Set[Tuple[Optional[int], Optional[str]]],
+    subnet_id: int = None,
+) -> List[ConfigIssue]:
+    issues = []
+    standard_space = f"dhcp{version}"
+    for option in option_data or []:
+        if option.code is None:
+            continue
+
+        space = option.space or standard_space
+        if space == standard_space and option.code in STANDARD_OPTION_CODES[version]:
+            continue
+
+        if (option.code, space) in options or (
+            space == standard_space and (option.code, None) in options
+        ):
+            continue
+
+        issues.append(
+            ConfigIssue(
+                type="option-def-missing",
+                message=f"Option {option.code} in space {space} used in {name} has no option-def",
+                subnet_id=subnet_id,
+                objects=[name],
+            )
+        )
+
+    return issues
+
+
+def _check_classes(
+    name: str, subnet_id: Optional[int], classes: Set[str], references: Iterable[str]
+) -> List[ConfigIssue]:
+    return [
+        ConfigIssue(
+            type="client-class-undefined",
+            message=f"Client class {reference} used in {name} is not defined",
+            subnet_id=subnet_id,
+            objects=[name],
+        )
+        for reference in references
+        if reference not in classes
+        and reference not in BUILT_IN_CLASSES
+        and not reference.startswith(BUILT_IN_CLASS_PREFIXES)
+    ]
+
+
+def _scope_classes(scope) -> List[str]:
+    references = scope.require_client_classes or []
+    if isinstance(references, str):
+        references = [references]
+
+    references = list(references)
+    if scope.client_class:
+        references.append(scope.client_class)
+    return references
+
+
+def _duplicates(type: str, name: str, values: Iterable) -> List[ConfigIssue]:
+    return [
+        ConfigIssue(
+            type=type,
+            message=f"{name} {value} is configured {count} times",
+            objects=[str(value)],
+        )
+        for value, count in Counter(values).items()
+        if count > 1 and value is not None
+    ]
@@ -0,0 +1,246 @@
+import socket
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from pykeadhcp.models.dhcp4.config import Dhcp4DaemonConfig
+from pykeadhcp.models.dhcp6.config import Dhcp6DaemonConfig
+from pykeadhcp.models.enums import ReservationMode
+
+# (start, end, label, subnet id)
+Interval = Tuple[int, int, str, Optional[int]]
+
+
+class ConfigIssue(BaseModel):
+    type: str
+    message: str
+    subnet_id: Optional[int]
+    objects: List[str] = []
+
+
+def address_to_int(address: str, version: int) -> int:
+    """Converts an IPv4 or IPv6 address to an integer, this is a lot faster than
+    int(ipaddress.ip_address(address)) which matters for very large configurations
+
+    Args:
+        address:    IP address
+        version:    4 or 6
+    """
+    family = socket.AF_INET if version == 4 else socket.AF_INET6
+    return int.from_bytes(socket.inet_pton(family, address.strip()), "big")
+
+
+def network_to_range(cidr: str, version: int) -> Tuple[int, int]:
+    """Returns the first and last address of a CIDR as integers
+
+    Args:
+        cidr:       CIDR (eg. 192.0.2.0/24)
+        version:    4 or 6
+    """
+    address, _, prefix_len = cidr.partition("/")
+    bits = 32 if version == 4 else 128
+    host_bits = bits - int(prefix_len or bits)
+    start = address_to_int(address, version) >> host_bits << host_bits
+    return start, start + (1 << host_bits) - 1
+
+
+def pool_to_range(pool: str, version: int) -> Tuple[int, int]:
+    """Returns the first and last address of a pool (eg. 192.0.2.10-192.0.2.20 or
+    192.0.2.0/28) as integers
+
+    Args:
+        pool:       Pool
+        version:    4 or 6
+    """
+    if "-" in pool:
+        start, end = pool.split("-")
+        return address_to_int(start, version), address_to_int(end, version)
+
+    return network_to_range(pool.strip(), version)
+
+
+def sweep(intervals: List[Interval]) -> Iterator[Tuple[Interval, Interval]]:
+    """Sorts the intervals and yields every interval that overlaps an interval before it
+    together with the earlier interval reaching the furthest
+
+    Args:
+        intervals:  List of (start, end, label, subnet id) tuples
+    """
+    intervals.sort(key=lambda interval: (interval[0], interval[1]))
+    current = None
+    for interval in intervals:
+        if current and interval[0] <= current[1]:
+            yield interval, current
+            if interval[1] > current[1]:
+                current = interval
+        else:
+            current = interval
+
+
+def check_overlaps(
+    config: Union[Dhcp4DaemonConfig, Dhcp6DaemonConfig],
+) -> List[ConfigIssue]:
+    """Converts every subnet, pool, PD pool and reservation to integer ranges and uses a
+    sort-and-sweep to report overlapping subnets, pools and PD pools, pools outside their
+    subnet, reservations outside their subnet, duplicate reservations and reservations
+    inside a pool when reservations-out-of-pool is enabled in O(n log n)
+
+    Args:
+        config:     Dhcp4DaemonConfig or Dhcp6DaemonConfig (eg. parser.config)
+    """
+    version = 4 if isinstance(config, Dhcp4DaemonConfig) else 6
+    issues = []
+    subnets = []
+    pools = []
+    pd_pools = []
+    addresses = []
+    prefixes = []
+    out_of_pool = set()
+
+    for subnet, shared_network in _iter_subnets(config, version):
+        label = f"subnet {subnet.id} ({subnet.subnet})"
+        start, end = network_to_range(subnet.subnet, version)
+        subnets.append((start, end, label, subnet.id))
+
+        if _is_out_of_pool(subnet, shared_network, config):
+            out_of_pool.add(subnet.id)
+
+        for pool in subnet.pools or []:
+            pool_start, pool_end = pool_to_range(pool.pool, version)
+            pools.append((pool_start, pool_end, f"pool {pool.pool}", subnet.id))
+            if pool_start > pool_end or pool_start < start or pool_end > end:
+                issues.append(
+                    ConfigIssue(
+                        type="pool-outside-subnet",
+                        message=f"Pool {pool.pool} is not within {label}",
+                        subnet_id=subnet.id,
+                        objects=[label, f"pool {pool.pool}"],
+                    )
+                )
+
+        for pd_pool in getattr(subnet, "pd_pools", None) or []:
+            prefix = f"{pd_pool.prefix}/{pd_pool.prefix_len}"
+            pd_start, pd_end = network_to_range(prefix, version)
+            pd_pools.append((pd_start, pd_end, f"pd-pool {prefix}", subnet.id))
+            if pd_pool.delegated_len < pd_pool.prefix_len:
+                issues.append(
+                    ConfigIssue(
+                        type="pd-pool-invalid",
+                        message=f"PD Pool {prefix} has a delegated-len ({pd_pool.delegated_len}) shorter than its prefix-len",
+                        subnet_id=subnet.id,
+                        objects=[f"pd-pool {prefix}"],
+                    )
+                )
+
+        for reservation in subnet.reservations or []:
+            if version == 4:
+                reserved = [reservation.ip_address] if reservation.ip_address else []
+            else:
+                reserved = reservation.ip_addresses or []
+                for prefix in reservation.prefixes or []:
+                    prefixes.append(
+                        (
+                            *network_to_range(prefix, version),
+                            f"reservation {prefix}",
+                            subnet.id,
+                        )
+                    )
+
+            for address in reserved:
+                value = address_to_int(address, version)
+                addresses.append((value, value, f"reservation {address}", subnet.id))
+                if value < start or value > end:
+                    issues.append(
+                        ConfigIssue(
+                            type="reservation-outside-subnet",
+                            message=f"Reservation {address} is not within {label}",
+                            subnet_id=subnet.id,
+                            objects=[label, f"reservation {address}"],
+                        )
+                    )
+
+    for name, intervals in (
+        ("subnet", subnets),
+        ("pool", pools),
+        ("pd-pool", pd_pools),
+    ):
+        for interval, other in sweep(intervals):
+            issues.append(
+                ConfigIssue(
+                    type=f"{name}-overlap",
+                    message=f"{interval[2].capitalize()} overlaps {other[2]}",
+                    subnet_id=interval[3],
+                    objects=[other[2], interval[2]],
+                )
+            )
+
+    if config.ip_reservations_unique is not False:
+        for interval, other in chain(sweep(addresses), sweep(prefixes)):
+            issues.append(
+                ConfigIssue(
+                    type="reservation-duplicate",
+                    message=f"{interval[2].capitalize()} is also reserved in subnet {other[3]}",
+                    subnet_id=interval[3],
+                    objects=[other[2], interval[2]],
+                )
+            )
+
+    if out_of_pool:
+        issues.extend(_reservations_in_pools(addresses, pools, out_of_pool))
+        issues.extend(_reservations_in_pools(prefixes, pd_pools, out_of_pool))
+
+    return issues
+
+
+def _reservations_in_pools(
+    reservations: List[Interval], pools: List[Interval], out_of_pool: set
+) -> Iterator[ConfigIssue]:
+    # Pools sort before reservations starting on the same address
+    events = [(interval[0], 0, interval) for interval in pools]
+    events += [
+        (interval[0], 1, interval)
+        for interval in reservations
+        if interval[3] in out_of_pool
+    ]
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    current = None
+    for _, kind, interval in events:
+        if kind == 0:
+            if not current or interval[1] > current[1]:
+                current = interval
+        elif current and interval[0] <= current[1]:
+            yield ConfigIssue(
+                type="reservation-in-pool",
+                message=f"{interval[2].capitalize()} is inside {current[2]} but reservations-out-of-pool is enabled",
+                subnet_id=interval[3],
+                objects=[current[2], interval[2]],
+            )
+
+
+def _iter_subnets(
+    config: Union[Dhcp4DaemonConfig, Dhcp6DaemonConfig], version: int
+) -> Iterable:
+    subnets_field = f"subnet{version}"
+    for subnet in getattr(config, subnets_field) or []:
+        yield subnet, None
+
+    for shared_network in config.shared_networks or []:
+        for subnet in getattr(shared_network, subnets_field) or []:
+            yield subnet, shared_network
+
+
+def _is_out_of_pool(*scopes) -> bool:
+    # The most specific scope (subnet, shared network and then global) wins
+    for scope in scopes:
+        if scope is None:
+            continue
+
+        if scope.reservations_out_of_pool is not None:
+            return scope.reservations_out_of_pool
+
+        if scope.reservation_mode is not None:
+            return scope.reservation_mode == ReservationMode.out_of_pool.value
+
+    return False
@@ -0,0 +1,94 @@
+import pytest
+from pykeadhcp.models.generic import KeaResponse
+from pykeadhcp.models.generic.hook import Hook
+
+
+class OfflineApi:
+    def __init__(self):
+        self.hook_library = {
+            "dhcp4": [Hook(library="libdhcp_cb_cmds.so", name="cb_cmds")]
+        }
+        self.objects = {"subnets": {}, "shared-networks": {}}
+        self.commands = []
+
+    def is_hook_enabled(self, hook: str, hook_library: list) -> bool:
+        return any(configured_hook.name == hook for configured_hook in hook_library)
+
+    def parse_remote_map(self, remote_map: dict) -> dict:
+        return remote_map
+
+    def post(self, endpoint: str, body: dict) -> KeaResponse:
+        command = body["command"]
+        arguments = body["arguments"]
+        self.commands.append(command)
+
+        if command == "remote-subnet4-list":
+            subnets = [
+                {"id": subnet["id"], "subnet": subnet["subnet"], "metadata": metadata}
+                for subnet, metadata in self.objects["subnets"].values()
+            ]
+            return KeaResponse(
+                result=0 if subnets else 3, arguments={"subnets": subnets}
+            )
+
+        if command == "remote-network4-list":
+            networks = [
+                {"name": network["name"], "metadata": metadata}
+                for network, metadata in self.objects["shared-networks"].values()
+            ]
+            return KeaResponse(
+                result=0 if networks else 3, arguments={"shared-networks": networks}
+            )
+
+        if command == "remote-subnet4-get-by-id":
+            subnet, _ = self.objects["subnets"][arguments["subnets"][0]["id"]]
+            return KeaResponse(result=0, arguments={"subnets": [subnet]})
+
+        if command == "remote-network4-get":
+            name = arguments["shared-networks"][0]["name"]
+            network, _ = self.objects["shared-networks"][name]
+            return KeaResponse(result=0, arguments={"shared-networks": [network]})
+
+        if command == "remote-class4-get-all":
+            return KeaResponse(
+                result=0, arguments={"client-classes": [{"name": "pykeadhcp-class"}]}
+            )
+
+        if command == "remote-option-def4-get-all":
+            return KeaResponse(
+                result=0,
+                arguments={
+                    "option-defs": [
+                        {
+                            "name": "pykeadhcp",
+                            "code": 222,
+                            "type": "string",
+                            "space": "dhcp4",
+                        }
+                    ]
+                },
+            )
+
+        if command == "remote-global-parameter4-get-all":
+            return KeaResponse(
+                result=0,
+                arguments={
+                    "parameters": [
+                        {"valid-lifetime": 4000, "metadata": {"server-tags": ["all"]}}
+                    ]
+                },
+            )
+
+        return KeaResponse(result=2, text=f"'{command}' command not supported.")
+
+
+class OfflineDaemon:
+    service = "dhcp4"
+
+    def __init__(self):
+        self.api = OfflineApi()
+
+
+@pytest.fixture
+def offline_daemon():
+    return OfflineDaemon()
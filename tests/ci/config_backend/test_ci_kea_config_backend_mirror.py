@@ -0,0 +1,61 @@
+from pykeadhcp.config_backend import ConfigBackendMirror
+
+
+def add_subnet(daemon, id: int, subnet: str, modified: str = "2023-01-01 00:00:00"):
+    daemon.api.objects["subnets"][id] = (
+        {"id": id, "subnet": subnet},
+        {"server-tags": ["all"], "modification-time": modified},
+    )
+
+
+def test_ci_kea_config_backend_mirror_full_refresh(offline_daemon):
+    add_subnet(offline_daemon, 1, "192.0.2.0/24")
+    add_subnet(offline_daemon, 2, "198.51.100.0/24")
+    offline_daemon.api.objects["shared-networks"]["pykeadhcp"] = (
+        {"name": "pykeadhcp"},
+        {"server-tags": ["all"]},
+    )
+
+    mirror = ConfigBackendMirror(offline_daemon)
+    report = mirror.refresh()
+
+    assert report.full
+    assert report.fetched == 3
+    assert mirror.get_subnet(1).subnet == "192.0.2.0/24"
+    assert mirror.get_subnet_by_prefix("198.51.100.0/24").id == 2
+    assert mirror.get_shared_network("pykeadhcp").name == "pykeadhcp"
+    assert mirror.get_client_class("pykeadhcp-class")
+    assert mirror.get_option_def(222).name == "pykeadhcp"
+    assert mirror.global_parameters == {"valid-lifetime": 4000}
+
+
+def test_ci_kea_config_backend_mirror_incremental_refresh(offline_daemon):
+    add_subnet(offline_daemon, 1, "192.0.2.0/24")
+    add_subnet(offline_daemon, 2, "198.51.100.0/24")
+
+    mirror = ConfigBackendMirror(offline_daemon)
+    mirror.refresh()
+
+    add_subnet(offline_daemon, 2, "198.51.100.0/25", modified="2023-01-02 00:00:00")
+    add_subnet(offline_daemon, 3, "203.0.113.0/24")
+    del offline_daemon.api.objects["subnets"][1]
+    offline_daemon.api.commands.clear()
+
+    report = mirror.refresh()
+
+    assert not report.full
+    assert report.fetched == 2
+    assert report.removed == 1
+    assert report.unchanged == 0
+    assert offline_daemon.api.commands.count("remote-subnet4-get-by-id") == 2
+    assert mirror.get_subnet(1) is None
+    assert mirror.get_subnet_by_prefix("192.0.2.0/24") is None
+    assert mirror.get_subnet(2).subnet == "198.51.100.0/25"
+    assert mirror.get_subnet_by_prefix("203.0.113.0/24").id == 3
+
+    offline_daemon.api.commands.clear()
+    report = mirror.refresh()
+
+    assert report.fetched == 0
+    assert report.unchanged == 2
+    assert "remote-subnet4-get-by-id" not in offline_daemon.api.commands
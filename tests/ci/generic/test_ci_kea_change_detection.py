@@ -0,0 +1,95 @@
+import time
+from pykeadhcp.daemons import Ddns, Dhcp4
+from pykeadhcp.instrumentation import Instrumentation
+from pykeadhcp.models.generic import KeaResponse
+
+
+class OfflineApi:
+    def __init__(self, hash_supported: bool = True):
+        self.hash_supported = hash_supported
+        self.hook_library = {}
+        self.instrumentation = Instrumentation()
+        self.commands = []
+        self.hash = "A" * 64
+        self.pid = 100
+        self.reloaded_at = time.time() - 60
+
+    def get_active_hooks(self, hooks: list) -> list:
+        return []
+
+    def send_command(
+        self, command: str, service: str, required_hook: str = ""
+    ) -> KeaResponse:
+        self.commands.append(command)
+        if command == "config-get":
+            config = {"Dhcp4": {"hooks-libraries": []}}
+            if self.hash_supported:
+                config["hash"] = self.hash
+            return KeaResponse(result=0, arguments=config)
+
+        if command == "config-hash-get" and self.hash_supported:
+            return KeaResponse(result=0, arguments={"hash": self.hash})
+
+        if command == "status-get":
+            return KeaResponse(
+                result=0,
+                arguments={
+                    "pid": self.pid,
+                    "uptime": 3600,
+                    "reload": int(time.time() - self.reloaded_at),
+                },
+            )
+
+        return KeaResponse(result=2, text=f"'{command}' command not supported.")
+
+
+def test_ci_kea_change_detection_config_hash():
+    api = OfflineApi()
+    dhcp4 = Dhcp4(api)
+    assert api.commands == ["config-get"]
+    assert dhcp4.config_fingerprint.hash == api.hash
+
+    assert not dhcp4.refresh_cached_config(force=False)
+    assert api.commands[-1] == "config-hash-get"
+
+    api.hash = "B" * 64
+    assert dhcp4.refresh_cached_config(force=False)
+    assert api.commands[-2:] == ["config-hash-get", "config-get"]
+    assert dhcp4.cached_config["hash"] == api.hash
+
+    assert api.instrumentation.get_counters() == {
+        "config_refresh_fetched": 2,
+        "config_refresh_skipped": 1,
+    }
+
+
+def test_ci_kea_change_detection_status_get_fallback():
+    api = OfflineApi(hash_supported=False)
+    dhcp4 = Dhcp4(api)
+    events = []
+    api.instrumentation.add_hook(
+        "config_refresh", lambda event, **data: events.append(data["changed"])
+    )
+
+    # No fingerprint was taken for the initial (forced) download
+    assert dhcp4.refresh_cached_config(force=False)
+    assert not dhcp4.config_hash_supported
+    assert not dhcp4.refresh_cached_config(force=False)
+    assert api.commands.count("config-hash-get") == 1
+
+    api.reloaded_at = time.time()
+    assert dhcp4.refresh_cached_config(force=False)
+    assert not dhcp4.refresh_cached_config(force=False)
+
+    api.pid += 1
+    assert dhcp4.refresh_cached_config(force=False)
+    assert events == [True, False, True, False, True]
+
+
+def test_ci_kea_change_detection_without_status_get():
+    api = OfflineApi(hash_supported=False)
+    ddns = Ddns(api)
+    assert ddns.refresh_cached_config(force=False)
+    assert ddns.refresh_cached_config(force=False)
+    assert api.commands.count("config-get") == 3
+    assert "status-get" not in api.commands
@@ -0,0 +1,219 @@
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+from pykeadhcp.concurrency import AdaptiveLimit, DhcpTrafficMonitor, bounded_map
+from pykeadhcp.exceptions import KeaCircuitOpenException, KeaException
+from pykeadhcp.instrumentation import Instrumentation
+from pykeadhcp.models.generic.api_response import KeaResponse
+
+
+def test_ci_kea_concurrency_bounded_map_order():
+    def slow_square(value: int) -> int:
+        time.sleep(0.001 * (10 - value))
+        return value * value
+
+    assert list(bounded_map(slow_square, range(10), max_workers=4)) == [
+        value * value for value in range(10)
+    ]
+
+
+def test_ci_kea_concurrency_bounded_map_lazy():
+    consumed = []
+
+    def items():
+        for value in range(1000):
+            consumed.append(value)
+            yield value
+
+    results = bounded_map(lambda value: value, items(), max_workers=2, max_pending=4)
+    assert next(results) == 0
+    assert len(consumed) <= 5
+    results.close()
+
+
+def test_ci_kea_concurrency_bounded_map_executor():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert list(bounded_map(abs, [-1, -2, 3], executor=executor)) == [1, 2, 3]
+        # The executor is left open for the caller
+        assert executor.submit(abs, -4).result() == 4
+
+
+def _run(limit: AdaptiveLimit, calls: int, latency: float = 0.01, error: bool = False):
+    for _ in range(calls):
+        limit.acquire()
+    for _ in range(calls):
+        limit.release(latency, error=error)
+
+
+def test_ci_kea_concurrency_adaptive_limit_increase():
+    limit = AdaptiveLimit(initial=2, maximum=3, window=2)
+    _run(limit, 2)
+    assert limit.limit == 3
+
+    # The hard cap is never exceeded
+    _run(limit, 3)
+    assert limit.limit == 3
+
+
+def test_ci_kea_concurrency_adaptive_limit_unused():
+    limit = AdaptiveLimit(initial=4, window=2)
+    # Calls never used the whole limit so there is no reason to increase it
+    for _ in range(4):
+        _run(limit, 1)
+    assert limit.limit == 4
+
+
+def test_ci_kea_concurrency_adaptive_limit_latency():
+    events = []
+    instrumentation = Instrumentation()
+    instrumentation.add_hook(
+        "concurrency_limit", lambda event, **data: events.append(data)
+    )
+    limit = AdaptiveLimit(initial=8, window=2, instrumentation=instrumentation)
+    _run(limit, 2, latency=0.01)
+    assert limit.limit == 8
+    assert limit.baseline == 0.01
+
+    _run(limit, 2, latency=0.5)
+    assert limit.limit == 4
+    assert events == [{"limit": 4, "previous_limit": 8, "reason": "latency"}]
+    assert instrumentation.get_counters() == {"concurrency_decrease": 1}
+
+
+def test_ci_kea_concurrency_adaptive_limit_errors():
+    limit = AdaptiveLimit(initial=8, minimum=2)
+    for _ in range(4):
+        limit.acquire()
+
+    # Calls which were in flight during the decrease don't decrease the limit again
+    for _ in range(4):
+        limit.release(1.0, error=True)
+    assert limit.limit == 4
+
+    limit.acquire()
+    limit.release(1.0, error=True)
+    assert limit.limit == 2
+
+    limit.record_error()
+    limit.record_error()
+    assert limit.limit == 2
+
+
+def test_ci_kea_concurrency_adaptive_limit_watch():
+    instrumentation = Instrumentation()
+    limit = AdaptiveLimit(initial=8)
+    limit.watch(instrumentation)
+    instrumentation.emit(
+        "circuit_breaker", name="dhcp4", state="closed", previous_state="half-open"
+    )
+    assert limit.limit == 8
+
+    instrumentation.emit("retry", command="lease4-get", attempt=1, delay=0.1)
+    assert limit.limit == 4
+
+    limit.unwatch(instrumentation)
+    instrumentation.emit("retry", command="lease4-get", attempt=2, delay=0.2)
+    assert limit.limit == 4
+
+
+class FakeDaemon:
+    service = "dhcp4"
+
+    def __init__(self):
+        self.received = 0
+        self.threads = set()
+
+    def statistic_get(self, name: str) -> KeaResponse:
+        self.threads.add(threading.current_thread())
+        return KeaResponse(result=0, arguments={name: [[self.received, "2026-10-19"]]})
+
+
+def test_ci_kea_concurrency_adaptive_limit_traffic():
+    daemon = FakeDaemon()
+    traffic = DhcpTrafficMonitor(daemon, max_rate=1000, interval=0)
+    assert traffic.statistic == "pkt4-received"
+    assert not traffic.busy()
+
+    limit = AdaptiveLimit(initial=2, window=2, traffic=traffic)
+    limit.sample_traffic()
+    _run(limit, 2)
+    assert limit.limit == 3
+
+    daemon.received += 10**9
+    limit.sample_traffic()
+    _run(limit, 2)
+    assert traffic.last_rate > 1000
+    assert limit.limit == 1
+
+
+def test_ci_kea_concurrency_adaptive_limit_traffic_errors():
+    daemon = FakeDaemon()
+    traffic = DhcpTrafficMonitor(daemon, max_rate=1000, interval=0)
+    limit = AdaptiveLimit(initial=2, window=2, traffic=traffic)
+    limit.sample_traffic()
+    daemon.received += 10**9
+    limit.sample_traffic()
+    assert limit.busy
+
+    # The statistic can't be read, the server is still considered busy
+    for error in (Timeout(), RequestsConnectionError(), KeaException("statistic-get")):
+
+        def statistic_get(name: str, error: Exception = error):
+            raise error
+
+        daemon.statistic_get = statistic_get
+        limit.sample_traffic()
+        assert limit.busy
+    assert limit.instrumentation.get_counters()["traffic_sample_errors"] == 3
+
+
+def test_ci_kea_concurrency_bounded_map_adaptive_limit():
+    # Latency jitter of the sleeping calls must not decrease the limit
+    limit = AdaptiveLimit(initial=2, maximum=4, window=4, target_latency=1.0)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def call(value: int) -> int:
+        with lock:
+            active.append(value)
+            peak.append(len(active))
+        time.sleep(0.002)
+        with lock:
+            active.remove(value)
+        return value
+
+    assert list(bounded_map(call, range(40), limit=limit)) == list(range(40))
+    assert max(peak) <= 4
+    assert limit.in_flight == 0
+    assert limit.limit > 2
+
+
+def test_ci_kea_concurrency_bounded_map_traffic_thread():
+    daemon = FakeDaemon()
+    traffic = DhcpTrafficMonitor(daemon, max_rate=1000, interval=0)
+    limit = AdaptiveLimit(initial=2, window=2, traffic=traffic)
+    assert list(bounded_map(abs, range(-8, 0), limit=limit)) == list(range(8, 0, -1))
+    # The statistic is only read by the thread submitting the calls
+    assert daemon.threads == {threading.current_thread()}
+
+
+def test_ci_kea_concurrency_bounded_map_transport_errors():
+    def call(error: Exception):
+        raise error
+
+    def run(error: Exception) -> int:
+        limit = AdaptiveLimit(initial=8, window=100)
+        results = bounded_map(call, [error], limit=limit)
+        with pytest.raises(type(error)):
+            list(results)
+        return limit.limit
+
+    # Kea answered, the server isn't overloaded
+    assert run(KeaException("Host already exists.")) == 8
+    assert run(ValueError()) == 8
+    assert run(RequestsConnectionError()) == 4
+    assert run(Timeout()) == 4
+    assert run(KeaCircuitOpenException("dhcp4", 30.0)) == 4
@@ -0,0 +1,171 @@
+import json
+import pytest
+from requests.exceptions import (
+    ConnectionError as RequestsConnectionError,
+    HTTPError,
+    InvalidURL,
+)
+from pykeadhcp import kea as kea_module
+from pykeadhcp.exceptions import KeaCircuitOpenException
+from pykeadhcp.kea import Kea
+from pykeadhcp.policy import BackoffPolicy, CircuitBreaker, RetryPolicy
+
+
+class FakeResponse:
+    def __init__(self, status_code: int = 200, data: list = None):
+        self.status_code = status_code
+        self.data = data
+
+    def json(self):
+        return self.data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(f"{self.status_code} Error")
+
+
+class FakeTransport:
+    """Replaces requests.post, failures is a list of outcomes used before answering normally"""
+
+    def __init__(self):
+        self.failures = []
+        self.commands = []
+
+    def post(self, url, data, **kwargs):
+        body = json.loads(data)
+        self.commands.append(body["command"])
+        if self.failures:
+            failure = self.failures.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return FakeResponse(status_code=failure)
+
+        arguments = {"Dhcp4": {"hooks-libraries": []}, "leases": []}
+        return FakeResponse(data=[{"result": 0, "arguments": arguments}])
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    transport = FakeTransport()
+    monkeypatch.setattr(kea_module.requests, "post", transport.post)
+    return transport
+
+
+def build_server(**kwargs) -> Kea:
+    policy = RetryPolicy(
+        max_attempts=3,
+        backoff=BackoffPolicy(initial=0, jitter=0),
+        **kwargs,
+    )
+    return Kea(host="http://127.0.0.1", port=8000, retry_policy=policy)
+
+
+def test_ci_kea_retry_policy_read_only_retried(transport):
+    server = build_server()
+    transport.commands.clear()
+    transport.failures = [RequestsConnectionError(), 503]
+    assert server.dhcp4.config_get().result == 0
+    assert transport.commands == ["config-get"] * 3
+    assert server.instrumentation.get_counters()["retries"] == 2
+
+    # Writes are only sent once
+    transport.commands.clear()
+    transport.failures = [RequestsConnectionError()]
+    with pytest.raises(RequestsConnectionError):
+        server.dhcp4.config_reload()
+    assert transport.commands == ["config-reload"]
+
+    transport.failures = [503, 503, 503]
+    with pytest.raises(HTTPError):
+        server.dhcp4.config_get()
+
+
+def test_ci_kea_retry_policy_circuit_breaker(transport):
+    server = build_server(failure_threshold=2, reset_timeout=60)
+    events = []
+    server.instrumentation.add_hook(
+        "circuit_breaker", lambda event, **data: events.append(data)
+    )
+
+    transport.failures = [RequestsConnectionError()] * 5
+    with pytest.raises(RequestsConnectionError):
+        server.dhcp4.config_get()
+    # The circuit opened after the second failure so the third attempt was never sent
+    assert len(transport.failures) == 3
+    assert server.circuit_breakers["dhcp4"].state == "open"
+    assert events == [{"name": "dhcp4", "state": "open", "previous_state": "closed"}]
+
+    with pytest.raises(KeaCircuitOpenException):
+        server.dhcp4.config_get()
+    assert server.instrumentation.get_counters()["circuit_rejected"] == 1
+
+    # Other services have their own circuit
+    transport.failures = []
+    assert server.dhcp6.config_get().result == 0
+
+    # Once the reset timeout passed a trial command closes the circuit again
+    server.circuit_breakers["dhcp4"].opened_at -= 60
+    assert server.dhcp4.config_get().result == 0
+    assert server.circuit_breakers["dhcp4"].state == "closed"
+    assert [event["state"] for event in events] == ["open", "half-open", "closed"]
+
+
+def test_ci_kea_retry_policy_breaker_trial():
+    breaker = CircuitBreaker(name="dhcp4", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.allow()
+    assert breaker.state == "half-open"
+    # Only a single trial command is let through
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_ci_kea_retry_policy_breaker_trial_released(transport):
+    server = build_server(failure_threshold=1, reset_timeout=60)
+    transport.failures = [RequestsConnectionError()]
+    with pytest.raises(RequestsConnectionError):
+        server.dhcp4.config_reload()
+    breaker = server.circuit_breakers["dhcp4"]
+    assert breaker.state == "open"
+
+    # The trial command fails before reaching the server, the next command is the new trial
+    breaker.opened_at -= 60
+    transport.failures = [InvalidURL()]
+    with pytest.raises(InvalidURL):
+        server.dhcp4.config_reload()
+    assert breaker.state == "half-open"
+
+    assert server.dhcp4.config_reload().result == 0
+    assert breaker.state == "closed"
+
+
+def test_ci_kea_retry_policy_breaker_server_errors(transport):
+    server = build_server(failure_threshold=2, reset_timeout=60)
+    breaker = server.get_circuit_breaker(["dhcp4"])
+
+    # 500 isn't retried but counts as a failure, a 4xx answer doesn't
+    transport.failures = [500]
+    with pytest.raises(HTTPError):
+        server.dhcp4.config_get()
+    assert transport.failures == []
+    assert breaker.failures == 1
+
+    transport.failures = [404]
+    with pytest.raises(HTTPError):
+        server.dhcp4.config_get()
+    assert breaker.failures == 0
+
+    transport.failures = [500, 500]
+    for _ in range(2):
+        with pytest.raises(HTTPError):
+            server.dhcp4.config_get()
+    assert breaker.state == "open"
+
+    # A trial command answered with a 500 opens the circuit again
+    breaker.opened_at -= 60
+    transport.failures = [500]
+    with pytest.raises(HTTPError):
+        server.dhcp4.config_get()
+    assert breaker.state == "open"
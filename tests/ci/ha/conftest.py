@@ -0,0 +1,102 @@
+import pytest
+from pykeadhcp.models.generic import StatusGet
+
+
+class OfflineServer:
+    dhcp4 = None
+
+
+class StubDaemon:
+    """Answers status_get with the queued outcomes (StatusGet or an exception to raise), the
+    last outcome is repeated. Other methods answer with the outcome given for them in methods
+    and every call is recorded in calls"""
+
+    def __init__(self, *outcomes, **methods):
+        self.outcomes = list(outcomes)
+        self.methods = methods
+        self.calls = []
+
+    def __getattr__(self, name: str):
+        methods = self.__dict__.get("methods") or {}
+        if name not in methods:
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            self.calls.append(name)
+            if isinstance(methods[name], Exception):
+                raise methods[name]
+            return methods[name]
+
+        return method
+
+    def status_get(self) -> StatusGet:
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class StubServer:
+    def __init__(self, daemon: StubDaemon):
+        self.dhcp4 = daemon
+
+
+def build_status(
+    local_state: str,
+    remote_state: str = "hot-standby",
+    role: str = "primary",
+    scopes: list = ["server1"],
+    ha_mode: str = "hot-standby",
+) -> StatusGet:
+    return StatusGet.parse_obj(
+        {
+            "pid": 1,
+            "uptime": 10,
+            "reload": 10,
+            "high-availability": [
+                build_relationship(local_state, remote_state, role, scopes, ha_mode)
+            ],
+        }
+    )
+
+
+def build_relationship(
+    local_state: str,
+    remote_state: str = "hot-standby",
+    role: str = "primary",
+    scopes: list = ["server1"],
+    ha_mode: str = "hot-standby",
+) -> dict:
+    return {
+        "ha-mode": ha_mode,
+        "ha-servers": {
+            "local": {"role": role, "scopes": scopes, "state": local_state},
+            "remote": {
+                "age": 1,
+                "in-touch": True,
+                "last-scopes": [],
+                "last-state": remote_state,
+                "role": "standby",
+            },
+        },
+    }
+
+
+@pytest.fixture
+def ha_status():
+    return build_status
+
+
+@pytest.fixture
+def offline_server():
+    return OfflineServer()
+
+
+@pytest.fixture
+def ha_relationship():
+    return build_relationship
+
+
+@pytest.fixture
+def stub_server():
+    return lambda *outcomes, **methods: StubServer(StubDaemon(*outcomes, **methods))
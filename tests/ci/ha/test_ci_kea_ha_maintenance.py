@@ -0,0 +1,18 @@
+from pykeadhcp.ha import HAMaintenanceWorkflow
+from pykeadhcp.ha.maintenance import ASSIGNED_LEASES_STATISTIC
+
+
+def test_ci_kea_ha_maintenance_max_period():
+    workflow = HAMaintenanceWorkflow(
+        leases_per_second=1000, min_max_period=30, max_max_period=120
+    )
+    assert workflow.get_max_period(0) == 30
+    assert workflow.get_max_period(1500) == 32
+    assert workflow.get_max_period(10_000_000) == 120
+
+
+def test_ci_kea_ha_maintenance_assigned_leases_statistic():
+    assert ASSIGNED_LEASES_STATISTIC.match("subnet[1].assigned-addresses")
+    assert ASSIGNED_LEASES_STATISTIC.match("subnet[40123].assigned-pds")
+    assert not ASSIGNED_LEASES_STATISTIC.match("subnet[1].pool[0].assigned-addresses")
+    assert not ASSIGNED_LEASES_STATISTIC.match("cumulative-assigned-addresses")
@@ -0,0 +1,99 @@
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from pykeadhcp.ha import HAMonitor, HABackoffPolicy, HATransition
+from pykeadhcp.models.generic.high_availability import HighAvailability
+
+
+def test_ci_kea_ha_monitor_backoff_policy():
+    policy = HABackoffPolicy(initial=1, maximum=8, multiplier=2, jitter=0)
+    assert policy.delay(0) == 0
+    assert policy.delay(1) == 1
+    assert policy.delay(3) == 4
+    assert policy.delay(10) == 8
+
+
+def test_ci_kea_ha_monitor_update_transitions(ha_status, offline_server):
+    monitor = HAMonitor()
+    monitor.add(name="primary", server=offline_server)
+
+    events = []
+    monitor.add_listener(events.append, states=["partner-down"])
+
+    transition = monitor.update("primary", ha_status("hot-standby"))
+    assert isinstance(transition, HATransition)
+    assert transition.previous_state is None
+    assert transition.state == "hot-standby"
+
+    assert monitor.update("primary", ha_status("hot-standby")) is None
+
+    transition = monitor.update("primary", ha_status("partner-down", "unavailable"))
+    assert transition.previous_state == "hot-standby"
+    assert len(events) == 1
+    assert events[0].state == "partner-down"
+
+    state = monitor.current_state("primary")
+    assert state.reachable
+    assert state.state == "partner-down"
+    assert state.remote.last_state == "unavailable"
+    assert state.changed_at
+
+
+def test_ci_kea_ha_monitor_unreachable_backoff(ha_status, stub_server):
+    monitor = HAMonitor(backoff=HABackoffPolicy(initial=30, jitter=0))
+    monitor.add(
+        name="primary",
+        server=stub_server(
+            ha_status("hot-standby"), RequestsConnectionError("refused")
+        ),
+    )
+    assert [transition.state for transition in monitor.poll()] == ["hot-standby"]
+
+    transitions = monitor.poll()
+    assert [transition.state for transition in transitions] == ["unreachable"]
+    state = monitor.current_state("primary")
+    assert state.consecutive_failures == 1
+    assert state.error == "refused"
+    assert not state.reachable
+    # The server is backing off
+    assert monitor.poll() == []
+
+
+def test_ci_kea_ha_monitor_listener_errors(ha_status, stub_server):
+    monitor = HAMonitor()
+    monitor.add(name="primary", server=stub_server(ha_status("hot-standby")))
+    errors = []
+    monitor.instrumentation.add_hook(
+        "ha_listener_error", lambda event, **data: errors.append(data["error"])
+    )
+
+    def listener(transition: HATransition):
+        raise RuntimeError("listener failed")
+
+    events = []
+    monitor.add_listener(listener)
+    monitor.add_listener(events.append)
+    assert len(monitor.poll()) == 1
+    # The other listeners are still called and the state is still cached
+    assert len(events) == 1
+    assert [str(error) for error in errors] == ["listener failed"]
+    assert monitor.instrumentation.get_counters()["ha_listener_errors"] == 1
+    assert monitor.current_state("primary").state == "hot-standby"
+
+
+def test_ci_kea_ha_monitor_relationships(ha_status, ha_relationship, stub_server):
+    hub = ha_status("hot-standby")
+    hub.high_availability.append(
+        HighAvailability.parse_obj(ha_relationship("partner-down", "unavailable"))
+    )
+    monitor = HAMonitor()
+    monitor.add(name="hub", server=stub_server(ha_status("hot-standby"), hub))
+    monitor.poll()
+
+    transitions = monitor.poll()
+    assert len(transitions) == 1
+    assert transitions[0].relationship == 1
+    assert transitions[0].previous_state is None
+    assert transitions[0].state == "partner-down"
+    assert monitor.current_state("hub").relationship_states == [
+        "hot-standby",
+        "partner-down",
+    ]
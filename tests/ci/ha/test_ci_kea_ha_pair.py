@@ -0,0 +1,110 @@
+import pytest
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+from pykeadhcp.ha import KeaHAPair
+from pykeadhcp.commands import is_read_only_command
+
+
+@pytest.fixture
+def ha_pair(offline_server):
+    pair = KeaHAPair(primary=offline_server, secondary=offline_server, max_age=3600)
+    pair.refresh()
+    return pair
+
+
+def test_ci_kea_ha_pair_read_only_commands():
+    assert is_read_only_command("lease4-get-all")
+    assert is_read_only_command("subnet4_list")
+    assert is_read_only_command("statistic-get-all")
+    assert not is_read_only_command("lease4-add")
+    assert not is_read_only_command("reservation_add")
+    assert not is_read_only_command("ha-maintenance-start")
+
+
+def test_ci_kea_ha_pair_route_hot_standby(ha_pair: KeaHAPair, ha_status):
+    ha_pair.monitor.update("primary", ha_status("hot-standby"))
+    ha_pair.monitor.update(
+        "secondary", ha_status("hot-standby", role="standby", scopes=[])
+    )
+
+    assert ha_pair.route("lease4_add") == ["primary", "secondary"]
+    assert ha_pair.route("lease4_get_all") == ["primary", "secondary"]
+
+
+def test_ci_kea_ha_pair_route_partner_down(ha_status, stub_server):
+    pair = KeaHAPair(
+        primary=stub_server(RequestsConnectionError("refused")),
+        secondary=stub_server(
+            ha_status("partner-down", "unavailable", role="standby", scopes=["server1"])
+        ),
+    )
+
+    assert pair.route("lease4_add") == ["secondary", "primary"]
+
+
+def test_ci_kea_ha_pair_route_load_balancing(ha_pair: KeaHAPair, ha_status):
+    ha_pair.monitor.update(
+        "primary", ha_status("load-balancing", ha_mode="load-balancing")
+    )
+    ha_pair.monitor.update(
+        "secondary",
+        ha_status(
+            "load-balancing",
+            role="secondary",
+            scopes=["server2"],
+            ha_mode="load-balancing",
+        ),
+    )
+
+    assert ha_pair.route("lease4_add") == ["primary", "secondary"]
+    reads = [ha_pair.route("lease4_get")[0] for _ in range(4)]
+    assert set(reads) == {"primary", "secondary"}
+
+
+@pytest.fixture
+def stub_pair(ha_status, stub_server):
+    def build(primary: dict, secondary: dict) -> KeaHAPair:
+        return KeaHAPair(
+            primary=stub_server(ha_status("hot-standby"), **primary),
+            secondary=stub_server(
+                ha_status("hot-standby", role="standby", scopes=[]), **secondary
+            ),
+            max_age=3600,
+        )
+
+    return build
+
+
+def test_ci_kea_ha_pair_call_failover(stub_pair):
+    pair = stub_pair(
+        primary={"lease4_get": RequestsConnectionError("refused")},
+        secondary={"lease4_get": "lease"},
+    )
+
+    assert pair.call("lease4_get", ip_address="192.0.2.10") == "lease"
+    assert pair.monitor.targets["primary"].calls == ["lease4_get"]
+    assert pair.monitor.targets["secondary"].calls == ["lease4_get"]
+
+
+def test_ci_kea_ha_pair_call_write_timeout(stub_pair):
+    pair = stub_pair(
+        primary={"lease4_add": Timeout("read timed out")},
+        secondary={"lease4_add": "added"},
+    )
+
+    # The write may have been applied by the primary so it isn't sent again
+    with pytest.raises(Timeout):
+        pair.call("lease4_add", ip_address="192.0.2.10")
+    assert pair.monitor.targets["secondary"].calls == []
+
+
+def test_ci_kea_ha_pair_call_unavailable(stub_pair):
+    primary_error = RequestsConnectionError("primary refused")
+    pair = stub_pair(
+        primary={"lease4_get": primary_error},
+        secondary={"lease4_get": RequestsConnectionError("secondary refused")},
+    )
+
+    with pytest.raises(RequestsConnectionError) as error:
+        pair.call("lease4_get", ip_address="192.0.2.10")
+    assert error.value is primary_error
+    assert pair.monitor.targets["secondary"].calls == ["lease4_get"]
@@ -0,0 +1,128 @@
+import random
+from ipaddress import ip_address
+from pykeadhcp.daemons import Dhcp4
+from pykeadhcp.instrumentation import Instrumentation
+from pykeadhcp.leases import LeaseDigest, compare_leases, get_range_leases
+from pykeadhcp.models.dhcp6.lease import Lease6
+from pykeadhcp.models.generic import KeaResponse
+from pykeadhcp.models.records import Lease4Record, Lease6Record
+
+
+def lease4(address: str, subnet_id: int = 1, cltt: int = 1700000000) -> dict:
+    return {
+        "ip-address": address,
+        "subnet-id": subnet_id,
+        "hw-address": "aa:bb:cc:dd:ee:ff",
+        "valid-lft": 3600,
+        "cltt": cltt,
+        "state": 0,
+    }
+
+
+class OfflinePageApi:
+    def __init__(self, leases: list):
+        self.hook_library = {}
+        self.instrumentation = Instrumentation()
+        self.leases = sorted(leases, key=lambda lease: ip_address(lease["ip-address"]))
+        self.pages = 0
+
+    def get_active_hooks(self, hooks: list) -> list:
+        return ["lease_cmds"]
+
+    def send_command(
+        self, command: str, service: str, required_hook: str = ""
+    ) -> KeaResponse:
+        return KeaResponse(result=0, arguments={"Dhcp4": {}})
+
+    def send_command_with_arguments(
+        self, command: str, service: str, arguments: dict, required_hook: str = ""
+    ) -> KeaResponse:
+        assert command == "lease4-get-page"
+        self.pages += 1
+        leases = self.leases
+        if arguments["from"] != "start":
+            start = ip_address(arguments["from"])
+            leases = [
+                lease for lease in leases if ip_address(lease["ip-address"]) > start
+            ]
+        leases = leases[: arguments["limit"]]
+        return KeaResponse(
+            result=0 if leases else 3,
+            arguments={"leases": leases, "count": len(leases)},
+        )
+
+
+def test_ci_kea_leases_digest_order_independent():
+    leases = [
+        Lease4Record.from_dict(lease4(f"192.0.{block}.{host}", subnet_id=block))
+        for block in range(2)
+        for host in range(1, 200)
+    ]
+    digest = LeaseDigest.from_leases(leases)
+    random.shuffle(leases)
+    shuffled = LeaseDigest.from_leases(leases)
+    assert digest.digest() == shuffled.digest()
+    assert digest.digest()[0] == 398
+    assert digest.diff(shuffled) == {}
+
+    updated = LeaseDigest.from_leases(leases)
+    updated.remove(Lease4Record.from_dict(lease4("192.0.1.10", subnet_id=1)))
+    updated.add(Lease4Record.from_dict(lease4("192.0.1.10", subnet_id=1, cltt=1)))
+    assert updated.subnet_digest(0) == digest.subnet_digest(0)
+    assert updated.diff(digest) == {1: [("192.0.1.0", "192.0.1.255")]}
+
+    updated.remove(Lease4Record.from_dict(lease4("192.0.1.10", subnet_id=1, cltt=1)))
+    assert updated.diff(digest) == {1: [("192.0.1.0", "192.0.1.255")]}
+    updated.add(Lease4Record.from_dict(lease4("192.0.1.10", subnet_id=1)))
+    assert updated.diff(digest) == {}
+
+
+def test_ci_kea_leases_digest_models_and_records():
+    data = {
+        "ip-address": "2001:db8::10",
+        "duid": "00:01:02",
+        "iaid": 1,
+        "type": "IA_NA",
+        "subnet-id": 1,
+        "valid-lft": 3600,
+        "cltt": 1700000000,
+    }
+    model_digest = LeaseDigest.from_leases([Lease6.parse_obj(data)], version=6)
+    record_digest = LeaseDigest.from_leases([Lease6Record.from_dict(data)], version=6)
+    assert model_digest.digest() == record_digest.digest()
+
+    data["ip-address"] = "2001:db8::1:10"
+    other = LeaseDigest.from_leases([Lease6Record.from_dict(data)], version=6)
+    assert other.diff(model_digest) == {
+        1: [("2001:db8::", "2001:db8::ff"), ("2001:db8::1:0", "2001:db8::1:ff")]
+    }
+
+
+def test_ci_kea_leases_digest_compare_partners():
+    leases = [lease4(f"192.0.2.{host}") for host in range(1, 255)] + [
+        lease4(f"192.0.3.{host}", subnet_id=2) for host in range(1, 255)
+    ]
+    partner_leases = [dict(lease) for lease in leases]
+    partner_leases[20]["cltt"] += 10  # 192.0.2.21
+    del partner_leases[300]  # 192.0.3.47
+    primary = Dhcp4(OfflinePageApi(leases))
+    secondary = Dhcp4(OfflinePageApi(partner_leases))
+
+    digests = [
+        LeaseDigest.from_leases(
+            get_range_leases(daemon, "0.0.0.0", "255.255.255.255", page_size=500),
+            range_bits=6,
+        )
+        for daemon in (primary, secondary)
+    ]
+    differences = digests[0].diff(digests[1])
+    assert differences == {
+        1: [("192.0.2.0", "192.0.2.63")],
+        2: [("192.0.3.0", "192.0.3.63")],
+    }
+
+    primary.api.pages = 0
+    mismatches = compare_leases(primary, secondary, differences, page_size=50)
+    assert [address for address, _, _ in mismatches] == ["192.0.2.21", "192.0.3.47"]
+    assert mismatches[1][2] is None
+    assert primary.api.pages == 4
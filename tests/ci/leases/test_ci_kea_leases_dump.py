@@ -0,0 +1,107 @@
+import threading
+import time
+from pykeadhcp.daemons import Dhcp4
+from pykeadhcp.instrumentation import Instrumentation
+from pykeadhcp.leases import dump_leases, shard_subnets
+from pykeadhcp.models.dhcp4.lease import Lease4
+from pykeadhcp.models.generic import KeaResponse
+from pykeadhcp.models.records import Lease4Record
+
+# Number of leases by subnet ID, subnet 5 has no leases
+LEASE_COUNTS = {1: 40, 2: 10, 3: 25, 4: 25, 5: 0}
+
+
+class OfflineShardApi:
+    def __init__(self, delay: float = 0):
+        self.hook_library = {}
+        self.instrumentation = Instrumentation()
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def get_active_hooks(self, hooks: list) -> list:
+        return ["lease_cmds"]
+
+    def send_command(
+        self, command: str, service: str, required_hook: str = ""
+    ) -> KeaResponse:
+        config = {
+            "subnet4": [{"id": 1, "subnet": "192.0.1.0/24"}],
+            "shared-networks": [
+                {
+                    "name": "network",
+                    "subnet4": [
+                        {"id": subnet_id, "subnet": f"192.0.{subnet_id}.0/24"}
+                        for subnet_id in (2, 3, 4, 5)
+                    ],
+                }
+            ],
+        }
+        return KeaResponse(result=0, arguments={"Dhcp4": config})
+
+    def send_command_with_arguments(
+        self, command: str, service: str, arguments: dict, required_hook: str = ""
+    ) -> KeaResponse:
+        if command == "statistic-get-all":
+            return KeaResponse(
+                result=0,
+                arguments={
+                    f"subnet[{subnet_id}].assigned-addresses": [[count, ""]]
+                    for subnet_id, count in LEASE_COUNTS.items()
+                },
+            )
+
+        assert command == "lease4-get-all"
+        with self.lock:
+            self.requests.append(arguments["subnets"])
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+        time.sleep(self.delay)
+        leases = [
+            {
+                "ip-address": f"192.0.{subnet_id}.{host}",
+                "subnet-id": subnet_id,
+                "valid-lft": 3600,
+                "cltt": 1700000000,
+            }
+            for subnet_id in arguments["subnets"]
+            for host in range(1, LEASE_COUNTS[subnet_id] + 1)
+        ]
+        with self.lock:
+            self.active -= 1
+
+        if not leases:
+            return KeaResponse(result=3, text="0 IPv4 lease(s) found.")
+        return KeaResponse(result=0, arguments={"leases": leases})
+
+
+def test_ci_kea_leases_shard_subnets():
+    assert shard_subnets(LEASE_COUNTS, 2) == [[1, 2, 5], [3, 4]]
+    assert shard_subnets(LEASE_COUNTS, 10) == [[1], [3], [4], [2], [5]]
+    assert shard_subnets({}, 4) == []
+
+
+def test_ci_kea_leases_dump_leases():
+    api = OfflineShardApi(delay=0.05)
+    dhcp4 = Dhcp4(api)
+
+    leases = list(dump_leases(dhcp4, max_workers=2, shards=3))
+    assert len(leases) == sum(LEASE_COUNTS.values())
+    assert len({lease.ip_address for lease in leases}) == len(leases)
+    assert isinstance(leases[0], Lease4Record)
+    assert sorted(subnet for shard in api.requests for subnet in shard) == [
+        1,
+        2,
+        3,
+        4,
+        5,
+    ]
+    assert len(api.requests) == 3
+    assert api.max_active == 2
+
+    leases = list(dump_leases(dhcp4, subnet_ids=[2, 5], records=False))
+    assert {lease.subnet_id for lease in leases} == {2}
+    assert isinstance(leases[0], Lease4)
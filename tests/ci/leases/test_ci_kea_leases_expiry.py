@@ -0,0 +1,121 @@
+import threading
+import time
+from pykeadhcp.instrumentation import Instrumentation
+from pykeadhcp.leases import LeaseExpiryScheduler
+from pykeadhcp.models.records import Lease4Record
+
+NOW = 1700000000
+
+
+def lease(address: str, cltt: int, valid_lft: int = 100, state: int = 0):
+    return Lease4Record(ip_address=address, cltt=cltt, valid_lft=valid_lft, state=state)
+
+
+def test_ci_kea_leases_expiry_events():
+    instrumentation = Instrumentation()
+    expired = []
+    instrumentation.add_hook(
+        "lease_expired", lambda event, lease, expire: expired.append(lease.ip_address)
+    )
+    scheduler = LeaseExpiryScheduler(warning=10, instrumentation=instrumentation)
+    assert (
+        scheduler.update(
+            [
+                lease("192.0.2.1", NOW),
+                lease("192.0.2.2", NOW + 50),
+                lease("192.0.2.3", NOW, valid_lft=0),  # deleted
+                lease("192.0.2.4", NOW, state=2),  # expired-reclaimed
+            ]
+        )
+        == 2
+    )
+    assert len(scheduler) == 2
+    assert scheduler.next_event_at() == NOW + 90
+
+    assert scheduler.poll(now=NOW + 89) == []
+    assert [(event, lease.ip_address) for event, lease in scheduler.poll(NOW + 95)] == [
+        ("lease_expiring", "192.0.2.1")
+    ]
+    assert scheduler.next_event_at() == NOW + 100
+
+    # Renewing a lease before it expires reschedules it, the same lease again is a no-op
+    assert scheduler.update([lease("192.0.2.1", NOW + 60)]) == 1
+    assert scheduler.update([lease("192.0.2.1", NOW + 60)]) == 0
+    assert scheduler.poll(now=NOW + 100) == []
+
+    events = scheduler.poll(now=NOW + 200)
+    assert [(event, lease.ip_address) for event, lease in events] == [
+        ("lease_expiring", "192.0.2.2"),
+        ("lease_expiring", "192.0.2.1"),
+        ("lease_expired", "192.0.2.2"),
+        ("lease_expired", "192.0.2.1"),
+    ]
+    assert expired == ["192.0.2.2", "192.0.2.1"]
+    assert instrumentation.get_counters() == {
+        "lease_expiring": 3,
+        "lease_expired": 2,
+    }
+    assert len(scheduler) == 0
+    assert scheduler.next_event_at() is None
+
+
+def test_ci_kea_leases_expiry_replace_and_compact():
+    scheduler = LeaseExpiryScheduler()
+    scheduler.update(lease(f"10.0.{i // 256}.{i % 256}", NOW) for i in range(5000))
+    for cltt in range(1, 4):
+        scheduler.update(
+            lease(f"10.0.{i // 256}.{i % 256}", NOW + cltt) for i in range(5000)
+        )
+    assert len(scheduler._heap) <= 2 * len(scheduler) + 1024
+
+    scheduler.update([lease("10.0.0.1", NOW + 3)], replace=True)
+    assert len(scheduler) == 1
+    assert scheduler.next_event_at() == NOW + 103
+    scheduler.remove("10.0.0.1")
+    assert scheduler.poll(now=NOW + 1000) == []
+
+
+def test_ci_kea_leases_expiry_event_stream():
+    scheduler = LeaseExpiryScheduler()
+    stop = threading.Event()
+    now = int(time.time())
+    scheduler.update([lease("192.0.2.1", now - 100, valid_lft=99)])
+
+    def add_lease():
+        time.sleep(0.05)
+        scheduler.update([lease("192.0.2.2", now - 100, valid_lft=99)])
+
+    threading.Thread(target=add_lease).start()
+    events = []
+    for event, expired_lease in scheduler.events(stop=stop, max_wait=5):
+        events.append(expired_lease.ip_address)
+        if len(events) == 2:
+            stop.set()
+
+    assert events == ["192.0.2.1", "192.0.2.2"]
+
+
+def test_ci_kea_leases_expiry_update_without_lock():
+    scheduler = LeaseExpiryScheduler()
+    scheduler.update([lease("192.0.2.1", NOW)])
+    paging = threading.Event()
+    finished = threading.Event()
+
+    def pages():
+        yield lease("192.0.2.2", NOW)
+        # Waiting for the next page from Kea
+        paging.set()
+        finished.wait(5)
+        yield Lease4Record(ip_address="192.0.2.3", valid_lft=100)  # no cltt
+
+    thread = threading.Thread(target=scheduler.update, args=(pages(),))
+    thread.start()
+    assert paging.wait(5)
+
+    # The scheduler isn't locked while leases are being paged
+    assert [lease.ip_address for _, lease in scheduler.poll(now=NOW + 100)] == [
+        "192.0.2.1"
+    ]
+    finished.set()
+    thread.join(5)
+    assert sorted(scheduler.leases) == ["192.0.2.2"]
@@ -0,0 +1,213 @@
+import csv
+import gzip
+import hashlib
+import json
+import pytest
+from pykeadhcp.daemons import Dhcp4
+from pykeadhcp.instrumentation import Instrumentation
+from pykeadhcp.leases import StreamingExporter, iter_reservations
+from pykeadhcp.models.dhcp4.lease import Lease4
+from pykeadhcp.models.generic import KeaResponse
+from pykeadhcp.models.records import Lease4Record
+
+
+def leases(count: int):
+    for host in range(count):
+        yield Lease4Record(
+            ip_address=f"192.0.{host // 250}.{host % 250 + 1}",
+            hw_address="aa:bb:cc:dd:ee:ff",
+            subnet_id=1,
+            valid_lft=3600,
+            cltt=1700000000,
+        )
+
+
+class OfflineHostApi:
+    def __init__(self, sources: list):
+        self.hook_library = {}
+        self.instrumentation = Instrumentation()
+        self.sources = sources
+        self.requests = []
+
+    def get_active_hooks(self, hooks: list) -> list:
+        return ["host_cmds"]
+
+    def send_command(
+        self, command: str, service: str, required_hook: str = ""
+    ) -> KeaResponse:
+        return KeaResponse(result=0, arguments={"Dhcp4": {}})
+
+    def send_command_with_arguments(
+        self, command: str, service: str, arguments: dict, required_hook: str = ""
+    ) -> KeaResponse:
+        assert command == "reservation-get-page"
+        self.requests.append(arguments)
+        index = arguments["source-index"]
+        hosts = []
+        while index < len(self.sources):
+            hosts = [
+                host
+                for host in self.sources[index]
+                if host["host-id"] > arguments["from"]
+            ][: arguments["limit"]]
+            if hosts:
+                break
+            index += 1
+            arguments = {**arguments, "from": 0}
+
+        if not hosts:
+            return KeaResponse(result=3, arguments={"count": 0, "hosts": []})
+
+        return KeaResponse(
+            result=0,
+            arguments={
+                "count": len(hosts),
+                "hosts": hosts,
+                "next": {"from": hosts[-1]["host-id"], "source-index": index},
+            },
+        )
+
+
+def test_ci_kea_leases_export_ndjson_gzip_chunks(tmp_path):
+    with StreamingExporter(
+        tmp_path, prefix="leases4", compression="gzip", max_chunk_size=20000
+    ) as exporter:
+        exporter.write_all(leases(500))
+        exporter.write(Lease4.parse_obj({"ip-address": "10.0.0.1", "subnet-id": 2}))
+
+    manifest = json.loads((tmp_path / "leases4.manifest.json").read_text())
+    assert manifest == exporter.manifest
+    assert manifest["rows"] == 501
+    assert len(manifest["chunks"]) > 1
+
+    rows = []
+    for chunk in manifest["chunks"]:
+        data = (tmp_path / chunk["file"]).read_bytes()
+        assert chunk["file"].endswith(".ndjson.gz")
+        assert chunk["size"] == len(data)
+        assert chunk["sha256"] == hashlib.sha256(data).hexdigest()
+        lines = gzip.decompress(data).decode().splitlines()
+        assert len(lines) == chunk["rows"]
+        rows += [json.loads(line) for line in lines]
+
+    assert rows[0] == {
+        "ip-address": "192.0.0.1",
+        "hw-address": "aa:bb:cc:dd:ee:ff",
+        "subnet-id": 1,
+        "valid-lft": 3600,
+        "cltt": 1700000000,
+    }
+    assert rows[-1] == {"ip-address": "10.0.0.1", "subnet-id": 2}
+
+
+def test_ci_kea_leases_export_csv_reservations(tmp_path):
+    sources = [
+        [{"host-id": 1, "hw-address": "aa:aa:aa:aa:aa:01", "ip-address": "192.0.2.1"}],
+        [
+            {
+                "host-id": host_id,
+                "hw-address": f"aa:aa:aa:aa:aa:{host_id:02x}",
+                "ip-address": f"192.0.2.{host_id}",
+                "option-data": [{"name": "domain-name", "data": "example.com"}],
+            }
+            for host_id in range(1, 6)
+        ],
+    ]
+    dhcp4 = Dhcp4(OfflineHostApi(sources))
+    reservations = list(iter_reservations(dhcp4, page_size=2))
+    assert [reservation.ip_address for reservation in reservations] == [
+        "192.0.2.1",
+        "192.0.2.1",
+        "192.0.2.2",
+        "192.0.2.3",
+        "192.0.2.4",
+        "192.0.2.5",
+    ]
+
+    exporter = StreamingExporter(
+        tmp_path,
+        prefix="reservations",
+        format="csv",
+        columns=["ip-address", "hw-address", "option-data"],
+    )
+    exporter.write_all(reservations)
+    manifest = exporter.close()
+    assert manifest["rows"] == 6
+    assert manifest["chunks"][0]["file"] == "reservations-00000.csv"
+
+    with open(tmp_path / "reservations-00000.csv", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert rows[0] == {
+        "ip-address": "192.0.2.1",
+        "hw-address": "aa:aa:aa:aa:aa:01",
+        "option-data": "",
+    }
+    assert json.loads(rows[1]["option-data"])[0]["data"] == "example.com"
+
+
+def test_ci_kea_leases_export_errors(tmp_path):
+    with pytest.raises(ValueError):
+        StreamingExporter(tmp_path, format="xml")
+
+    exporter = StreamingExporter(
+        tmp_path, format="csv", columns=["ip-address"], queue_size=1
+    )
+    exporter.write({"ip-address": "192.0.2.1"})
+    exporter.write("not a row")
+    with pytest.raises(AttributeError):
+        exporter.write_all({"ip-address": "192.0.2.2"} for _ in range(10))
+        exporter.close()
+
+
+def test_ci_kea_leases_export_csv_default_columns(tmp_path):
+    exporter = StreamingExporter(tmp_path, prefix="leases4", format="csv")
+    exporter.write(Lease4Record(ip_address="192.0.2.1", subnet_id=1))
+    exporter.write(
+        Lease4Record(
+            ip_address="192.0.2.2",
+            subnet_id=1,
+            hw_address="aa:bb:cc:dd:ee:ff",
+            hostname="host-2",
+        )
+    )
+    manifest = exporter.close()
+    assert manifest["columns"] == list(Lease4Record._aliases)
+
+    with open(tmp_path / "leases4-00000.csv", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert rows[0]["hostname"] == ""
+    assert rows[1]["hostname"] == "host-2"
+    assert rows[1]["hw-address"] == "aa:bb:cc:dd:ee:ff"
+
+    exporter = StreamingExporter(tmp_path, prefix="hosts", format="csv")
+    exporter.write({"ip-address": "192.0.2.1"})
+    with pytest.raises(ValueError):
+        exporter.close()
+
+
+class LastPageApi(OfflineHostApi):
+    # Some Kea versions leave out the next cursor on the last page
+    def send_command_with_arguments(self, *args, **kwargs) -> KeaResponse:
+        response = super().send_command_with_arguments(*args, **kwargs)
+        arguments = response.arguments or {}
+        if arguments.get("hosts") and arguments["hosts"][-1]["host-id"] == 3:
+            arguments.pop("next")
+        return response
+
+
+def test_ci_kea_leases_export_reservations_last_page():
+    sources = [
+        [
+            {"host-id": host_id, "hw-address": f"aa:aa:aa:aa:aa:{host_id:02x}"}
+            for host_id in range(1, 4)
+        ]
+    ]
+    for page_size in (2, 10):
+        dhcp4 = Dhcp4(LastPageApi(sources))
+        reservations = list(iter_reservations(dhcp4, page_size=page_size))
+        assert [reservation.hw_address for reservation in reservations] == [
+            "aa:aa:aa:aa:aa:01",
+            "aa:aa:aa:aa:aa:02",
+            "aa:aa:aa:aa:aa:03",
+        ]
+        assert len(dhcp4.api.requests) == (2 if page_size == 2 else 1)
@@ -0,0 +1,138 @@
+from ipaddress import ip_address
+from pykeadhcp.daemons import Dhcp4
+from pykeadhcp.instrumentation import Instrumentation
+from pykeadhcp.leases import LeaseIndex
+from pykeadhcp.models.generic import KeaResponse
+
+
+class OfflineLeaseApi:
+    def __init__(self):
+        self.hook_library = {}
+        self.instrumentation = Instrumentation()
+        self.commands = []
+        self.leases = {}
+        self.cumulative = {}
+
+    def add_lease(self, address: str, subnet_id: int, hw_address: str, **kwargs):
+        self.leases[address] = {
+            "ip-address": address,
+            "subnet-id": subnet_id,
+            "hw-address": hw_address,
+            "valid-lft": 3600,
+            "cltt": 1700000000,
+            **kwargs,
+        }
+        self.cumulative[subnet_id] = self.cumulative.get(subnet_id, 0) + 1
+
+    def get_active_hooks(self, hooks: list) -> list:
+        return ["lease_cmds"]
+
+    def send_command(
+        self, command: str, service: str, required_hook: str = ""
+    ) -> KeaResponse:
+        self.commands.append(command)
+        return KeaResponse(result=0, arguments={"Dhcp4": {"hooks-libraries": []}})
+
+    def send_command_with_arguments(
+        self, command: str, service: str, arguments: dict, required_hook: str = ""
+    ) -> KeaResponse:
+        self.commands.append(command)
+        if command == "statistic-get-all":
+            statistics = {}
+            for subnet_id, cumulative in self.cumulative.items():
+                assigned = sum(
+                    lease["subnet-id"] == subnet_id for lease in self.leases.values()
+                )
+                statistics[f"subnet[{subnet_id}].assigned-addresses"] = [[assigned, ""]]
+                statistics[f"subnet[{subnet_id}].cumulative-assigned-addresses"] = [
+                    [cumulative, ""]
+                ]
+                statistics[f"subnet[{subnet_id}].pool[0].assigned-addresses"] = [
+                    [assigned, ""]
+                ]
+            return KeaResponse(result=0, arguments=statistics)
+
+        if command == "lease4-get-page":
+            leases = sorted(
+                self.leases.values(), key=lambda l: ip_address(l["ip-address"])
+            )
+            if arguments["from"] != "start":
+                start = ip_address(arguments["from"])
+                leases = [l for l in leases if ip_address(l["ip-address"]) > start]
+            leases = leases[: arguments["limit"]]
+            return KeaResponse(
+                result=0 if leases else 3,
+                arguments={"leases": leases, "count": len(leases)},
+            )
+
+        if command == "lease4-get-all":
+            leases = [
+                lease
+                for lease in self.leases.values()
+                if lease["subnet-id"] in arguments["subnets"]
+            ]
+            return KeaResponse(
+                result=0 if leases else 3,
+                arguments={"leases": leases} if leases else None,
+            )
+
+        return KeaResponse(result=2, text=f"'{command}' command not supported.")
+
+
+def test_ci_kea_leases_index_load_and_lookup():
+    api = OfflineLeaseApi()
+    for host in range(1, 8):
+        api.add_lease(
+            f"192.0.2.{host}",
+            subnet_id=1 + host % 2,
+            hw_address=f"AA:BB:CC:DD:EE:0{host}",
+            hostname=f"Host{host}",
+            **{"client-id": f"01:0{host}"},
+        )
+
+    index = LeaseIndex(Dhcp4(api), page_size=3)
+    assert index.load() == 7
+    assert api.commands.count("lease4-get-page") == 3
+    assert len(index) == 7
+    assert "192.0.2.1" in index
+
+    assert index.get_by_ip("192.0.2.3").hostname == "Host3"
+    assert index.get_by_ip("192.0.2.99") is None
+    assert [
+        lease.ip_address for lease in index.get_by_hw_address("aa:bb:cc:dd:ee:04")
+    ] == ["192.0.2.4"]
+    assert index.get_by_client_id("01:05")[0].ip_address == "192.0.2.5"
+    assert index.get_by_hostname("HOST6")[0].ip_address == "192.0.2.6"
+    assert sorted(lease.ip_address for lease in index.get_by_subnet(2)) == [
+        "192.0.2.1",
+        "192.0.2.3",
+        "192.0.2.5",
+        "192.0.2.7",
+    ]
+
+
+def test_ci_kea_leases_index_refresh_changed_subnets():
+    api = OfflineLeaseApi()
+    api.add_lease("192.0.2.1", subnet_id=1, hw_address="aa:aa:aa:aa:aa:01")
+    api.add_lease("192.0.2.2", subnet_id=2, hw_address="aa:aa:aa:aa:aa:02")
+    api.add_lease("192.0.2.3", subnet_id=3, hw_address="aa:aa:aa:aa:aa:03")
+    index = LeaseIndex(Dhcp4(api))
+    index.load()
+
+    assert index.refresh() == []
+    assert "lease4-get-all" not in api.commands
+
+    # Subnet 1 gets a new lease, the lease of subnet 2 is released and subnet 3 is removed
+    api.add_lease("192.0.2.10", subnet_id=1, hw_address="aa:aa:aa:aa:aa:01")
+    del api.leases["192.0.2.2"]
+    del api.leases["192.0.2.3"]
+    del api.cumulative[3]
+    assert index.refresh() == [1, 2, 3]
+    assert sorted(
+        lease.ip_address for lease in index.get_by_hw_address("aa:aa:aa:aa:aa:01")
+    ) == ["192.0.2.1", "192.0.2.10"]
+    assert index.get_by_ip("192.0.2.2") is None
+    assert index.get_by_subnet(2) == []
+    assert index.get_by_ip("192.0.2.3") is None
+    assert index.by_hw_address.get("aa:aa:aa:aa:aa:03") is None
+    assert index.statistics.keys() == {1, 2}
@@ -0,0 +1,109 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pykeadhcp.leases.memfile import get_memfile_paths, read_memfile_leases
+from pykeadhcp.models.dhcp4.lease import Lease4
+from pykeadhcp.models.dhcp6.lease import Lease6
+from pykeadhcp.models.records import Lease4Record
+
+LEASE4_HEADER = "address,hwaddr,client_id,valid_lifetime,expire,subnet_id,fqdn_fwd,fqdn_rev,hostname,state,user_context\n"
+LEASE6_HEADER = "address,duid,valid_lifetime,expire,subnet_id,pref_lifetime,lease_type,iaid,prefix_len,fqdn_fwd,fqdn_rev,hostname,hwaddr,state,user_context,hwtype,hwaddr_source\n"
+
+
+def lease4(address: str, expire: int, valid: int = 3600, hostname: str = "") -> str:
+    return f"{address},aa:bb:cc:dd:ee:ff,01aabb,{valid},{expire},1,0,0,{hostname},0,\n"
+
+
+def test_ci_kea_leases_memfile_latest_entry(tmp_path):
+    now = int(time.time())
+    path = tmp_path / "kea-leases4.csv"
+    path.write_text(
+        LEASE4_HEADER
+        + lease4("192.0.2.10", now + 100)
+        + lease4("192.0.2.11", now + 100)
+        + lease4("192.0.2.12", now - 100)  # expired
+        + lease4("192.0.2.10", now + 200, hostname="host&#x2c1")
+        + lease4("192.0.2.11", now, valid=0)  # deleted
+        + "192.0.2.13,aa:bb"  # incomplete line
+    )
+    leases = list(read_memfile_leases(str(path), now=now))
+    assert [lease.ip_address for lease in leases] == ["192.0.2.10"]
+    assert isinstance(leases[0], Lease4)
+    assert leases[0].hostname == "host,1"
+    assert leases[0].client_id == "01aabb"
+    assert leases[0].cltt == now + 200 - 3600
+
+    leases = list(read_memfile_leases(str(path), now=now, include_expired=True))
+    assert [lease.ip_address for lease in leases] == ["192.0.2.10", "192.0.2.12"]
+
+
+def test_ci_kea_leases_memfile_lfc_files(tmp_path):
+    now = int(time.time())
+    path = tmp_path / "kea-leases4.csv"
+    (tmp_path / "kea-leases4.csv.2").write_text(
+        LEASE4_HEADER + lease4("192.0.2.10", now + 100)
+    )
+    (tmp_path / "kea-leases4.csv.1").write_text(
+        LEASE4_HEADER + lease4("192.0.2.11", now + 100)
+    )
+    path.write_text(LEASE4_HEADER + lease4("192.0.2.10", now, valid=0))
+
+    paths = get_memfile_paths(str(path))
+    assert [path.name for path in paths] == [
+        "kea-leases4.csv.2",
+        "kea-leases4.csv.1",
+        "kea-leases4.csv",
+    ]
+    leases = list(read_memfile_leases(paths, now=now, records=True))
+    assert leases == [Lease4Record.from_dict(leases[0].to_dict())]
+    assert leases[0].ip_address == "192.0.2.11"
+
+
+def test_ci_kea_leases_memfile_rotated_headers(tmp_path):
+    now = int(time.time())
+    path = tmp_path / "kea-leases4.csv"
+    # Written by an older Kea without the state and user_context columns
+    (tmp_path / "kea-leases4.csv.1").write_text(
+        "address,hwaddr,client_id,valid_lifetime,expire,subnet_id,fqdn_fwd,fqdn_rev,hostname\n"
+        f"192.0.2.10,aa:bb:cc:dd:ee:01,01aabb,3600,{now + 100},2,1,0,old\n"
+        f"192.0.2.11,aa:bb:cc:dd:ee:02,,3600,{now + 100},2,0,0,\n"
+    )
+    path.write_text(LEASE4_HEADER + lease4("192.0.2.11", now + 200, hostname="new"))
+
+    leases = list(read_memfile_leases(get_memfile_paths(str(path)), now=now))
+    assert [lease.ip_address for lease in leases] == ["192.0.2.10", "192.0.2.11"]
+    assert leases[0].hw_address == "aa:bb:cc:dd:ee:01"
+    assert leases[0].subnet_id == 2
+    assert leases[0].fqdn_fwd is True
+    assert leases[0].hostname == "old"
+    assert leases[0].state == 0
+    assert leases[1].subnet_id == 1
+    assert leases[1].hostname == "new"
+
+
+def test_ci_kea_leases_memfile_parallel(tmp_path):
+    now = int(time.time())
+    path = tmp_path / "kea-leases6.csv"
+    with path.open("w") as leases:
+        leases.write(LEASE6_HEADER)
+        for index in range(2000):
+            leases.write(
+                f"2001:db8::{index % 1000:x},00:01:02,3600,{now + index},1,1800,0,{index},128,0,0,,,0,,1,0\n"
+            )
+        leases.write(
+            f"2001:db8:1::,00:01:02,3600,{now + 100},1,1800,2,1,64,0,0,,,0,,1,0\n"
+        )
+
+    expected = list(read_memfile_leases(str(path), version=6, now=now))
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        leases = list(
+            read_memfile_leases(
+                str(path), version=6, now=now, executor=executor, chunk_size=4096
+            )
+        )
+
+    assert leases == expected
+    assert len(leases) == 1001
+    assert isinstance(leases[0], Lease6)
+    assert leases[0].iaid == 1000
+    assert leases[-1].type == "IA_PD"
+    assert leases[-1].prefix_len == 64
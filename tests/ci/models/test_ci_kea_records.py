@@ -0,0 +1,74 @@
+import pickle
+import tracemalloc
+import pytest
+from pykeadhcp.models.dhcp4.lease import Lease4
+from pykeadhcp.models.dhcp6.reservation import Reservation6
+from pykeadhcp.models.records import Lease4Record, Lease6Record, Reservation6Record
+
+LEASE = {
+    "cltt": 1690000000,
+    "fqdn-fwd": False,
+    "fqdn-rev": False,
+    "hostname": "pykeadhcp",
+    "hw-address": "aa:bb:cc:dd:ee:ff",
+    "ip-address": "192.0.2.10",
+    "state": 0,
+    "subnet-id": 1,
+    "valid-lft": 3600,
+    "client-id": "01aabbccddeeff",
+}
+
+
+def test_ci_kea_records_conversion():
+    record = Lease4Record.from_dict(LEASE)
+    assert record.ip_address == "192.0.2.10"
+    assert record[list(Lease4.__fields__).index("subnet_id")] == 1
+    assert len(record) == len(Lease4.__fields__)
+
+    model = record.to_model()
+    assert isinstance(model, Lease4)
+    assert model == Lease4.parse_obj(LEASE)
+    assert Lease4Record.from_model(model) == record
+    assert pickle.loads(pickle.dumps(record)) == record
+
+    with pytest.raises(AttributeError):
+        record.state = 1
+
+    reservation = Reservation6Record.from_dict(
+        {
+            "duid": "01:02:03:04",
+            "ip-addresses": ["2001:db8::10"],
+            "option-data": [{"code": 23, "data": "2001:db8::1"}],
+        }
+    )
+    model = reservation.to_model()
+    assert model.option_data[0].code == 23
+    assert Reservation6Record.from_model(model).to_model() == model
+
+
+def test_ci_kea_records_unknown_field():
+    with pytest.raises(TypeError):
+        Lease6Record(ip_address="2001:db8::10", unknown=True)
+
+
+def measure(factory, count: int = 10000) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(index) for index in range(count)]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert len(objects) == count
+    return size / count
+
+
+def test_ci_kea_records_memory():
+    # Strings are shared between both benchmarks so only the objects are measured
+    leases = [
+        {**LEASE, "ip-address": f"10.{index // 256}.{index % 256}.1"}
+        for index in range(10000)
+    ]
+    model_size = measure(lambda index: Lease4.parse_obj(leases[index]))
+    record_size = measure(lambda index: Lease4Record.from_dict(leases[index]))
+    # A record is a tuple of its values, about 140 bytes vs 1 KB for a model
+    assert record_size < 200
+    assert record_size * 3 < model_size
@@ -0,0 +1,191 @@
+import json
+import pytest
+from pykeadhcp.models.dhcp6.reservation import Reservation6
+from pykeadhcp.parsers.allocator import Allocator, IntervalIndex, IntervalSet
+from pykeadhcp.parsers.dhcp4 import Dhcp4Parser
+from pykeadhcp.parsers.dhcp6 import Dhcp6Parser
+from pykeadhcp.parsers.exceptions import ParserNoFreeSpaceError
+
+
+@pytest.fixture
+def dhcp4_allocator():
+    with open("tests/configs/dhcp4_api_config.json") as config:
+        return Allocator(Dhcp4Parser(config=json.load(config)))
+
+
+@pytest.fixture
+def dhcp6_allocator():
+    with open("tests/configs/dhcp6_api_config.json") as config:
+        return Allocator(Dhcp6Parser(config=json.load(config)))
+
+
+def test_ci_kea_interval_set_merge():
+    intervals = IntervalSet([(10, 20), (1, 3), (4, 5), (30, 40)])
+    assert list(intervals) == [(1, 5), (10, 20), (30, 40)]
+
+    intervals.add(21, 29)
+    assert list(intervals) == [(1, 5), (10, 40)]
+    assert 15 in intervals
+    assert 7 not in intervals
+
+
+def test_ci_kea_interval_set_next_free():
+    intervals = IntervalSet([(0, 3), (6, 6)])
+    assert intervals.next_free(0, 100) == 4
+    assert intervals.next_free(0, 100, size=4, align=4) == 8
+    assert intervals.next_free(0, 10, size=4, align=4) is None
+
+
+def test_ci_kea_allocator_dhcp4_next_subnet_id(dhcp4_allocator: Allocator):
+    assert dhcp4_allocator.next_subnet_id() == 2
+
+
+def test_ci_kea_allocator_dhcp4_next_free_subnet(dhcp4_allocator: Allocator):
+    assert dhcp4_allocator.next_free_subnet("192.168.0.0/16", 24) == "192.168.0.0/24"
+    assert dhcp4_allocator.next_free_subnet("192.168.1.0/24", 25) is None
+    assert dhcp4_allocator.next_free_subnet("192.168.1.0/23", 24) == "192.168.0.0/24"
+
+
+def test_ci_kea_allocator_dhcp4_next_free_address(dhcp4_allocator: Allocator):
+    # .1 is the router, .10 and .11 are reserved
+    assert dhcp4_allocator.next_free_address(1) == "192.168.1.2"
+
+
+def test_ci_kea_allocator_dhcp4_tracks_parser_changes(dhcp4_allocator: Allocator):
+    parser = dhcp4_allocator.parser
+    parser.add_subnet(id=2, subnet="192.168.0.0/24")
+    assert dhcp4_allocator.next_subnet_id() == 3
+    assert dhcp4_allocator.next_free_subnet("192.168.0.0/16", 24) == "192.168.2.0/24"
+
+    parser.remove_subnet(id=2)
+    assert dhcp4_allocator.next_subnet_id() == 2
+
+
+def test_ci_kea_allocator_dhcp4_allocate(dhcp4_allocator: Allocator):
+    subnet = dhcp4_allocator.allocate_subnet("10.0.0.0/30", 31)
+    assert subnet.id == 2
+    assert subnet.subnet == "10.0.0.0/31"
+    assert dhcp4_allocator.revision == dhcp4_allocator.parser.revision
+
+    reservation = dhcp4_allocator.allocate_reservation(
+        id=2, hw_address="aa:bb:cc:dd:ee:ff"
+    )
+    assert reservation.ip_address == "10.0.0.0"
+
+    dhcp4_allocator.allocate_subnet("10.0.0.0/30", 31)
+    with pytest.raises(ParserNoFreeSpaceError):
+        dhcp4_allocator.allocate_subnet("10.0.0.0/30", 31)
+
+
+def test_ci_kea_allocator_dhcp6_next_free_subnet(dhcp6_allocator: Allocator):
+    # 2001:db8::/48 is used by the PD pool
+    assert dhcp6_allocator.next_free_subnet("2001:db8::/32", 48) == "2001:db8:1::/48"
+    assert (
+        dhcp6_allocator.next_free_subnet("2001:db8:1000::/48", 64)
+        == "2001:db8:1000::/64"
+    )
+
+
+def test_ci_kea_allocator_dhcp6_next_free_delegated_prefix(dhcp6_allocator: Allocator):
+    assert dhcp6_allocator.next_free_delegated_prefix(1) == "2001:db8::/56"
+
+    dhcp6_allocator.parser.add_reservation_to_subnet(
+        id=1,
+        ip_address="2001:db8:1000:6464::10",
+        duid="01:02:03:04",
+        prefixes=["2001:db8::/56"],
+    )
+    assert dhcp6_allocator.next_free_delegated_prefix(1) == "2001:db8:0:100::/56"
+    assert dhcp6_allocator.next_free_address(1) == "2001:db8:1000:6464::1"
+
+
+def test_ci_kea_interval_set_remove():
+    intervals = IntervalSet([(1, 10), (20, 30)])
+    intervals.remove(5, 22)
+    assert list(intervals) == [(1, 4), (23, 30)]
+    intervals.remove(0, 100)
+    assert list(intervals) == []
+
+
+def test_ci_kea_interval_index_discard():
+    # A pool of .10-.20 with a reservation inside it and a /28 around both
+    intervals = IntervalIndex([(10, 20), (15, 15), (15, 15), (0, 15)])
+    intervals.discard(15, 15)
+    assert list(intervals) == [(0, 20)]
+
+    intervals.discard(10, 20)
+    assert list(intervals) == [(0, 15)]
+
+    intervals.discard(0, 15)
+    assert list(intervals) == [(15, 15)]
+    intervals.discard(15, 15)
+    assert list(intervals) == []
+
+
+def assert_same_indexes(allocator: Allocator):
+    # Any lookup brings the indexes up to date
+    allocator.next_subnet_id()
+    rebuilt = Allocator(allocator.parser)
+    assert list(allocator.subnet_ids) == list(rebuilt.subnet_ids)
+    assert list(allocator.networks) == list(rebuilt.networks)
+    assert {id: list(used) for id, used in allocator.addresses.items()} == {
+        id: list(used) for id, used in rebuilt.addresses.items()
+    }
+    assert {id: list(used) for id, used in allocator.prefixes.items()} == {
+        id: list(used) for id, used in rebuilt.prefixes.items()
+    }
+
+
+def test_ci_kea_allocator_dhcp4_incremental(dhcp4_allocator: Allocator, monkeypatch):
+    parser = dhcp4_allocator.parser
+    assert dhcp4_allocator.next_subnet_id() == 2
+
+    # Changes made through the parser are applied without rebuilding the indexes
+    def refresh():
+        raise AssertionError("indexes rebuilt")
+
+    monkeypatch.setattr(dhcp4_allocator, "refresh", refresh)
+    parser.add_subnet(id=2, subnet="10.0.0.0/24")
+    parser.add_pool_to_subnet(id=2, start="10.0.0.1", end="10.0.0.10")
+    parser.add_reservation_to_subnet(id=2, ip_address="10.0.0.5", hw_address="aa:aa")
+    parser.add_reservation_to_subnet(id=2, ip_address="10.0.0.11", hw_address="bb:bb")
+    assert dhcp4_allocator.next_free_address(2) == "10.0.0.12"
+    assert_same_indexes(dhcp4_allocator)
+
+    parser.remove_subnet_pool(id=2, pool="10.0.0.1-10.0.0.10")
+    assert dhcp4_allocator.next_free_address(2) == "10.0.0.1"
+    parser.remove_reservation(id=2, ip_address="10.0.0.11")
+    assert_same_indexes(dhcp4_allocator)
+
+    parser.add_shared_network(name="incremental")
+    parser.add_subnet_to_shared_network(id=2, name="incremental")
+    parser.remove_shared_network(name="incremental", keep_subnets=True)
+    assert dhcp4_allocator.next_subnet_id() == 3
+    assert_same_indexes(dhcp4_allocator)
+
+    parser.remove_subnet(id=2)
+    assert dhcp4_allocator.next_subnet_id() == 2
+    assert dhcp4_allocator.next_free_subnet("10.0.0.0/16", 24) == "10.0.0.0/24"
+    assert_same_indexes(dhcp4_allocator)
+
+
+def test_ci_kea_allocator_dhcp4_restore(dhcp4_allocator: Allocator):
+    parser = dhcp4_allocator.parser
+    snapshot = parser.snapshot()
+    dhcp4_allocator.allocate_subnet("10.0.0.0/16", 24)
+    assert dhcp4_allocator.next_subnet_id() == 3
+
+    # Undoing changes the allocator already indexed rebuilds the indexes
+    parser.restore(snapshot)
+    assert dhcp4_allocator.next_subnet_id() == 2
+    assert_same_indexes(dhcp4_allocator)
+
+
+def test_ci_kea_allocator_dhcp6_prefix_only_reservation(dhcp6_allocator: Allocator):
+    parser = dhcp6_allocator.parser
+    parser.add_reservations(
+        [Reservation6(duid="01:02", ip_addresses=None, prefixes=["2001:db8::/56"])],
+        subnet_id=1,
+    )
+    assert dhcp6_allocator.next_free_delegated_prefix(1) == "2001:db8:0:100::/56"
+    assert Allocator(parser).next_free_delegated_prefix(1) == "2001:db8:0:100::/56"
@@ -1,4 +1,6 @@
+import json
 import pytest
+from pykeadhcp.models.dhcp4.reservation import Reservation4
 from pykeadhcp.parsers.dhcp4 import Dhcp4Parser
 from pykeadhcp.parsers.exceptions import (
     ParserSubnetIDAlreadyExistError,
@@ -192,3 +194,18 @@ def test_kea_dhcp4_parser_remove_shared_network(dhcp4_parser: Dhcp4Parser):
     dhcp4_parser.remove_shared_network(name="pykeadhcp-dhcp4-parser")
     shared_network = dhcp4_parser.get_shared_network(name="pykeadhcp-dhcp4-parser")
     assert shared_network == None
+
+
+def test_kea_dhcp4_parser_add_reservations_copies():
+    with open("tests/configs/dhcp4_api_config.json") as config:
+        parser = Dhcp4Parser(config=json.load(config))
+
+    reservation = Reservation4(
+        ip_address="192.168.1.200", hw_address="aa:bb:cc:dd:ee:20", subnet_id=1
+    )
+    assert parser.add_reservations([reservation]) == 1
+    assert reservation.subnet_id == 1
+
+    added = parser.get_reservation_by_ip("192.168.1.200")
+    assert added is not reservation
+    assert added.subnet_id is None
@@ -1,4 +1,6 @@
+import json
 import pytest
+from pykeadhcp.models.dhcp6.reservation import Reservation6
 from pykeadhcp.parsers.dhcp6 import Dhcp6Parser
 from pykeadhcp.parsers.exceptions import (
     ParserSharedNetworkAlreadyExistError,
@@ -9,6 +11,8 @@ from pykeadhcp.parsers.exceptions import (
     ParserReservationAlreadyExistError,
     ParserSubnetPoolAlreadyExistError,
     ParserPoolAddressNotInSubnetError,
+    ParserReservationIdentifierAlreadyExistError,
+    ParserReservationPrefixAlreadyExistError,
 )
 
 
@@ -223,3 +227,42 @@ def test_kea_dhcp6_parser_remove_shared_network(dhcp6_parser: Dhcp6Parser):
     dhcp6_parser.remove_shared_network(name="pykeadhcp-dhcp6-parser")
     shared_network = dhcp6_parser.get_shared_network(name="pykeadhcp-dhcp6-parser")
     assert shared_network == None
+
+
+def test_kea_dhcp6_parser_add_reservations_prefixes():
+    with open("tests/configs/dhcp6_api_config.json") as config:
+        parser = Dhcp6Parser(config=json.load(config))
+
+    # The caller's reservation keeps its subnet_id, only the added copy is cleared
+    reservation = Reservation6(
+        duid="01:02:03:04", prefixes=["2001:db8:0:100::/56"], subnet_id=1
+    )
+    added = parser.add_reservations([reservation])
+    assert added == 1
+    assert reservation.subnet_id == 1
+    assert parser.get_subnet(1).reservations[0] is not reservation
+    assert parser.get_subnet(1).reservations[0].subnet_id is None
+
+    # Kea doesn't require reserved prefixes to match the delegated length of a PD pool
+    added = parser.add_reservations(
+        [Reservation6(duid="01:02:03:05", prefixes=["2001:db8::/64"])],
+        subnet_id=1,
+    )
+    assert added == 1
+
+    errors = []
+    added = parser.add_reservations(
+        [
+            Reservation6(duid="01:02:03:06", prefixes=["2001:db8:0:100::/56"]),
+            Reservation6(duid="01-02-03-04", prefixes=["2001:db8:0:200::/56"]),
+            Reservation6(duid="01:02:03:07", prefixes=["2001:db8:0:300::/56"]),
+        ],
+        subnet_id=1,
+        on_error=lambda reservation, error: errors.append(type(error)),
+    )
+    assert added == 1
+    assert errors == [
+        ParserReservationPrefixAlreadyExistError,
+        ParserReservationIdentifierAlreadyExistError,
+    ]
+    assert len(parser.get_subnet(1).reservations) == 3
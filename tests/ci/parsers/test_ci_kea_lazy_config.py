@@ -0,0 +1,86 @@
+import copy
+import json
+import pytest
+from pykeadhcp.models.dhcp4.config import Dhcp4DaemonConfig
+from pykeadhcp.models.dhcp4.subnet import Subnet4
+from pykeadhcp.models.enums import HostReservationIdentifierEnum
+from pykeadhcp.parsers.lazy import LazyDhcp4Config
+
+
+@pytest.fixture
+def config():
+    with open("tests/configs/dhcp4_api_config.json") as config:
+        data = json.load(config)
+
+    data["Dhcp4"]["shared-networks"] = [
+        {
+            "name": "pykeadhcp-lazy",
+            "subnet4": [
+                {
+                    "id": 20,
+                    "subnet": "192.0.2.0/24",
+                    "reservations": [
+                        {"hw-address": "aa:bb:cc:dd:ee:ff", "ip-address": "192.0.2.10"}
+                    ],
+                    "unknown-parameter": True,
+                }
+            ],
+        }
+    ]
+    return data
+
+
+def test_ci_kea_lazy_config_on_demand(config: dict, monkeypatch):
+    lazy = LazyDhcp4Config(config=config)
+    monkeypatch.setattr(
+        Subnet4, "parse_obj", lambda *args: pytest.fail("subnet parsed")
+    )
+    assert (
+        lazy.interfaces_config.interfaces
+        == config["Dhcp4"]["interfaces-config"]["interfaces"]
+    )
+    assert lazy.valid_lifetime == config["Dhcp4"]["valid-lifetime"]
+    assert lazy.subnet_ids() == [1, 20]
+    assert lazy.shared_network_names() == ["pykeadhcp-lazy"]
+
+    reservation = lazy.get_reservation_by(
+        HostReservationIdentifierEnum.hw_address, "aa:bb:cc:dd:ee:ff"
+    )
+    assert reservation.ip_address == "192.0.2.10"
+
+
+def test_ci_kea_lazy_config_memoised(config: dict):
+    lazy = LazyDhcp4Config(config=config)
+    reservation = lazy.get_reservation_by(
+        HostReservationIdentifierEnum.hw_address, "aa:bb:cc:dd:ee:ff", subnet_id=20
+    )
+    subnet = lazy.get_subnet(id=20)
+    assert subnet is lazy.get_subnet(id=20)
+    assert subnet.reservations[0] is reservation
+
+    shared_network = lazy.get_shared_network(name="pykeadhcp-lazy")
+    assert shared_network.subnet4[0] is subnet
+    assert lazy.get_subnet_by_cidr(cidr="192.0.2.0/24") is subnet
+    assert [subnet.id for subnet in lazy.iter_subnets()] == [1, 20]
+
+
+def test_ci_kea_lazy_config_dump(config: dict):
+    original = copy.deepcopy(config)
+    lazy = LazyDhcp4Config(config=config)
+    assert lazy.dump() == original
+    assert lazy.dump()["Dhcp4"]["subnet4"] is config["Dhcp4"]["subnet4"]
+
+    subnet = lazy.get_subnet(id=20)
+    subnet.valid_lifetime = 7200
+    subnet.reservations[0].hostname = "pykeadhcp"
+    lazy.get_subnet(id=1)
+
+    dump = lazy.dump()
+    assert config == original
+    dumped_subnet = dump["Dhcp4"]["shared-networks"][0]["subnet4"][0]
+    assert dumped_subnet["valid-lifetime"] == 7200
+    assert dumped_subnet["unknown-parameter"] is True
+    assert dumped_subnet["reservations"][0]["hostname"] == "pykeadhcp"
+    assert dump["Dhcp4"]["subnet4"] == original["Dhcp4"]["subnet4"]
+    assert dump["Dhcp4"]["option-data"] is config["Dhcp4"]["option-data"]
+    assert Dhcp4DaemonConfig.parse_obj(dump["Dhcp4"])
@@ -0,0 +1,77 @@
+import json
+import pytest
+import pydantic
+from pykeadhcp.parsers import cache as cache_module
+from pykeadhcp.parsers.cache import ParserCache, get_config_hash
+from pykeadhcp.parsers.dhcp4 import Dhcp4Parser
+
+
+@pytest.fixture
+def config():
+    with open("tests/configs/dhcp4_api_config.json") as config:
+        return json.load(config)
+
+
+def test_ci_kea_parser_cache_hash(config: dict):
+    assert get_config_hash(config) == get_config_hash(json.loads(json.dumps(config)))
+    assert get_config_hash({**config, "hash": "ABC"}) == "ABC"
+
+    original = get_config_hash(config)
+    config["Dhcp4"]["valid-lifetime"] = 1
+    assert get_config_hash(config) != original
+
+
+def test_ci_kea_parser_cache_load(config: dict, tmp_path, monkeypatch):
+    cache = ParserCache(tmp_path)
+    parser = cache.load(Dhcp4Parser, config)
+    assert cache.get_path(Dhcp4Parser, get_config_hash(config)).exists()
+
+    # A cache hit must not validate the configuration again
+    monkeypatch.setattr(
+        Dhcp4Parser, "__init__", lambda *args, **kwargs: pytest.fail("parsed again")
+    )
+    cached = cache.load(Dhcp4Parser, config)
+    assert cached.config == parser.config
+    assert cached.get_subnet(1).subnet == "192.168.1.0/24"
+    assert cached.journal == []
+
+
+def test_ci_kea_parser_cache_invalidate(config: dict, tmp_path):
+    cache = ParserCache(tmp_path)
+    cache.load(Dhcp4Parser, config)
+
+    config["Dhcp4"]["subnet4"][0]["subnet"] = "192.168.2.0/24"
+    parser = cache.load(Dhcp4Parser, config)
+
+    assert parser.get_subnet(1).subnet == "192.168.2.0/24"
+    assert len(list(tmp_path.glob("*.pickle"))) == 1
+
+    cache.clear()
+    assert list(tmp_path.glob("*.pickle")) == []
+
+
+def test_ci_kea_parser_cache_versions(config: dict, tmp_path, monkeypatch):
+    cache = ParserCache(tmp_path)
+    path = cache.get_path(Dhcp4Parser, get_config_hash(config))
+    assert f"pydantic{pydantic.VERSION}" in path.name
+
+    cache.load(Dhcp4Parser, config)
+    monkeypatch.setattr(cache_module, "get_cache_version", lambda: "0.0.1-pydantic1.0")
+    assert cache.get_path(Dhcp4Parser, get_config_hash(config)) != path
+    cache.load(Dhcp4Parser, config)
+
+    # Entries of other versions are replaced
+    assert [cached.name for cached in tmp_path.glob("*.pickle")] == [
+        cache.get_path(Dhcp4Parser, get_config_hash(config)).name
+    ]
+
+
+def test_ci_kea_parser_cache_incompatible(config: dict, tmp_path):
+    cache = ParserCache(tmp_path)
+    path = cache.get_path(Dhcp4Parser, get_config_hash(config))
+
+    # Pickle of a model class which no longer exists
+    path.write_bytes(b"cpykeadhcp.models.dhcp4.subnet\nRemovedSubnet4\n.")
+    parser = cache.load(Dhcp4Parser, config)
+    assert parser.get_subnet(1).subnet == "192.168.1.0/24"
+    assert ParserCache(tmp_path).load(Dhcp4Parser, config).config == parser.config
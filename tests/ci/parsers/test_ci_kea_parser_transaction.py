@@ -0,0 +1,143 @@
+import json
+import pytest
+from pykeadhcp.parsers.dhcp4 import Dhcp4Parser
+from pykeadhcp.parsers.dhcp6 import Dhcp6Parser
+from pykeadhcp.parsers.exceptions import (
+    ParserPoolAddressNotInSubnetError,
+    ParserSnapshotError,
+)
+
+
+@pytest.fixture
+def parser():
+    with open("tests/configs/dhcp4_api_config.json") as config:
+        return Dhcp4Parser(config=json.load(config))
+
+
+def test_ci_kea_parser_transaction_commit(parser: Dhcp4Parser):
+    with parser.transaction():
+        parser.add_subnet(id=10, subnet="192.0.2.0/24")
+        parser.add_pool_to_subnet(id=10, start="192.0.2.10", end="192.0.2.20")
+
+    assert parser.get_subnet(10).pools[0].pool == "192.0.2.10-192.0.2.20"
+    assert parser.revision == 2
+
+
+def test_ci_kea_parser_transaction_rollback(parser: Dhcp4Parser):
+    original = parser.config.copy(deep=True)
+    with pytest.raises(ParserPoolAddressNotInSubnetError):
+        with parser.transaction():
+            parser.add_shared_network(name="pykeadhcp")
+            parser.add_subnet(id=10, subnet="192.0.2.0/24")
+            parser.add_subnet_to_shared_network(id=10, name="pykeadhcp")
+            parser.remove_subnet(id=1)
+            parser.add_pool_to_subnet(id=10, start="192.0.2.10", end="10.0.0.1")
+
+    assert parser.config == original
+    assert parser.journal == []
+
+
+def test_ci_kea_parser_method_rollback(parser: Dhcp4Parser, monkeypatch):
+    parser.add_shared_network(name="pykeadhcp")
+    parser.add_subnet(id=10, subnet="192.0.2.0/24")
+    parser.add_subnet_to_shared_network(id=10, name="pykeadhcp")
+    changes = len(parser.journal)
+
+    def failing_pop(items: list, index: int):
+        raise RuntimeError
+
+    # The subnets are moved to the global subnets before the shared network is removed
+    monkeypatch.setattr(parser, "_pop", failing_pop)
+    with pytest.raises(RuntimeError):
+        parser.remove_shared_network(name="pykeadhcp", keep_subnets=True)
+
+    assert [subnet.id for subnet in parser.config.subnet4] == [1]
+    assert parser.get_shared_network("pykeadhcp").subnet4[0].id == 10
+    assert len(parser.journal) == changes
+
+
+def test_ci_kea_parser_snapshot_diff_restore(parser: Dhcp4Parser):
+    first = parser.snapshot()
+    parser.add_subnet(id=10, subnet="192.0.2.0/24")
+    second = parser.snapshot()
+    removed = parser.remove_subnet(id=1)
+
+    changes = parser.diff(first)
+    assert [(change.method, change.action) for change in changes] == [
+        ("add_subnet", "add"),
+        ("remove_subnet", "remove"),
+    ]
+    assert parser.diff(first, second)[0].item.id == 10
+    assert parser.diff(second)[0].item is removed
+
+    undone = parser.restore(second)
+    assert len(undone) == 1
+    assert parser.config.subnet4[0] is removed
+
+    parser.add_subnet(id=11, subnet="198.51.100.0/24")
+    parser.restore(first)
+    assert [subnet.id for subnet in parser.config.subnet4] == [1]
+
+    with pytest.raises(ParserSnapshotError):
+        parser.restore(second)
+
+
+def test_ci_kea_parser_snapshot_clear_journal(parser: Dhcp4Parser):
+    snapshot = parser.snapshot()
+    parser.add_subnet(id=10, subnet="192.0.2.0/24")
+    parser.clear_journal()
+
+    with pytest.raises(ParserSnapshotError):
+        parser.restore(snapshot)
+
+    assert parser.restore(parser.snapshot()) == []
+
+
+def test_ci_kea_parser_transaction_dhcp6():
+    with open("tests/configs/dhcp6_api_config.json") as config:
+        parser = Dhcp6Parser(config=json.load(config))
+
+    snapshot = parser.snapshot()
+    parser.add_pd_pool(id=1, prefix="2001:db8:1::", prefix_len=48, delegated_len=56)
+    parser.remove_pd_pool(id=1, prefix="2001:db8::", prefix_len=48)
+    parser.restore(snapshot)
+
+    assert [pd_pool.prefix for pd_pool in parser.get_subnet(1).pd_pools] == [
+        "2001:db8::"
+    ]
+
+
+def test_ci_kea_parser_journal_only_while_snapshots(parser: Dhcp4Parser):
+    # Nothing can be restored without a snapshot so nothing is recorded
+    parser.add_subnet(id=10, subnet="192.0.2.0/24")
+    parser.remove_subnet(id=10)
+    assert parser.journal == []
+
+    first = parser.snapshot()
+    parser.add_subnet(id=10, subnet="192.0.2.0/24")
+    second = parser.snapshot()
+    parser.add_subnet(id=11, subnet="198.51.100.0/24")
+    assert len(parser.journal) == 2
+
+    # Changes older than the oldest referenced snapshot are dropped
+    del first
+    parser.add_subnet(id=12, subnet="203.0.113.0/24")
+    assert [change.item.id for change in parser.journal] == [11, 12]
+
+    parser.restore(second)
+    assert [subnet.id for subnet in parser.config.subnet4] == [1, 10]
+
+    del second
+    parser.remove_subnet(id=10)
+    assert parser.journal == []
+
+
+def test_ci_kea_parser_snapshot_after_restore(parser: Dhcp4Parser):
+    first = parser.snapshot()
+    parser.add_subnet(id=10, subnet="192.0.2.0/24")
+    parser.restore(first)
+
+    second = parser.snapshot()
+    parser.add_subnet(id=11, subnet="198.51.100.0/24")
+    assert len(parser.restore(second)) == 1
+    assert [subnet.id for subnet in parser.config.subnet4] == [1]
@@ -0,0 +1,110 @@
+import threading
+import pytest
+from pykeadhcp.instrumentation import Instrumentation
+from pykeadhcp.models.generic import KeaResponse
+
+IDENTIFIER_TYPES = ("hw-address", "duid", "circuit-id", "client-id", "flex-id")
+
+
+class OfflineHostApi:
+    """Host database of a single Dhcp4 server answering the host_cmds commands"""
+
+    def __init__(self):
+        self.hook_library = {}
+        self.instrumentation = Instrumentation()
+        self.hosts = {}
+        self.cache = []
+        self.commands = []
+        self.next_host_id = 1
+        self.lock = threading.Lock()
+
+    def add_host(self, host: dict) -> None:
+        self.hosts[self.next_host_id] = {
+            "next-server": "0.0.0.0",
+            "boot-file-name": "",
+            "client-classes": [],
+            "option-data": [],
+            **host,
+        }
+        self.next_host_id += 1
+
+    def get_active_hooks(self, hooks: list) -> list:
+        return ["host_cmds"]
+
+    def send_command(
+        self, command: str, service: str, required_hook: str = ""
+    ) -> KeaResponse:
+        if command == "cache-size":
+            return KeaResponse(result=0, arguments={"size": len(self.cache)})
+        return KeaResponse(result=0, arguments={"Dhcp4": {}})
+
+    def send_command_with_arguments(
+        self, command: str, service: str, arguments: dict, required_hook: str = ""
+    ) -> KeaResponse:
+        with self.lock:
+            self.commands.append(command)
+            return getattr(self, command.replace("-", "_"))(arguments)
+
+    def reservation_get_page(self, arguments: dict) -> KeaResponse:
+        hosts = [
+            (host_id, host)
+            for host_id, host in sorted(self.hosts.items())
+            if host_id > arguments["from"]
+            and host["subnet-id"] == arguments.get("subnet-id", host["subnet-id"])
+        ][: arguments["limit"]]
+        if not hosts:
+            return KeaResponse(result=3, arguments={"count": 0, "hosts": []})
+
+        return KeaResponse(
+            result=0,
+            arguments={
+                "count": len(hosts),
+                "hosts": [
+                    {key: value for key, value in host.items() if key != "subnet-id"}
+                    for _, host in hosts
+                ],
+                "next": {"from": hosts[-1][0], "source-index": 0},
+            },
+        )
+
+    def reservation_add(self, arguments: dict) -> KeaResponse:
+        reservation = arguments["reservation"]
+        for host in self.hosts.values():
+            if host["subnet-id"] != reservation["subnet-id"]:
+                continue
+            if host.get("ip-address") == reservation.get("ip-address") or any(
+                reservation.get(key) and host.get(key) == reservation.get(key)
+                for key in IDENTIFIER_TYPES
+            ):
+                return KeaResponse(result=1, text="Host already exists.")
+
+        self.add_host(reservation)
+        return KeaResponse(result=0, text="Host added.")
+
+    def reservation_del(self, arguments: dict) -> KeaResponse:
+        for host_id, host in list(self.hosts.items()):
+            if (
+                host["subnet-id"] == arguments["subnet-id"]
+                and host.get(arguments["identifier-type"]) == arguments["identifier"]
+            ):
+                del self.hosts[host_id]
+                return KeaResponse(result=0, text="Host deleted.")
+        return KeaResponse(result=1, text="Host not deleted (not found).")
+
+    def cache_insert(self, arguments: dict) -> KeaResponse:
+        if "ip-address" not in arguments or "subnet-id" in arguments:
+            return KeaResponse(result=1, text="Invalid host.")
+        self.cache.append(arguments)
+        return KeaResponse(result=0, text="Inserted.")
+
+    def cache_get_by_id(self, arguments: dict) -> KeaResponse:
+        ((identifier_type, identifier),) = arguments.items()
+        hosts = [host for host in self.cache if host.get(identifier_type) == identifier]
+        if not hosts:
+            return KeaResponse(result=3, text="Host not found.")
+        return KeaResponse(result=0, arguments=hosts)
+
+
+@pytest.fixture
+def host_api():
+    return OfflineHostApi()
@@ -0,0 +1,102 @@
+from pykeadhcp.daemons import Dhcp4
+from pykeadhcp.exceptions import KeaUnknownHostReservationTypeException
+from pykeadhcp.leases import iter_reservations
+from pykeadhcp.models.records import Lease4Record
+from pykeadhcp.reservations import HostCacheWarmer, cache_get_by_ids
+
+
+def lease(number: int, cltt: int, subnet_id: int = 1) -> Lease4Record:
+    return Lease4Record(
+        ip_address=f"192.0.2.{number}",
+        hw_address=f"AA:BB:CC:DD:EE:{number:02X}",
+        subnet_id=subnet_id,
+        cltt=cltt,
+        valid_lft=3600,
+    )
+
+
+def test_ci_kea_reservations_cache_warmer(host_api):
+    for number in range(1, 11):
+        host_api.add_host(
+            {
+                "subnet-id": 1,
+                "hw-address": f"aa:bb:cc:dd:ee:{number:02x}",
+                "ip-address": f"192.0.2.{number}",
+            }
+        )
+    host_api.cache.append({"hw-address": "ff:ff:ff:ff:ff:ff", "ip-address": "10.0.0.1"})
+    dhcp4 = Dhcp4(host_api)
+
+    leases = [
+        lease(3, cltt=1000),
+        lease(7, cltt=3000),
+        lease(5, cltt=2000),
+        lease(5, cltt=500),
+        lease(9, cltt=9000, subnet_id=2),  # Same client in another subnet
+    ]
+    warmer = HostCacheWarmer(dhcp4, max_workers=4, target_size=5)
+    report = warmer.warm(iter_reservations(dhcp4, subnet_id=1), leases=leases)
+    assert report.candidates == 10
+    assert report.inserted == 4
+    assert report.skipped == 6
+    assert report.errors == []
+    assert report.cache_size == 5
+    assert [host["ip-address"] for host in host_api.cache[1:4]] == [
+        "192.0.2.7",
+        "192.0.2.5",
+        "192.0.2.3",
+    ]
+    # Reservations without leases keep their order
+    assert host_api.cache[4]["ip-address"] == "192.0.2.1"
+
+    cached = cache_get_by_ids(
+        dhcp4,
+        [("hw-address", "aa:bb:cc:dd:ee:07"), ("hw-address", "aa:bb:cc:dd:ee:08")],
+    )
+    assert cached[("hw-address", "aa:bb:cc:dd:ee:07")][0].ip_address == "192.0.2.7"
+    assert cached[("hw-address", "aa:bb:cc:dd:ee:08")] is None
+
+
+def test_ci_kea_reservations_cache_warmer_errors(host_api):
+    warmer = HostCacheWarmer(Dhcp4(host_api))
+    report = warmer.warm(
+        [
+            {
+                "subnet-id": 1,
+                "hw-address": "aa:aa:aa:aa:aa:01",
+                "ip-address": "10.0.0.1",
+            },
+            {"subnet-id": 1, "hw-address": "aa:aa:aa:aa:aa:02"},
+            {"hw-address": "aa:aa:aa:aa:aa:03", "ip-address": "10.0.0.3"},
+        ]
+    )
+    assert report.inserted == 1
+    assert report.errors == [
+        "Inserting (1, 'hw-address', 'aa:aa:aa:aa:aa:02'): Invalid host.",
+        "Inserting (None, 'hw-address', 'aa:aa:aa:aa:aa:03'): Reservation has no subnet-id",
+    ]
+    assert report.cache_size == 1
+
+
+def test_ci_kea_reservations_cache_get_by_ids_errors(host_api):
+    host_api.cache.append(
+        {
+            "hw-address": "aa:aa:aa:aa:aa:01",
+            "ip-address": "10.0.0.1",
+            "hostname": "host1",
+        }
+    )
+    cached = cache_get_by_ids(
+        Dhcp4(host_api),
+        [
+            ("hw-address", "aa:aa:aa:aa:aa:01"),
+            ("serial-number", "1234"),
+            ("hw-address", "aa:aa:aa:aa:aa:02"),
+        ],
+    )
+    # A failed lookup doesn't discard the lookups of the other identifiers
+    assert cached[("hw-address", "aa:aa:aa:aa:aa:01")][0].ip_address == "10.0.0.1"
+    assert isinstance(
+        cached[("serial-number", "1234")], KeaUnknownHostReservationTypeException
+    )
+    assert cached[("hw-address", "aa:aa:aa:aa:aa:02")] is None
@@ -0,0 +1,131 @@
+import gzip
+import json
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from requests.exceptions import Timeout
+from pykeadhcp.concurrency import AdaptiveLimit
+from pykeadhcp.daemons import Dhcp4
+from pykeadhcp.models.dhcp4.reservation import Reservation4
+from pykeadhcp.parsers.dhcp4 import Dhcp4Parser
+from pykeadhcp.parsers.exceptions import ParserReservationAlreadyExistError
+from pykeadhcp.reservations import ReservationImporter, read_reservation_rows
+
+
+@pytest.fixture
+def parser():
+    with open("tests/configs/dhcp4_api_config.json") as config:
+        return Dhcp4Parser(config=json.load(config))
+
+
+def write_csv(path, rows: int):
+    with open(path, "w") as file:
+        file.write("subnet-id,hw-address,ip-address,hostname,option-data\n")
+        for host in range(1, rows + 1):
+            file.write(
+                f'1,aa:bb:cc:dd:{host // 256:02x}:{host % 256:02x},10.0.{host // 256}.{host % 256},host{host},"[{{""name"": ""domain-name"", ""data"": ""example.com""}}]"\n'
+            )
+
+
+def test_ci_kea_reservations_importer_read_rows(tmp_path):
+    write_csv(tmp_path / "hosts.csv", 2)
+    rows = list(read_reservation_rows(tmp_path / "hosts.csv"))
+    assert rows[0][0] == 2
+    assert rows[0][1]["option-data"] == [{"name": "domain-name", "data": "example.com"}]
+
+    with gzip.open(tmp_path / "hosts.ndjson.gz", "wt") as file:
+        file.write('{"hw-address": "aa:aa:aa:aa:aa:aa", "ip-address": "10.0.0.1"}\n\n')
+    assert list(read_reservation_rows(tmp_path / "hosts.ndjson.gz")) == [
+        (1, {"hw-address": "aa:aa:aa:aa:aa:aa", "ip-address": "10.0.0.1"})
+    ]
+
+
+def test_ci_kea_reservations_importer_to_daemon(host_api, tmp_path):
+    path = tmp_path / "hosts.csv"
+    write_csv(path, 300)
+    with open(path, "a") as file:
+        file.write("1,aa:bb:cc:dd:00:01,10.0.9.1,,\n")  # Duplicate hw-address
+        file.write("1,aa:bb:cc:dd:09:02,10.0.0.2,,\n")  # Duplicate address
+        file.write("1,aa:bb:cc:dd:09:03,,,\n")  # Missing address
+
+    host_api.add_host(
+        {"subnet-id": 1, "hw-address": "ff:ff:ff:ff:ff:ff", "ip-address": "10.0.0.3"}
+    )
+    importer = ReservationImporter(version=4, max_workers=4, batch_size=50)
+    report = importer.to_daemon(Dhcp4(host_api), path)
+    assert report.rows == 303
+    assert report.valid == 300
+    assert report.duplicates == 2
+    assert report.imported == 299
+    assert len(report.errors) == 4
+    # Errors are reported as the rows stream through, so adding 10.0.0.3 fails first
+    assert report.errors[0] == "Adding 10.0.0.3: Host already exists."
+    assert report.errors[1:3] == [
+        "Line 302: duplicate reservation (1, 'hw-address', 'aa:bb:cc:dd:00:01')",
+        "Line 303: duplicate reservation (1, 'hw-address', 'aa:bb:cc:dd:09:02')",
+    ]
+    assert report.errors[3].startswith("Line 304: ip-address: field required")
+    assert len(host_api.hosts) == 300
+
+
+def test_ci_kea_reservations_importer_to_daemon_transport_errors(
+    host_api, tmp_path, monkeypatch
+):
+    path = tmp_path / "hosts.csv"
+    write_csv(path, 10)
+    reservation_add = host_api.reservation_add
+
+    def timing_out_add(arguments: dict):
+        if arguments["reservation"]["ip-address"] == "10.0.0.5":
+            raise Timeout("Read timed out")
+        return reservation_add(arguments)
+
+    monkeypatch.setattr(host_api, "reservation_add", timing_out_add)
+    limit = AdaptiveLimit(initial=4)
+    importer = ReservationImporter(version=4, limit=limit)
+    report = importer.to_daemon(Dhcp4(host_api), path)
+    assert report.imported == 9
+    assert report.errors == ["Adding 10.0.0.5: Read timed out"]
+    assert limit.limit == 2
+    assert len(host_api.hosts) == 9
+
+
+def test_ci_kea_reservations_importer_to_parser(parser, tmp_path):
+    path = tmp_path / "hosts.csv"
+    write_csv(path, 500)
+    parser.add_subnet(id=10, subnet="10.0.0.0/16")
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        importer = ReservationImporter(executor=executor, batch_size=100)
+        report = importer.to_parser(parser, path, subnet_id=10)
+
+    assert report.imported == 500
+    reservations = parser.get_subnet(10).reservations
+    assert len(reservations) == 500
+    assert reservations[0].subnet_id is None
+    assert reservations[-1].option_data[0].data == "example.com"
+    assert parser.revision == 2
+
+    # Reservations which conflict with the configuration are reported and skipped
+    existing = parser.get_subnet(1).reservations[1]
+    rows = [
+        {"hw-address": "aa:aa:aa:aa:aa:01", "ip-address": "192.168.1.50"},
+        {"hw-address": "aa:aa:aa:aa:aa:02", "ip-address": existing.ip_address},
+        {"hw-address": existing.hw_address.upper(), "ip-address": "192.168.1.51"},
+    ]
+    report = ReservationImporter().to_parser(parser, rows, subnet_id=1)
+    assert report.imported == 1
+    assert report.errors == [
+        f"Adding {existing.ip_address}: Reservation with IP Address {existing.ip_address} already exist",
+        f"Adding 192.168.1.51: Reservation with hw-address {existing.hw_address.replace(':', '')} already exist in subnet 1",
+    ]
+    assert len(parser.get_subnet(1).reservations) == 3
+
+    # Without on_error nothing is added if one of the reservations conflicts
+    with pytest.raises(ParserReservationAlreadyExistError):
+        parser.add_reservations(
+            [
+                Reservation4(hw_address="aa:aa:aa:aa:aa:03", ip_address="192.168.1.52"),
+                Reservation4(hw_address="aa:aa:aa:aa:aa:04", ip_address="192.168.1.50"),
+            ],
+            subnet_id=1,
+        )
+    assert len(parser.get_subnet(1).reservations) == 3
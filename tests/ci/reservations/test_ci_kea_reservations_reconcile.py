@@ -0,0 +1,181 @@
+import pytest
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from pykeadhcp.daemons import Dhcp4
+from pykeadhcp.exceptions import KeaInvalidReservationException
+from pykeadhcp.models.dhcp4.reservation import Reservation4
+from pykeadhcp.reservations import ReservationReconciler
+
+
+def host(number: int, subnet_id: int = 1, **kwargs) -> dict:
+    return {
+        "subnet-id": subnet_id,
+        "hw-address": f"aa:bb:cc:dd:ee:{number:02x}",
+        "ip-address": f"192.0.{subnet_id}.{number}",
+        **kwargs,
+    }
+
+
+def test_ci_kea_reservations_reconcile(host_api):
+    for number in range(1, 6):
+        host_api.add_host(host(number))
+    host_api.add_host(host(1, subnet_id=2))  # Not managed
+    dhcp4 = Dhcp4(host_api)
+
+    desired = [
+        Reservation4.parse_obj(host(1)),
+        host(2, hostname="printer"),  # Updated
+        {**host(3), "hw-address": "AA:BB:CC:DD:EE:03"},  # Same identifier
+        host(4),
+        host(10),  # Added
+        # Host 5 is deleted
+    ]
+    reconciler = ReservationReconciler(dhcp4, max_workers=4, page_size=2)
+    changes = reconciler.plan(desired)
+    assert len(changes) == 3
+    assert changes.unchanged == 3
+    assert changes.actual == 5
+
+    report = reconciler.reconcile(desired, dry_run=True)
+    assert (report.added, report.updated, report.deleted) == (1, 1, 1)
+    assert report.diff_size == 3
+    assert "reservation-add" not in host_api.commands
+
+    report = reconciler.reconcile(desired)
+    assert report.errors == []
+    assert (report.added, report.updated, report.deleted) == (1, 1, 1)
+    addresses = sorted(host["ip-address"] for host in host_api.hosts.values())
+    assert addresses == [
+        "192.0.1.1",
+        "192.0.1.10",
+        "192.0.1.2",
+        "192.0.1.3",
+        "192.0.1.4",
+        "192.0.2.1",
+    ]
+    assert [
+        host["hostname"]
+        for host in host_api.hosts.values()
+        if host["ip-address"] == "192.0.1.2"
+    ] == ["printer"]
+
+    host_api.commands.clear()
+    report = reconciler.reconcile(desired)
+    assert report.diff_size == 0
+    assert report.unchanged == 5
+    assert set(host_api.commands) == {"reservation-get-page"}
+
+
+def test_ci_kea_reservations_reconcile_errors(host_api):
+    dhcp4 = Dhcp4(host_api)
+    reconciler = ReservationReconciler(dhcp4)
+    with pytest.raises(KeaInvalidReservationException):
+        reconciler.plan([{"subnet-id": 1, "ip-address": "192.0.1.1"}])
+    with pytest.raises(KeaInvalidReservationException):
+        reconciler.plan([{"hw-address": "aa:aa:aa:aa:aa:aa"}])
+
+    # Both reservations use the same address so the second one is rejected by Kea
+    report = reconciler.reconcile([host(1), {**host(2), "ip-address": "192.0.1.1"}])
+    assert report.added == 1
+    assert len(report.errors) == 1
+    assert "Host already exists" in report.errors[0]
+
+
+def test_ci_kea_reservations_reconcile_canonical(host_api):
+    option = {
+        "code": 6,
+        "name": "domain-name-servers",
+        "space": "dhcp4",
+        "always-send": False,
+        "never-send": False,
+        "csv-format": True,
+        "data": "192.0.2.53, 192.0.2.54",
+    }
+    host_api.add_host(
+        host(
+            1,
+            **{
+                "option-data": [
+                    option,
+                    {
+                        **option,
+                        "code": 15,
+                        "name": "domain-name",
+                        "data": "example.com",
+                    },
+                ]
+            },
+        )
+    )
+    host_api.add_host(host(2))
+    dhcp4 = Dhcp4(host_api)
+
+    desired = [
+        {
+            **host(1),
+            "hw-address": "AA-BB-CC-DD-EE-01",
+            "option-data": [
+                {"name": "domain-name", "data": "example.com"},
+                {"code": 6, "data": "192.0.2.53,192.0.2.54"},
+            ],
+        },
+        {**host(2), "hw-address": "aabb.ccdd.ee02"},
+    ]
+    changes = ReservationReconciler(dhcp4).plan(desired)
+    assert len(changes) == 0
+    assert changes.unchanged == 2
+
+    desired[0]["option-data"][0]["data"] = "example.org"
+    assert len(ReservationReconciler(dhcp4).plan(desired).update) == 1
+
+
+def test_ci_kea_reservations_reconcile_update_rollback(host_api, monkeypatch):
+    host_api.add_host(host(1))
+    host_api.add_host(host(2))
+    dhcp4 = Dhcp4(host_api)
+    reservation_add = host_api.reservation_add
+
+    def failing_add(arguments: dict):
+        if arguments["reservation"].get("hostname") == "rejected":
+            raise ConnectionError("Connection reset")
+        return reservation_add(arguments)
+
+    monkeypatch.setattr(host_api, "reservation_add", failing_add)
+    report = ReservationReconciler(dhcp4).reconcile(
+        [host(1, hostname="rejected"), host(2, hostname="printer")]
+    )
+    assert report.updated == 1
+    assert report.errors == [
+        "Updating (1, 'hw-address', 'aa:bb:cc:dd:ee:01'): Connection reset, the previous reservation was restored"
+    ]
+    hosts = {host["ip-address"]: host for host in host_api.hosts.values()}
+    assert sorted(hosts) == ["192.0.1.1", "192.0.1.2"]
+    assert "hostname" not in hosts["192.0.1.1"]
+    assert hosts["192.0.1.2"]["hostname"] == "printer"
+
+
+def test_ci_kea_reservations_reconcile_transport_errors(host_api, monkeypatch):
+    for number in range(1, 5):
+        host_api.add_host(host(number))
+    dhcp4 = Dhcp4(host_api)
+    reservation_del = host_api.reservation_del
+
+    def failing_del(arguments: dict):
+        if arguments["identifier"] in ("aa:bb:cc:dd:ee:01", "aa:bb:cc:dd:ee:03"):
+            raise RequestsConnectionError("Connection refused")
+        return reservation_del(arguments)
+
+    monkeypatch.setattr(host_api, "reservation_del", failing_del)
+    # Host 1 is updated, hosts 2 and 3 are deleted and host 4 is unchanged
+    report = ReservationReconciler(dhcp4, max_workers=1).reconcile(
+        [host(1, hostname="printer"), host(4), host(5)]
+    )
+    assert report.deleted == 1
+    assert report.updated == 0
+    assert report.added == 1
+    assert report.errors == [
+        "Deleting (1, 'hw-address', 'aa:bb:cc:dd:ee:03'): Connection refused",
+        "Updating (1, 'hw-address', 'aa:bb:cc:dd:ee:01'): Connection refused",
+    ]
+    hosts = {host["ip-address"]: host for host in host_api.hosts.values()}
+    assert sorted(hosts) == ["192.0.1.1", "192.0.1.3", "192.0.1.4", "192.0.1.5"]
+    assert "hostname" not in hosts["192.0.1.1"]
@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+from pykeadhcp.models.ctrlagent.config import CtrlAgentDaemonConfig
+from pykeadhcp.models.dhcp4.config import Dhcp4DaemonConfig
+from pykeadhcp.models.dhcp6.config import Dhcp6DaemonConfig
+from pykeadhcp.validation import validate_config
+
+
+def issue_types(issues) -> list:
+    return sorted(issue.type for issue in issues)
+
+
+def build_dhcp4_config() -> Dhcp4DaemonConfig:
+    return Dhcp4DaemonConfig.parse_obj(
+        {
+            "interfaces-config": {"interfaces": []},
+            "host-reservation-identifiers": ["hw-address"],
+            "client-classes": [{"name": "pykeadhcp"}],
+            "option-def": [{"name": "pykeadhcp", "code": 222, "type": "string"}],
+            "subnet4": [
+                {
+                    "id": 1,
+                    "subnet": "192.0.2.0/24",
+                    "client-class": "pykeadhcp",
+                    "option-data": [{"code": 222, "data": "pykeadhcp"}],
+                    "reservations": [
+                        {"ip-address": "192.0.2.10", "hw-address": "aa:bb:cc:dd:ee:01"}
+                    ],
+                }
+            ],
+            "shared-networks": [
+                {
+                    "name": "pykeadhcp",
+                    "subnet4": [
+                        {
+                            "id": 1,
+                            "subnet": "198.51.100.0/24",
+                            "require-client-classes": ["undefined-class"],
+                            "option-data": [{"code": 223, "data": "pykeadhcp"}],
+                            "reservations": [
+                                {"ip-address": "198.51.100.10", "client-id": "01aabb"},
+                                {
+                                    "ip-address": "198.51.100.11",
+                                    "hw-address": "aa:bb:cc:dd:ee:02",
+                                    "client-id": "01aabbcc",
+                                    "client-classes": ["KNOWN"],
+                                },
+                            ],
+                        }
+                    ],
+                }
+            ],
+        }
+    )
+
+
+def test_ci_kea_validation_config_dhcp4_clean(dhcp4_model: Dhcp4DaemonConfig):
+    assert validate_config(dhcp4_model) == []
+
+
+def test_ci_kea_validation_config_dhcp6_clean(dhcp6_model: Dhcp6DaemonConfig):
+    assert validate_config(dhcp6_model) == []
+
+
+def test_ci_kea_validation_config_ctrlagent_clean(
+    ctrlagent_model: CtrlAgentDaemonConfig,
+):
+    assert validate_config(ctrlagent_model) == []
+
+
+def test_ci_kea_validation_config_dhcp4_issues():
+    issues = validate_config(build_dhcp4_config())
+    assert issue_types(issues) == [
+        "client-class-undefined",
+        "option-def-missing",
+        "reservation-identifier-invalid",
+        "reservation-identifier-unknown",
+        "subnet-id-duplicate",
+    ]
+    assert all(
+        issue.subnet_id == 1 for issue in issues if issue.type != "subnet-id-duplicate"
+    )
+
+
+def test_ci_kea_validation_config_dhcp4_executor():
+    config = build_dhcp4_config()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert issue_types(validate_config(config, executor=executor)) == issue_types(
+            validate_config(config)
+        )
+
+
+def test_ci_kea_validation_config_ctrlagent_issues(
+    ctrlagent_model: CtrlAgentDaemonConfig,
+):
+    config = ctrlagent_model.copy(deep=True)
+    config.key_file = None
+    config.control_sockets.dhcp6.socket_name = config.control_sockets.dhcp4.socket_name
+    assert issue_types(validate_config(config)) == [
+        "control-socket-duplicate",
+        "tls-incomplete",
+    ]
@@ -0,0 +1,107 @@
+from pykeadhcp.models.dhcp4.config import Dhcp4DaemonConfig
+from pykeadhcp.models.dhcp6.config import Dhcp6DaemonConfig
+from pykeadhcp.validation import check_overlaps
+
+
+def build_dhcp4_config(**kwargs) -> Dhcp4DaemonConfig:
+    return Dhcp4DaemonConfig.parse_obj(
+        {"interfaces-config": {"interfaces": []}, **kwargs}
+    )
+
+
+def issue_types(issues) -> list:
+    return sorted(issue.type for issue in issues)
+
+
+def test_ci_kea_validation_overlap_dhcp4_clean(dhcp4_model: Dhcp4DaemonConfig):
+    assert check_overlaps(dhcp4_model) == []
+
+
+def test_ci_kea_validation_overlap_dhcp6_clean(dhcp6_model: Dhcp6DaemonConfig):
+    assert check_overlaps(dhcp6_model) == []
+
+
+def test_ci_kea_validation_overlap_dhcp4_subnets_and_pools():
+    config = build_dhcp4_config(
+        **{
+            "subnet4": [
+                {
+                    "id": 1,
+                    "subnet": "192.0.2.0/24",
+                    "pools": [
+                        {"pool": "192.0.2.10-192.0.2.20"},
+                        {"pool": "192.0.2.16/28"},
+                        {"pool": "198.51.100.1-198.51.100.2"},
+                    ],
+                }
+            ],
+            "shared-networks": [
+                {
+                    "name": "pykeadhcp",
+                    "subnet4": [{"id": 2, "subnet": "192.0.2.128/25"}],
+                }
+            ],
+        }
+    )
+    issues = check_overlaps(config)
+    assert issue_types(issues) == [
+        "pool-outside-subnet",
+        "pool-overlap",
+        "subnet-overlap",
+    ]
+
+    subnet_overlap = next(issue for issue in issues if issue.type == "subnet-overlap")
+    assert subnet_overlap.subnet_id == 2
+    assert subnet_overlap.objects == [
+        "subnet 1 (192.0.2.0/24)",
+        "subnet 2 (192.0.2.128/25)",
+    ]
+
+
+def test_ci_kea_validation_overlap_dhcp4_reservations():
+    config = build_dhcp4_config(
+        **{
+            "reservations-out-of-pool": True,
+            "subnet4": [
+                {
+                    "id": 1,
+                    "subnet": "192.0.2.0/24",
+                    "pools": [{"pool": "192.0.2.10-192.0.2.20"}],
+                    "reservations": [
+                        {"ip-address": "192.0.2.15", "hw-address": "aa:aa:aa:aa:aa:01"},
+                        {"ip-address": "192.0.2.30", "hw-address": "aa:aa:aa:aa:aa:02"},
+                        {"ip-address": "192.0.2.30", "hw-address": "aa:aa:aa:aa:aa:03"},
+                        {"ip-address": "10.0.0.1", "hw-address": "aa:aa:aa:aa:aa:04"},
+                    ],
+                },
+                {
+                    "id": 2,
+                    "subnet": "198.51.100.0/24",
+                    "reservations-out-of-pool": False,
+                    "pools": [{"pool": "198.51.100.10-198.51.100.20"}],
+                    "reservations": [
+                        {
+                            "ip-address": "198.51.100.15",
+                            "hw-address": "aa:aa:aa:aa:aa:05",
+                        }
+                    ],
+                },
+            ],
+        }
+    )
+    assert issue_types(check_overlaps(config)) == [
+        "reservation-duplicate",
+        "reservation-in-pool",
+        "reservation-outside-subnet",
+    ]
+
+    config.ip_reservations_unique = False
+    assert "reservation-duplicate" not in issue_types(check_overlaps(config))
+
+
+def test_ci_kea_validation_overlap_dhcp6_pd_pools(dhcp6_model: Dhcp6DaemonConfig):
+    config = dhcp6_model.copy(deep=True)
+    config.subnet6[0].pd_pools.append(
+        config.subnet6[0].pd_pools[0].copy(update={"prefix_len": 40})
+    )
+    assert issue_types(check_overlaps(config)) == ["pd-pool-overlap"]
@@ -26,6 +26,14 @@ def pytest_addoption(parser):
         help="Port for Kea Server API",
         default=8000,
     )
+    parser.addoption(
+        "--standby-port",
+        action="store",
+        dest="standby_port",
+        type=int,
+        help="Port for the Kea Server API of the HA standby (Control Agent of keastandby)",
+        default=8001,
+    )
     parser.addoption(
         "--disable-ssl-verify",
         action="store_true",
@@ -66,10 +74,8 @@ def pytest_addoption(parser):
     )
 
 
-@pytest.fixture(scope="module")
-def kea_server(request: FixtureRequest):
+def build_kea_server(request: FixtureRequest, port: int) -> Kea:
     host = request.config.getoption("host")
-    port = request.config.getoption("port", default=8000)
     disable_ssl_verify = request.config.getoption("disable_ssl_verify", default=False)
     ssl_ca_bundle = request.config.getoption("ssl_ca_bundle", default=None)
     raise_generic_errors = request.config.getoption(
@@ -88,6 +94,18 @@ def kea_server(request: FixtureRequest):
     )
 
 
+@pytest.fixture(scope="module")
+def kea_server(request: FixtureRequest):
+    return build_kea_server(request, request.config.getoption("port", default=8000))
+
+
+@pytest.fixture(scope="module")
+def kea_standby_server(request: FixtureRequest):
+    return build_kea_server(
+        request, request.config.getoption("standby_port", default=8001)
+    )
+
+
 def read_local_config(filename: str):
     json_file = Path(filename)
     if not json_file.exists():
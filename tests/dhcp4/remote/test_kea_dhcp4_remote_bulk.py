@@ -0,0 +1,56 @@
+from pykeadhcp import Kea
+from pykeadhcp.config_backend import RemoteBulkWriter
+from pykeadhcp.models.dhcp4.shared_network import SharedNetwork4
+from pykeadhcp.models.dhcp4.subnet import Subnet4
+
+"""remote bulk writer process:
+write shared network (with subnets) + global subnets
+verify
+cleanup
+"""
+
+
+def test_kea_dhcp4_remote_bulk_write(kea_server: Kea, db_remote_map: dict):
+    network = SharedNetwork4(
+        name="pykeadhcp-bulk",
+        subnet4=[Subnet4(id=40200, subnet="192.0.2.200/31")],
+    )
+    subnets = (
+        Subnet4(id=40201 + index, subnet=f"198.51.100.{index * 2}/31")
+        for index in range(10)
+    )
+
+    writer = RemoteBulkWriter(
+        kea_server.dhcp4, server_tags=["all"], remote_map=db_remote_map
+    )
+    report = writer.write(shared_networks=[network], subnets=subnets)
+
+    assert report.total == 12
+    assert report.succeeded == 12
+    assert not report.failed
+    assert report.pull.result == 0
+
+
+def test_kea_dhcp4_remote_bulk_verify(kea_server: Kea, db_remote_map: dict):
+    subnet = kea_server.dhcp4.remote_subnet4_get_by_id(
+        subnet_id=40200, remote_map=db_remote_map
+    )
+    assert subnet.subnet == "192.0.2.200/31"
+
+    subnet = kea_server.dhcp4.remote_subnet4_get_by_id(
+        subnet_id=40210, remote_map=db_remote_map
+    )
+    assert subnet.subnet == "198.51.100.18/31"
+
+
+def test_kea_dhcp4_remote_bulk_cleanup(kea_server: Kea, db_remote_map: dict):
+    for subnet_id in range(40200, 40211):
+        response = kea_server.dhcp4.remote_subnet4_del_by_id(
+            subnet_id=subnet_id, remote_map=db_remote_map
+        )
+        assert response.result == 0
+
+    response = kea_server.dhcp4.remote_network4_del(
+        name="pykeadhcp-bulk", remote_map=db_remote_map
+    )
+    assert response.result == 0
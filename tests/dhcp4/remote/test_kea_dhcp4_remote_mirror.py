@@ -0,0 +1,39 @@
+from pykeadhcp import Kea
+from pykeadhcp.config_backend import ConfigBackendMirror
+from pykeadhcp.models.dhcp4.subnet import Subnet4
+
+"""config backend mirror process:
+create subnet
+full refresh + verify
+incremental refresh + delete subnet
+cleanup
+"""
+
+
+def test_kea_dhcp4_remote_mirror(kea_server: Kea, db_remote_map: dict):
+    subnet = Subnet4(id=40300, subnet="192.0.2.64/31")
+    response = kea_server.dhcp4.remote_subnet4_set(
+        subnet=subnet, server_tags=["all"], remote_map=db_remote_map
+    )
+    assert response.result == 0
+
+    mirror = ConfigBackendMirror(
+        kea_server.dhcp4, server_tags=["all"], remote_map=db_remote_map
+    )
+    report = mirror.refresh()
+    assert report.full
+    assert mirror.get_subnet(40300).subnet == "192.0.2.64/31"
+    assert mirror.get_subnet_by_prefix("192.0.2.64/31").id == 40300
+
+    report = mirror.refresh()
+    assert not report.full
+    assert report.fetched == 0
+
+    response = kea_server.dhcp4.remote_subnet4_del_by_id(
+        subnet_id=40300, remote_map=db_remote_map
+    )
+    assert response.result == 0
+
+    report = mirror.refresh()
+    assert report.removed == 1
+    assert mirror.get_subnet(40300) is None
@@ -0,0 +1,29 @@
+from pykeadhcp import Kea
+from pykeadhcp.ha import KeaHAPair, HAMaintenanceWorkflow
+
+
+def test_kea_dhcp4_ha_maintenance_workflow_cancel(
+    kea_server: Kea, kea_standby_server: Kea
+):
+    pair = KeaHAPair(primary=kea_server, secondary=kea_standby_server, service="dhcp4")
+    workflow = HAMaintenanceWorkflow(timeout=60, poll_interval=1)
+
+    report = workflow.run(pair, name="pytest", maintain="secondary", sync=False)
+    assert report.success, report.error
+    assert [step.name for step in report.steps] == [
+        "ha_maintenance_start",
+        "ha_maintenance_cancel",
+    ]
+
+
+def test_kea_dhcp4_ha_maintenance_workflow_sync(
+    kea_server: Kea, kea_standby_server: Kea
+):
+    pair = KeaHAPair(primary=kea_server, secondary=kea_standby_server, service="dhcp4")
+    workflow = HAMaintenanceWorkflow(timeout=60, poll_interval=1)
+
+    reports = workflow.run_many({"pytest": pair}, maintain="secondary")
+    report = reports["pytest"]
+    assert report.success, report.error
+    assert report.max_period >= workflow.min_max_period
+    assert "ha_sync" in [step.name for step in report.steps]
@@ -0,0 +1,28 @@
+from pykeadhcp import Kea
+from pykeadhcp.ha import HAMonitor
+
+
+def test_kea_dhcp4_ha_monitor_poll(kea_server: Kea):
+    monitor = HAMonitor(use_heartbeat=True)
+    monitor.add(name="primary", server=kea_server, service="dhcp4")
+
+    transitions = monitor.poll()
+    assert len(transitions) == 1
+    assert transitions[0].previous_state is None
+
+    state = monitor.current_state("primary")
+    assert state.reachable
+    assert state.state == "hot-standby"
+    assert state.heartbeat.state == "hot-standby"
+    assert state.high_availability[0].ha_servers.local.role == "primary"
+
+
+def test_kea_dhcp4_ha_monitor_unreachable(kea_server: Kea):
+    unreachable = Kea(host=kea_server.host, port=1)
+    monitor = HAMonitor()
+    monitor.add(name="unreachable", server=unreachable, service="dhcp4")
+
+    transitions = monitor.poll()
+    assert transitions[0].state == "unreachable"
+    assert monitor.current_state("unreachable").consecutive_failures == 1
+    assert monitor.poll() == []
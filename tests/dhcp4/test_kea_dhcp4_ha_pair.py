@@ -0,0 +1,24 @@
+from pykeadhcp import Kea
+from pykeadhcp.ha import KeaHAPair
+
+
+def test_kea_dhcp4_ha_pair_route(kea_server: Kea, kea_standby_server: Kea):
+    pair = KeaHAPair(primary=kea_server, secondary=kea_standby_server, service="dhcp4")
+
+    assert pair.route("lease4_add")[0] == "primary"
+
+
+def test_kea_dhcp4_ha_pair_status_get(kea_server: Kea, kea_standby_server: Kea):
+    pair = KeaHAPair(primary=kea_server, secondary=kea_standby_server, service="dhcp4")
+
+    status = pair.status_get()
+    assert status.high_availability
+
+
+def test_kea_dhcp4_ha_pair_failover(kea_server: Kea):
+    unreachable = Kea(host=kea_server.host, port=1)
+    pair = KeaHAPair(primary=unreachable, secondary=kea_server, service="dhcp4")
+
+    status = pair.status_get()
+    assert status.high_availability
+    assert pair.route("lease4_add")[0] == "secondary"